@@ -0,0 +1,147 @@
+import argparse
+import os
+import time
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from midap.networks.deltav2 import unet_track
+from midap.networks.onnx_backend import load_onnx_model
+from midap.networks.unets import UNetv1
+from midap.utils import get_logger
+
+# Functions
+###########
+
+
+def throughput(model, x: np.ndarray, batch_size: int, repeats: int):
+    """
+    Measures the throughput of a model, the first prediction is not timed
+    :param model: A model with a predict method (Keras or OnnxModel)
+    :param x: The inputs
+    :param batch_size: The batch size of the predictions
+    :param repeats: The number of timed predictions
+    :returns: The throughput in inputs per second and the last prediction
+    """
+
+    pred = model.predict(x, batch_size=batch_size, verbose=0)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pred = model.predict(x, batch_size=batch_size, verbose=0)
+    return repeats * len(x) / (time.perf_counter() - start), pred
+
+
+def main(
+    network: str,
+    weights: Union[str, bytes, os.PathLike],
+    input_size: Optional[Tuple[int, int, int]] = None,
+    num_inputs=16,
+    batch_size=8,
+    repeats=5,
+    onnx_threads=0,
+    loglevel=7,
+):
+    """
+    Compares the TensorFlow and the ONNX Runtime inference of a network on the CPU
+    :param network: The network, "unet" (midap.networks.unets.UNetv1) or "deltav2" (midap.networks.deltav2.unet_track)
+    :param weights: The path to the weights of the network
+    :param input_size: The input size of the network, defaults to (256, 256, 1) for the UNet and (256, 32, 4) for
+                       the tracking network
+    :param num_inputs: The number of random inputs that are predicted
+    :param batch_size: The batch size of the predictions
+    :param repeats: The number of timed predictions per backend
+    :param onnx_threads: The number of intra-op threads of onnxruntime, 0 uses all physical cores
+    :param loglevel: The loglevel between 0 and 7, defaults to highest level
+    :returns: A dictionary with the throughput of both backends in inputs per second and the maximum absolute
+              difference of the predictions
+    """
+
+    # logging
+    logger = get_logger(__file__, loglevel)
+
+    if network == "unet":
+        input_size = (256, 256, 1) if input_size is None else tuple(input_size)
+
+        def build():
+            model = UNetv1(input_size=input_size, inference=True)
+            model.load_weights(weights)
+            return model
+
+    elif network == "deltav2":
+        input_size = (256, 32, 4) if input_size is None else tuple(input_size)
+
+        def build():
+            return unet_track(weights, input_size)
+
+    else:
+        raise ValueError(f"Unknown network: {network}")
+
+    x = np.random.default_rng(0).random((num_inputs,) + input_size).astype(np.float32)
+
+    logger.info(f"Benchmarking {network} with input size {input_size}...")
+    tf_throughput, tf_pred = throughput(build(), x, batch_size, repeats)
+    onnx_model = load_onnx_model(build, weights, input_size, threads=onnx_threads)
+    onnx_throughput, onnx_pred = throughput(onnx_model, x, batch_size, repeats)
+    max_diff = float(np.max(np.abs(tf_pred - onnx_pred)))
+
+    logger.info(f"TensorFlow:   {tf_throughput:.2f} inputs/s")
+    logger.info(f"ONNX Runtime: {onnx_throughput:.2f} inputs/s")
+    logger.info(
+        f"Speedup: {onnx_throughput / tf_throughput:.2f}x, max abs diff: {max_diff:.2e}"
+    )
+
+    return {
+        "tensorflow": tf_throughput,
+        "onnx": onnx_throughput,
+        "max_abs_diff": max_diff,
+    }
+
+
+# Main
+######
+
+if __name__ == "__main__":
+    # arg parsing
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--network",
+        type=str,
+        choices=["unet", "deltav2"],
+        required=True,
+        help="The network to benchmark.",
+    )
+    parser.add_argument(
+        "--weights",
+        type=str,
+        required=True,
+        help="Path to the weights of the network.",
+    )
+    parser.add_argument(
+        "--input_size",
+        type=int,
+        nargs=3,
+        default=None,
+        help="Input size of the network (height width channels).",
+    )
+    parser.add_argument(
+        "--num_inputs", type=int, default=16, help="Number of predicted inputs."
+    )
+    parser.add_argument(
+        "--batch_size", type=int, default=8, help="Batch size of the predictions."
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="Number of timed predictions."
+    )
+    parser.add_argument(
+        "--onnx_threads",
+        type=int,
+        default=0,
+        help="Number of intra-op threads of onnxruntime, defaults to 0 (all physical cores).",
+    )
+    parser.add_argument(
+        "--loglevel", type=int, default=7, help="Loglevel of the script."
+    )
+    args = parser.parse_args()
+
+    # run
+    main(**vars(args))
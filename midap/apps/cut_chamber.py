@@ -5,7 +5,9 @@ import os
 from midap.imcut import *
 from midap.imcut import base_cutout
 
-from typing import Optional, Union, Iterable
+from typing import List, Optional, Union, Iterable
+
+from midap.data.frame_store import FrameStore
 
 
 def main(
@@ -15,15 +17,31 @@ def main(
     cutout_class: str,
     corners: Optional[tuple] = None,
     offsets: Optional[list] = None,
-    registration: bool = True,
+    registration: Union[bool, str] = True,
+    storage="files",
+    sources: Optional[List[FrameStore]] = None,
+    codec="default",
+    workers=1,
+    registration_mode="full",
+    cache_shifts=False,
 ):
     """
     Performs the image cutout and alignment on all images in the paths
     :param channel: A single directory or a list of directories with the images to cut and align
     :param cutout_class: Name of the class used to perform the chamber cutout. Must be defined in a file of
                          midap.imcut and a subclass of midap.imcut.base_cutout.CutoutImage
-    :param registration: If True, perform cross-image registration using the first channel. If False,
-                         use static corners (no phase channel required).
+    :param registration: If True, perform cross-image registration using the first channel. If "subpixel", the
+                         shifts are estimated and applied with subpixel precision. If False, use static corners (no
+                         phase channel required).
+    :param storage: The frame storage backend of the raw images and cutouts, see midap.data.frame_store
+    :param sources: Optional frame stores (one per channel) to read the frames from instead of the channel
+                    directories, e.g. frames that are split on the fly, see midap.apps.split_frames.get_frame_source
+    :param codec: The codec used to write the cutouts, see midap.data.frame_store.parse_codec
+    :param workers: The number of threads used for the FFTs of the registration and the channels that are cut in
+                    parallel
+    :param registration_mode: How the frames are registered, "full", "roi" or "pyramid",
+                              see midap.imcut.registration
+    :param cache_shifts: Save the shifts next to the channel data and reuse them for frames with the same content
     """
     # get the right subclass
     class_instance = None
@@ -41,14 +59,30 @@ def main(
             f"Cutout class {cutout_class} supports more than one machine type!"
         )
     if "Family_Machine" in class_instance.supported_setups:
-        cut = class_instance(channel)
+        cut = class_instance(
+            channel,
+            storage=storage,
+            sources=sources,
+            codec=codec,
+            workers=workers,
+            registration_mode=registration_mode,
+            cache_shifts=cache_shifts,
+        )
         if corners is not None:
             cut.corners_cut = corners
         cut.run_align_cutout(registration=registration)
 
         return cut.corners_cut
     elif "Mother_Machine" in class_instance.supported_setups:
-        cut = class_instance(channel)
+        cut = class_instance(
+            channel,
+            storage=storage,
+            sources=sources,
+            codec=codec,
+            workers=workers,
+            registration_mode=registration_mode,
+            cache_shifts=cache_shifts,
+        )
         if corners is not None and offsets is not None:
             cut.corners_cut = corners
             cut.offsets = offsets
@@ -74,6 +108,37 @@ if __name__ == "__main__":
         help="Name of the class used to perform the chamber cutout. Must be defined in a file of "
         "midap.imcut and a subclass of midap.imcut.base_cutout.CutoutImage",
     )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        choices=["files", "hdf5"],
+        default="files",
+        help="Storage backend of the raw images and the cutouts, defaults to one file per frame.",
+    )
+    parser.add_argument(
+        "--codec",
+        type=str,
+        default="default",
+        help="Codec of the cutouts, e.g. png-1, tif-zstd or npy, defaults to PNG and TIFF.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of threads used for the registration and the cutout of the channels, defaults to 1.",
+    )
+    parser.add_argument(
+        "--registration_mode",
+        type=str,
+        choices=["full", "roi", "pyramid"],
+        default="full",
+        help="Register the full frames, a window around the cutout or coarse-to-fine, defaults to full.",
+    )
+    parser.add_argument(
+        "--cache_shifts",
+        action="store_true",
+        help="Save the registration shifts next to the channel data and reuse them, e.g. on a restart.",
+    )
     args = parser.parse_args()
 
     # unpack the namespace
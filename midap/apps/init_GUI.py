@@ -2,12 +2,9 @@ import logging
 
 import midap.apps.PySimpleGUI as sg
 import numpy as np
-import re
-
-from glob import glob
-from pathlib import Path
 
 from midap.config import Config
+from midap.data.manifest import get_manifest
 from midap.utils import get_logger, get_inheritors
 
 # Get all subclasses for the dropdown menus
@@ -132,18 +129,14 @@ def main(config_file="settings.ini", loglevel=7):
         "IdentifierName": values["pos"],
     }
 
-    # Get all the idetifiers
-    folder_path = Path(general["FolderPath"])
-    if general["FileType"] == "ome.tif":
-        files = sorted(folder_path.glob(f"*{general['IdentifierName']}*.export"))
-    else:
-        files = sorted(
-            folder_path.glob(f"*{general['IdentifierName']}*.{general['FileType']}")
-        )
-
-    unique_identifiers = np.unique(
-        [re.search(f"{general['IdentifierName']}\d+", f.name)[0] for f in files]
+    # Get all the idetifiers from the manifest of the folder (built once from the file headers)
+    manifest = get_manifest(
+        general["FolderPath"],
+        general["IdentifierName"],
+        general["FileType"],
+        logger=logger,
     )
+    unique_identifiers = manifest.identifiers
     if len(unique_identifiers) > 0:
         logger.info(f"Extracted unique identifiers: {unique_identifiers}")
     else:
@@ -196,8 +189,13 @@ def main(config_file="settings.ini", loglevel=7):
             ],
         ]
 
+        # the number of frames is known from the file headers
+        num_frames = manifest.num_frames(id_name)
+        frame_text = "Set frame number"
+        if num_frames is not None:
+            frame_text += f" ({num_frames} available)"
         frames = [
-            [sg.Text("Set frame number")],
+            [sg.Text(frame_text)],
             [
                 sg.Input(defaults["StartFrame"], size=(5, 30), key="start_frame"),
                 sg.Text("-"),
@@ -206,7 +204,7 @@ def main(config_file="settings.ini", loglevel=7):
         ]
 
         # get the default channels
-        default_registration = defaults.getboolean("Registration", fallback=True)
+        default_registration = defaults.get("Registration", fallback="True").lower()
         if defaults["Channels"] == "None":
             default_ph = ""
             default_ch = ""
@@ -225,7 +223,14 @@ def main(config_file="settings.ini", loglevel=7):
                 sg.Checkbox(
                     "Enable image registration (requires a phase channel)",
                     key="registration",
-                    default=default_registration,
+                    default=default_registration != "false",
+                )
+            ],
+            [
+                sg.Checkbox(
+                    "Subpixel precision",
+                    key="subpixel",
+                    default=default_registration == "subpixel",
                 )
             ],
             [sg.Text("")],
@@ -494,6 +499,8 @@ def main(config_file="settings.ini", loglevel=7):
         # get all the channels; filter empty parts so a missing phase channel
         # doesn't produce a leading comma (which would create a spurious empty channel)
         section["Registration"] = values["registration"]
+        if values["registration"] and values["subpixel"]:
+            section["Registration"] = "subpixel"
         channels = ",".join(p for p in [values["ch1"], values["ch2"]] if p)
         section["Channels"] = channels
 
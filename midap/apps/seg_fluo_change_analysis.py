@@ -3,34 +3,34 @@ import os
 from pathlib import Path
 from typing import Union, List
 
-from skimage import io
 from skimage.measure import regionprops_table
 
+from midap.data.frame_store import get_frame_store
+
 import pandas as pd
 from tqdm import tqdm
 
 
-def load_img_stack(path: Union[str, os.PathLike], files: List[Union[str, os.PathLike]]):
+def load_img_stack(path: Union[str, os.PathLike], storage="files"):
     """
     Loads all imgs from folder and combines them to stack.
-    :param path: Path to channel folder.
-    :param files: List with file names of images.
+    :param path: Path to the image folder.
+    :param storage: Frame storage backend of the images.
     """
-    stack = []
-    for f in files:
-        stack.append(io.imread(path.joinpath(f)))
-    stack = np.array(stack)
+    with get_frame_store(path, backend=storage) as store:
+        stack = np.array([store.read(name) for name in store.names])
     return stack
 
 
 def fluo_analysis_per_channel(
-    path: Union[str, os.PathLike], ref_channel: str, add_channel: str
+    path: Union[str, os.PathLike], ref_channel: str, add_channel: str, storage="files"
 ):
     """
     Loads tracking output and adds intensities per cell and channel to dataframe.
     :param path: Path to output folder.
     :param channels: List with channels.
     :param tracking_class: Name of used tracking class.
+    :param storage: Frame storage backend of the image stacks.
     """
 
     # create path's
@@ -41,15 +41,10 @@ def fluo_analysis_per_channel(
     path_add_ch_img = path_add_channel.joinpath("cut_im")
     path_add_ch_img_raw = path_add_channel.joinpath("cut_im_rawcounts")
 
-    # get all file names from folder
-    ref_ch_seg_all_files = np.sort(os.listdir(path_ref_ch_seg))
-    add_ch_img_all_files = np.sort(os.listdir(path_add_ch_img))
-    add_ch_img_raw_all_files = np.sort(os.listdir(path_add_ch_img_raw))
-
     # load img stacks
-    segs_ref_ch = load_img_stack(path_ref_ch_seg, ref_ch_seg_all_files)
-    img_add_ch = load_img_stack(path_add_ch_img, add_ch_img_all_files)
-    img_add_ch_raw = load_img_stack(path_add_ch_img_raw, add_ch_img_raw_all_files)
+    segs_ref_ch = load_img_stack(path_ref_ch_seg, storage=storage)
+    img_add_ch = load_img_stack(path_add_ch_img, storage=storage)
+    img_add_ch_raw = load_img_stack(path_add_ch_img_raw, storage=storage)
 
     # Loop through all frames
     df_all = pd.DataFrame()
@@ -111,19 +106,23 @@ def fluo_analysis_per_channel(
     return df_all
 
 
-def main(path: Union[str, os.PathLike], channels: List[str]):
+def main(path: Union[str, os.PathLike], channels: List[str], storage="files"):
     """
     Loads tracking output and adds intensities per cell and channel to dataframe.
     :param path: Path to output folder.
     :param channels: List with channels.
     :param tracking_class: Name of used tracking class.
+    :param storage: Frame storage backend of the image stacks.
     """
     add_channels = channels[1:]
 
     df_all_channels = pd.DataFrame()
     for add_channel in add_channels:
         df = fluo_analysis_per_channel(
-            path=path, ref_channel=channels[0], add_channel=add_channel
+            path=path,
+            ref_channel=channels[0],
+            add_channel=add_channel,
+            storage=storage,
         )
         df_all_channels = pd.concat([df_all_channels, df], axis=1)
 
@@ -4,12 +4,12 @@ import numpy as np
 import pandas as pd
 import argparse
 
-from skimage import io
 from skimage.measure import regionprops
 from pathlib import Path
 from typing import Union
 from tqdm import tqdm
 
+from midap.data.frame_store import get_frame_store
 from midap.utils import get_logger
 
 # Functions
@@ -54,12 +54,14 @@ def main(
     path_seg: Union[str, bytes, os.PathLike],
     path_result: Union[str, bytes, os.PathLike],
     loglevel=7,
+    storage="files",
 ):
     """
     Analyses the segmentation images in a given folder
     :param path_seg: The directory containing the segmented images (labelled)
     :param path_result: The directory to save the results
     :param loglevel: The loglevel between 0 and 7 (defaults to 7)
+    :param storage: The frame storage backend of the segmentations, see midap.data.frame_store
     """
 
     # logging
@@ -75,10 +77,10 @@ def main(
     path_result = Path(path_result)
 
     # cycle through everything
-    for p in tqdm(sorted(path_seg.iterdir())):
-        img = io.imread(p)
-        num_cells.append(count_cells(img))
-        num_killed.append(count_killed(img))
+    with get_frame_store(path_seg, backend=storage) as store:
+        for img in tqdm(store):
+            num_cells.append(count_cells(img))
+            num_killed.append(count_killed(img))
 
     # crete a dataframe
     num_cells = np.array(num_cells)
@@ -106,6 +108,13 @@ if __name__ == "__main__":
         required=True,
         help="Path where the results should be stored",
     )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        choices=["files", "hdf5"],
+        default="files",
+        help="Storage backend of the segmentations, defaults to one file per frame.",
+    )
     parser.add_argument(
         "--loglevel", type=int, default=7, help="Loglevel of the script."
     )
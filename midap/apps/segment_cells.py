@@ -1,12 +1,12 @@
 import argparse
 import os
 
-from typing import Union
+from typing import Optional, Tuple, Union
 from pathlib import Path
 
 # to get all subclasses
 from midap.segmentation import *
-from midap.segmentation import base_segmentator
+from midap.segmentation import base_segmentator, stardist_segmentator, unet_segmentator
 from midap.utils import get_inheritors
 
 ### Functions
@@ -23,6 +23,17 @@ def main(
     network_name: Union[str, bytes, os.PathLike, None] = None,
     just_select=False,
     img_threshold=1.0,
+    storage="files",
+    codec="default",
+    batch_size=16,
+    prefetch=2,
+    workers=1,
+    tile_size: Optional[int] = None,
+    tile_overlap=64,
+    tile_blending="cosine",
+    n_tiles: Optional[Tuple[int, int]] = None,
+    backend="tensorflow",
+    onnx_threads=0,
 ):
     """
     Performs cell segmentation on all images in a given directory
@@ -35,6 +46,18 @@ def main(
     :param network_name: Optional name of the network to skip interactive selection
     :param just_select: If True, just the network selection is performed
     :param img_threshold: The threshold for the image to cap large values of the pixels
+    :param storage: The frame storage backend of the cutouts and segmentations, see midap.data.frame_store
+    :param codec: The codec used to write the segmentations, see midap.data.frame_store.parse_codec
+    :param batch_size: The number of images that are segmented at once
+    :param prefetch: The number of batches that are read ahead while a batch is segmented
+    :param workers: The number of threads that postprocess the segmentations
+    :param tile_size: If set, UNet based classes predict the images in overlapping tiles of this size
+    :param tile_overlap: The minimal overlap of the tiles in pixels
+    :param tile_blending: The blending of the overlapping tiles, "cosine" or "linear"
+    :param n_tiles: If set, StarDist based classes predict the images in this number of tiles per axis
+    :param backend: The inference backend of UNet based classes, "tensorflow" or "onnx", the other classes always use
+                    their default
+    :param onnx_threads: The number of intra-op threads of onnxruntime, 0 uses all physical cores
     :return: The name of the selected model weights, note that if just_select is True and the model weights are provided
              a check is performed if the model class actually exists and the model weights are returned if so
     """
@@ -49,12 +72,36 @@ def main(
     if class_instance is None:
         raise ValueError(f"Chosen class does not exist: {segmentation_class}")
 
+    # the tiling and the ONNX backend are only available for UNet based classes
+    kwargs = {}
+    if issubclass(class_instance, unet_segmentator.UNetSegmentation):
+        kwargs = dict(backend=backend, onnx_threads=onnx_threads)
+    if tile_size is not None:
+        if not issubclass(class_instance, unet_segmentator.UNetSegmentation):
+            raise ValueError(
+                f"Tiled inference is not supported by {segmentation_class}"
+            )
+        kwargs.update(
+            tile_size=tile_size, tile_overlap=tile_overlap, tile_blending=tile_blending
+        )
+    # StarDist based classes have their own tiling
+    if n_tiles is not None:
+        if not issubclass(class_instance, stardist_segmentator.StarDistSegmentation):
+            raise ValueError(f"'n_tiles' is not supported by {segmentation_class}")
+        kwargs.update(n_tiles=tuple(n_tiles))
+
     # get the Predictor
     pred = class_instance(
         path_model_weights=path_model_weights,
         postprocessing=postprocessing,
         model_weights=network_name,
         img_threshold=img_threshold,
+        storage=storage,
+        codec=codec,
+        batch_size=batch_size,
+        prefetch=prefetch,
+        workers=workers,
+        **kwargs,
     )
 
     # set the paths
@@ -114,6 +161,76 @@ if __name__ == "__main__":
     parser.add_argument(
         "--postprocessing", action="store_true", help="Flag for postprocessing."
     )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        choices=["files", "hdf5"],
+        default="files",
+        help="Storage backend of the cutouts and segmentations, defaults to one file per frame.",
+    )
+    parser.add_argument(
+        "--codec",
+        type=str,
+        default="default",
+        help="Codec of the segmentations, e.g. png-1, tif-zstd or npy, defaults to PNG and TIFF.",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=16,
+        help="Number of images that are segmented at once, defaults to 16.",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=2,
+        help="Number of batches that are read ahead, defaults to 2.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of threads that postprocess the segmentations, defaults to 1.",
+    )
+    parser.add_argument(
+        "--tile_size",
+        type=int,
+        default=None,
+        help="Tile size of the UNet inference, must be divisible by 16, defaults to predicting the full images.",
+    )
+    parser.add_argument(
+        "--tile_overlap",
+        type=int,
+        default=64,
+        help="Minimal overlap of the tiles in pixels, defaults to 64.",
+    )
+    parser.add_argument(
+        "--tile_blending",
+        type=str,
+        choices=["cosine", "linear"],
+        default="cosine",
+        help="Blending of the overlapping tiles, defaults to cosine.",
+    )
+    parser.add_argument(
+        "--n_tiles",
+        type=int,
+        nargs=2,
+        default=None,
+        help="Number of tiles per axis of the StarDist inference, defaults to no tiling.",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["tensorflow", "onnx"],
+        default="tensorflow",
+        help="Inference backend of the UNet, defaults to tensorflow.",
+    )
+    parser.add_argument(
+        "--onnx_threads",
+        type=int,
+        default=0,
+        help="Number of intra-op threads of onnxruntime, defaults to 0 (all physical cores).",
+    )
     args = parser.parse_args()
 
     # run
@@ -1,14 +1,167 @@
+import multiprocessing as mp
+from functools import partial
 import numpy as np
 import os
 from tqdm import tqdm
 from scipy.io import loadmat
-from skimage.restoration import richardson_lucy
 from skimage import io
-from typing import Union, Literal, Iterable
+from typing import Union, Literal, Iterable, List, Optional
 from pathlib import Path
 
+from midap.data.async_writer import AsyncWriter
+from midap.data.deconvolution import RichardsonLucy
+from midap.data.frame_store import get_frame_store
+from midap.data.tiff_stack import TiffFrameSource, TiffStack
 from midap.utils import get_logger
 
+# the state of the worker processes
+_stack = None
+_store = None
+_deconvolution = None
+_raw_filename = None
+
+
+def load_psf(
+    deconv: Literal["deconv_family_machine", "deconv_well", "no_deconv"],
+) -> Optional[np.ndarray]:
+    """
+    Loads the point spread function of a deconvolution type
+    :param deconv: A literal used for the deconvolution
+    :return: The PSF as array or None if no deconvolution should be performed
+    """
+
+    psf_dir = Path(__file__).parent.parent.parent.joinpath("psf")
+    if deconv == "deconv_family_machine":
+        return loadmat(psf_dir.joinpath("PSFmme.mat"))["PSF"]
+    if deconv == "deconv_well":
+        return io.imread(psf_dir.joinpath("PSF_BornWolf.tif"))[5, :, :]
+    return None
+
+
+def process_frames(
+    frames: List[np.ndarray], deconvolution: Optional[RichardsonLucy] = None
+):
+    """
+    Deconvolves a batch of frames if a deconvolution is given
+    :param frames: The frames to process, all frames need to have the same shape
+    :param deconvolution: The deconvolution engine with the PSF, None means no deconvolution
+    :return: The processed frames, deconvolved frames are rescaled to uint8
+    """
+
+    if deconvolution is None:
+        return frames
+
+    deconvoluted = deconvolution(np.stack(frames))
+    d_min = deconvoluted.min(axis=(-2, -1), keepdims=True)
+    d_max = deconvoluted.max(axis=(-2, -1), keepdims=True)
+    return list((256 * (deconvoluted - d_min) / (d_max - d_min)).astype(np.uint8))
+
+
+def process_frame(frame: np.ndarray, deconvolution: Optional[RichardsonLucy] = None):
+    """
+    Processes a single frame, see process_frames
+    :param frame: The frame to process
+    :param deconvolution: The deconvolution engine with the PSF, None means no deconvolution
+    :return: The processed frame
+    """
+
+    return process_frames([frame], deconvolution)[0]
+
+
+def frame_name(raw_filename: str, ix: int, deconvolution: bool):
+    """
+    The name of a split frame in the frame store
+    :param raw_filename: The stem of the file the frame was split from
+    :param ix: The index of the frame
+    :param deconvolution: Whether the frame was deconvolved
+    :return: The name of the frame
+    """
+
+    if deconvolution:
+        return f"{raw_filename}_frame{ix:03d}_deconv"
+    return f"{raw_filename}_frame{ix:03d}"
+
+
+def get_frame_source(
+    path: Union[str, bytes, os.PathLike],
+    frames: Iterable[int],
+    deconv: Literal["deconv_family_machine", "deconv_well", "no_deconv"],
+    series=0,
+    channel: Optional[int] = None,
+) -> TiffFrameSource:
+    """
+    Creates a read-only frame store that contains the same frames as the frame store written by main, but the frames
+    are read and deconvolved on the fly instead of being written to disk
+    :param path: Path to the file to split the frames
+    :param frames: An iterable containing the frames to split
+    :param deconv: A literal used for the deconvolution
+    :param series: The index of the image series in the file, see midap.data.tiff_stack.TiffStack
+    :param channel: The index of the channel in the series, see midap.data.tiff_stack.TiffStack
+    :return: The frame source
+    """
+
+    psf = load_psf(deconv)
+    frames = list(frames)
+    names = [frame_name(Path(path).stem, ix, psf is not None) for ix in frames]
+    process = None
+    if psf is not None:
+        deconvolution = RichardsonLucy(psf, num_iter=10)
+        process = partial(process_frame, deconvolution=deconvolution)
+    return TiffFrameSource(
+        path,
+        frames=frames,
+        names=names,
+        process=process,
+        series=series,
+        channel=channel,
+    )
+
+
+def init_worker(
+    path: Union[str, bytes, os.PathLike],
+    save_dir: Union[str, bytes, os.PathLike],
+    storage: str,
+    psf: Optional[np.ndarray],
+    codec="default",
+    series=0,
+    channel: Optional[int] = None,
+):
+    """
+    Initializes a worker of the pool, every worker opens the stack and the frame store itself
+    :param path: Path to the file to split the frames
+    :param save_dir: The directory to save the frames
+    :param storage: The frame storage backend used for the split frames
+    :param psf: The point spread function used for the deconvolution, None means no deconvolution
+    :param codec: The codec used to write the split frames, see midap.data.frame_store.parse_codec
+    :param series: The index of the image series in the file, see midap.data.tiff_stack.TiffStack
+    :param channel: The index of the channel in the series, see midap.data.tiff_stack.TiffStack
+    """
+
+    global _stack, _store, _deconvolution, _raw_filename
+    _stack = TiffStack(path, series=series, channel=channel)
+    _deconvolution = None if psf is None else RichardsonLucy(psf, num_iter=10)
+    _raw_filename = Path(path).stem
+
+    # stores that do not support concurrent writes are written by the main process
+    _store = get_frame_store(save_dir, backend=storage, ext=".png", codec=codec)
+    if not _store.concurrent_writes:
+        _store = None
+
+
+def split_frames(ixs: List[int]):
+    """
+    Splits (and deconvolves) a batch of frames in a worker of the pool
+    :param ixs: The indices of the frames
+    :return: None if the frames were written by the worker, otherwise a list of tuples (name, frame) to write
+    """
+
+    names = [frame_name(_raw_filename, ix, _deconvolution is not None) for ix in ixs]
+    frames = process_frames([_stack[ix] for ix in ixs], _deconvolution)
+    if _store is None:
+        return list(zip(names, frames))
+    for name, frame in zip(names, frames):
+        _store.write(name, frame)
+
 
 def main(
     path: Union[str, bytes, os.PathLike],
@@ -16,6 +169,12 @@ def main(
     frames: Iterable[int],
     deconv: Literal["deconv_family_machine", "deconv_well", "no_deconv"],
     loglevel=7,
+    storage="files",
+    workers=1,
+    batch_size=4,
+    codec="default",
+    series=0,
+    channel: Optional[int] = None,
 ):
     """
     Splits the frames of a given file and saves it in the save dir
@@ -23,6 +182,12 @@ def main(
     :param frames: An iterable containing the frames to split
     :param deconv: A literal used for the deconvolution
     :param loglevel: The loglevel of the script from 0 (no output) to 7
+    :param storage: The frame storage backend used for the split frames, see midap.data.frame_store
+    :param workers: The number of processes used to split the frames, 1 means no multiprocessing
+    :param batch_size: The number of frames that are deconvolved together
+    :param codec: The codec used to write the split frames, see midap.data.frame_store.parse_codec
+    :param series: The index of the image series in the file, e.g. the position of an OME-TIFF dataset
+    :param channel: The index of the channel in the series, None if the file contains a single channel
     """
 
     # logging
@@ -37,48 +202,40 @@ def main(
     # loop over tif/tiff-stack to extract single frames and deconvolve them if wanted
     if deconv == "deconv_family_machine":
         logger.debug("Running deconv for family machine.")
-        psf = loadmat(
-            Path(__file__).parent.parent.parent.joinpath("psf", "PSFmme.mat")
-        )["PSF"]
-        deconvolution = True
     elif deconv == "deconv_well":
         logger.debug("Running deconv for well.")
-        psf = io.imread(
-            Path(__file__).parent.parent.parent.joinpath("psf", "PSF_BornWolf.tif")
-        )[5, :, :]
-        deconvolution = True
     else:
         logger.debug("No deconv selected")
-        deconvolution = False
+    psf = load_psf(deconv)
 
-    # split the frames
+    # split the frames in batches, only the requested pages are read from the stack
     logger.info("Splitting frames...")
-    stack = io.imread(path)
-
-    # single image stuff
-    if stack.ndim == 2:
-        stack = stack[None, ...]
-
-    for ix in tqdm(frames):
-        frame = stack[ix]
-        if deconvolution:
-            deconvoluted = richardson_lucy(frame, psf, num_iter=10, clip=False)
-            deconvoluted = (
-                256
-                * (deconvoluted - deconvoluted.min())
-                / (deconvoluted.max() - deconvoluted.min())
-            ).astype(np.uint8)
-            io.imsave(
-                save_dir.joinpath(f"{raw_filename}_frame{ix:03d}_deconv.png"),
-                deconvoluted,
-                check_contrast=False,
-            )
-        else:
-            io.imsave(
-                save_dir.joinpath(f"{raw_filename}_frame{ix:03d}.png"),
-                frame,
-                check_contrast=False,
-            )
+    frames = list(frames)
+    batches = [frames[i : i + batch_size] for i in range(0, len(frames), batch_size)]
+    store = get_frame_store(save_dir, backend=storage, ext=".png", codec=codec)
+    # the frames are encoded and written in the background while the next batch is processed
+    writer = AsyncWriter()
+    if workers <= 1:
+        deconvolution = None if psf is None else RichardsonLucy(psf, num_iter=10)
+        stack = TiffStack(path, series=series, channel=channel)
+        with stack, store, writer:
+            for batch in tqdm(batches):
+                imgs = process_frames([stack[ix] for ix in batch], deconvolution)
+                for ix, img in zip(batch, imgs):
+                    name = frame_name(raw_filename, ix, psf is not None)
+                    writer.write(store, name, img)
+    else:
+        logger.info(f"Using {workers} workers...")
+        pool = mp.Pool(
+            workers,
+            initializer=init_worker,
+            initargs=(path, save_dir, storage, psf, codec, series, channel),
+        )
+        with pool, store, writer:
+            for result in tqdm(pool.imap(split_frames, batches), total=len(batches)):
+                if result is not None:
+                    for name, img in result:
+                        writer.write(store, name, img)
 
 
 if __name__ == "__main__":
@@ -114,6 +271,25 @@ if __name__ == "__main__":
     parser.add_argument(
         "--loglevel", type=int, default=7, help="Loglevel of the script."
     )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        choices=["files", "hdf5"],
+        default="files",
+        help="Storage backend of the split frames, defaults to one file per frame.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to split the frames, defaults to 1.",
+    )
+    parser.add_argument(
+        "--codec",
+        type=str,
+        default="default",
+        help="Codec of the split frames, e.g. png-1, tif-zstd or npy, defaults to PNG.",
+    )
     args = parser.parse_args()
 
     # run the main
@@ -124,4 +300,7 @@ if __name__ == "__main__":
         frames=frames,
         deconv=args.deconv,
         loglevel=args.loglevel,
+        storage=args.storage,
+        workers=args.workers,
+        codec=args.codec,
     )
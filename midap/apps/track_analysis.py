@@ -6,14 +6,20 @@ from typing import Union, List
 from midap.tracking.tracking_analysis import FluoChangeAnalysis
 
 
-def main(path: Union[str, os.PathLike], channels: List[str], tracking_class: str):
+def main(
+    path: Union[str, os.PathLike],
+    channels: List[str],
+    tracking_class: str,
+    storage="files",
+):
     """
     Loads tracking output and adds intensities per cell and channel to dataframe.
     :param path: Path to output folder.
     :param channels: List with channels.
     :param tracking_class: Name of used tracking class.
+    :param storage: Frame storage backend of the image stacks.
     """
-    fca = FluoChangeAnalysis(path, channels, tracking_class)
+    fca = FluoChangeAnalysis(path, channels, tracking_class, storage=storage)
     fca.gen_pathnames()
     fca.load_images()
     fca.gen_column_names()
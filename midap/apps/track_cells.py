@@ -5,16 +5,28 @@ from typing import Union
 
 # to get all subclasses
 from midap.tracking import *
-from midap.tracking import base_tracking, cell_props
+from midap.tracking import base_tracking, cell_props, deltav2_tracking
+from midap.data.frame_store import get_frame_store
 from midap.utils import get_logger, get_inheritors
 
 
-def main(path: Union[str, bytes, os.PathLike], tracking_class: str, loglevel=7):
+def main(
+    path: Union[str, bytes, os.PathLike],
+    tracking_class: str,
+    loglevel=7,
+    storage="files",
+    backend="tensorflow",
+    onnx_threads=0,
+):
     """
     The main function to run the tracking
     :param path: Path to the channel
     :param tracking_class: The name of the tracking class
     :param loglevel: The loglevel between 0 and 7, defaults to highest level
+    :param storage: The frame storage backend of the cutouts and segmentations, see midap.data.frame_store
+    :param backend: The inference backend of the tracking network, "tensorflow" or "onnx", classes without an ONNX
+                    backend always use their default
+    :param onnx_threads: The number of intra-op threads of onnxruntime, 0 uses all physical cores
     """
 
     # logging
@@ -44,15 +56,20 @@ def main(path: Union[str, bytes, os.PathLike], tracking_class: str, loglevel=7):
         )
     )
 
-    # glob all the cut images and segmented images
-    img_names_sort = sorted(images_folder.glob("*frame*.png"))
-    seg_names_sort = sorted(segmentation_folder.glob("*frame*.tif"))
+    # the cut images and segmented images, the stores detect the codecs of the files
+    img_names_sort = get_frame_store(images_folder, backend=storage)
+    seg_names_sort = get_frame_store(segmentation_folder, backend=storage)
 
     # Parameters:
     connectivity = 1
     target_size = None
     input_size = None
 
+    # the ONNX backend is only available for DeltaV2 based classes
+    kwargs = {}
+    if issubclass(class_instance, deltav2_tracking.DeltaV2Tracking):
+        kwargs = dict(backend=backend, onnx_threads=onnx_threads)
+
     # Process
     tr = class_instance(
         imgs=img_names_sort,
@@ -61,8 +78,11 @@ def main(path: Union[str, bytes, os.PathLike], tracking_class: str, loglevel=7):
         input_size=input_size,
         target_size=target_size,
         connectivity=connectivity,
+        **kwargs,
     )
     data_file, csv_file = tr.track_all_frames(output_folder)
+    img_names_sort.close()
+    seg_names_sort.close()
 
     # add the region props
     if data_file is not None and csv_file is not None:
@@ -89,6 +109,26 @@ if __name__ == "__main__":
     parser.add_argument(
         "--loglevel", type=int, default=7, help="Loglevel of the script."
     )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        choices=["files", "hdf5"],
+        default="files",
+        help="Storage backend of the cutouts and segmentations, defaults to one file per frame.",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["tensorflow", "onnx"],
+        default="tensorflow",
+        help="Inference backend of the tracking network, defaults to tensorflow.",
+    )
+    parser.add_argument(
+        "--onnx_threads",
+        type=int,
+        default=0,
+        help="Number of intra-op threads of onnxruntime, defaults to 0 (all physical cores).",
+    )
     args = parser.parse_args()
 
     # call the main
@@ -12,6 +12,16 @@ from typing import Optional, Union
 
 from midap.utils import get_inheritors
 
+from midap.data.file_copy import COPY_STRATEGIES
+
+# the available frame storage backends
+from midap.data.frame_store import FRAME_STORE_BACKENDS, parse_codec
+
+from midap.data.manifest import load_manifest
+from midap.imcut.registration import REGISTRATION_MODES, SUBPIXEL
+from midap.networks.onnx_backend import INFERENCE_BACKENDS
+from midap.segmentation.tiling import TILE_BLENDINGS
+
 # get all subclasses from the imcut
 from midap.imcut import *
 from midap.imcut import base_cutout
@@ -23,10 +33,12 @@ family_imcut_cls = [
 mother_imcut_cls = [
     s.__name__ for s in imcut_subclasses if "Mother_Machine" in s.supported_setups
 ]
+# these classes detect the chambers themselves, the corners can be left at None
+headless_imcut_cls = [s.__name__ for s in imcut_subclasses if s.detects_chambers]
 
 # get all subclasses from the segmentations
 from midap.segmentation import *
-from midap.segmentation import base_segmentator
+from midap.segmentation import base_segmentator, stardist_segmentator, unet_segmentator
 
 segmentation_subclasses = [
     subclass for subclass in get_inheritors(base_segmentator.SegmentationPredictor)
@@ -41,6 +53,18 @@ mother_seg_cls = [
     for s in segmentation_subclasses
     if "Mother_Machine" in s.supported_setups
 ]
+# these classes support the tiled UNet inference
+unet_seg_cls = [
+    s.__name__
+    for s in segmentation_subclasses
+    if issubclass(s, unet_segmentator.UNetSegmentation)
+]
+# these classes support the tiled StarDist inference
+stardist_seg_cls = [
+    s.__name__
+    for s in segmentation_subclasses
+    if issubclass(s, stardist_segmentator.StarDistSegmentation)
+]
 
 # get all subclasses from the tracking
 from midap.tracking import *
@@ -177,6 +201,7 @@ class Config(ConfigParser):
                         "SegmentationClass": "UNetSegmentation",
                         "TrackingClass": "DeltaV2Tracking",
                         "KeepCopyOriginal": True,
+                        "CopyStrategy": "copy",
                         "KeepRawImages": True,
                         "KeepCutoutImages": True,
                         "KeepCutoutImagesRaw": True,
@@ -187,6 +212,22 @@ class Config(ConfigParser):
                         "RemoveBorder": False,
                         "FluoChange": False,
                         "Registration": True,
+                        "RegistrationMode": "full",
+                        "CacheShifts": False,
+                        "FrameStorage": "files",
+                        "Workers": 1,
+                        "FuseSplitCut": False,
+                        "RawImagesCodec": "default",
+                        "CutoutImagesCodec": "default",
+                        "SegImagesCodec": "default",
+                        "SegmentationBatchSize": 16,
+                        "SegmentationPrefetch": 2,
+                        "SegmentationTileSize": "None",
+                        "SegmentationTileOverlap": 64,
+                        "SegmentationTileBlending": "cosine",
+                        "SegmentationNTiles": "None",
+                        "InferenceBackend": "tensorflow",
+                        "InferenceThreads": 0,
                     }
                 }
             )
@@ -207,6 +248,7 @@ class Config(ConfigParser):
                         "SegmentationClass": "OmniSegmentation",
                         "TrackingClass": "STrack",
                         "KeepCopyOriginal": True,
+                        "CopyStrategy": "copy",
                         "KeepRawImages": True,
                         "KeepCutoutImages": True,
                         "KeepCutoutImagesRaw": True,
@@ -216,6 +258,22 @@ class Config(ConfigParser):
                         "ImgThreshold": 1.0,
                         "FluoChange": False,
                         "Registration": True,
+                        "RegistrationMode": "full",
+                        "CacheShifts": False,
+                        "FrameStorage": "files",
+                        "Workers": 1,
+                        "FuseSplitCut": False,
+                        "RawImagesCodec": "default",
+                        "CutoutImagesCodec": "default",
+                        "SegImagesCodec": "default",
+                        "SegmentationBatchSize": 16,
+                        "SegmentationPrefetch": 2,
+                        "SegmentationTileSize": "None",
+                        "SegmentationTileOverlap": 64,
+                        "SegmentationTileBlending": "cosine",
+                        "SegmentationNTiles": "None",
+                        "InferenceBackend": "tensorflow",
+                        "InferenceThreads": 0,
                     }
                 }
             )
@@ -258,9 +316,24 @@ class Config(ConfigParser):
             raise ValueError(
                 f"'EndFrame' has to be a positive integer and larger than 'StartFrame', is: {start_frame}"
             )
+        # the number of frames is only checked if the folder was already indexed
+        manifest = load_manifest(
+            self.get("General", "FolderPath"),
+            self.get("General", "IdentifierName"),
+            self.get("General", "FileType"),
+        )
+        if manifest is not None and (
+            num_frames := manifest.num_frames(id_name)
+        ) is not None:
+            if end_frame > num_frames:
+                raise ValueError(
+                    f"'EndFrame' exceeds the number of frames of {id_name} ({num_frames}), is: {end_frame}"
+                )
 
         # check the booleans
-        _ = self.getboolean(id_name, "Registration", fallback=True)
+        _ = self.get_registration(id_name)
+        _ = self.getboolean(id_name, "FuseSplitCut", fallback=False)
+        _ = self.getboolean(id_name, "CacheShifts", fallback=False)
         _ = self.getboolean(id_name, "PhaseSegmentation")
         _ = self.getboolean(id_name, "KeepCopyOriginal")
         _ = self.getboolean(id_name, "KeepRawImages")
@@ -272,6 +345,66 @@ class Config(ConfigParser):
         if machine_type == "Family_Machine":
             _ = self.getboolean(id_name, "RemoveBorder")
 
+        # check the number of workers and the batches of the segmentation
+        for key, default in [
+            ("Workers", 1),
+            ("SegmentationBatchSize", 16),
+            ("SegmentationPrefetch", 2),
+        ]:
+            if (value := self.getint(id_name, key, fallback=default)) < 1:
+                raise ValueError(f"'{key}' has to be a positive integer, is: {value}")
+
+        # check the tiling of the UNet and StarDist inference
+        tiling = self.get_tiling(id_name)
+        if tiling["tile_size"] is not None:
+            if tiling["tile_size"] <= 0 or tiling["tile_size"] % 16 != 0:
+                raise ValueError(
+                    f"'SegmentationTileSize' has to be a positive multiple of 16, is: {tiling['tile_size']}"
+                )
+            if not 0 <= 2 * tiling["tile_overlap"] <= tiling["tile_size"]:
+                raise ValueError(
+                    f"'SegmentationTileOverlap' has to be between 0 and half of the tile size, "
+                    f"is: {tiling['tile_overlap']}"
+                )
+            if self.get(id_name, "SegmentationClass") not in unet_seg_cls:
+                raise ValueError(f"'SegmentationTileSize' is only supported by {unet_seg_cls}")
+        if tiling["tile_blending"] not in TILE_BLENDINGS:
+            raise ValueError(f"'SegmentationTileBlending' not in {TILE_BLENDINGS}")
+        if (n_tiles := tiling["n_tiles"]) is not None:
+            if len(n_tiles) != 2 or min(n_tiles) < 1:
+                raise ValueError(
+                    f"'SegmentationNTiles' has to be two positive integers, e.g. 2,2, is: {n_tiles}"
+                )
+            if self.get(id_name, "SegmentationClass") not in stardist_seg_cls:
+                raise ValueError(f"'SegmentationNTiles' is only supported by {stardist_seg_cls}")
+
+        # check the inference backend of the networks
+        inference = self.get_inference(id_name)
+        if inference["backend"] not in INFERENCE_BACKENDS:
+            raise ValueError(f"'InferenceBackend' not in {INFERENCE_BACKENDS}")
+        if inference["onnx_threads"] < 0:
+            raise ValueError(
+                f"'InferenceThreads' has to be a non-negative integer, is: {inference['onnx_threads']}"
+            )
+
+        # check the codecs of the image stacks
+        for key in ["RawImagesCodec", "CutoutImagesCodec", "SegImagesCodec"]:
+            _ = parse_codec(self.get(id_name, key, fallback="default"))
+
+        # check the copy strategy
+        if self.get(id_name, "CopyStrategy", fallback="copy") not in COPY_STRATEGIES:
+            raise ValueError(f"'CopyStrategy' not in {COPY_STRATEGIES}")
+
+        # check the registration mode
+        mode = self.get(id_name, "RegistrationMode", fallback="full")
+        if mode not in REGISTRATION_MODES:
+            raise ValueError(f"'RegistrationMode' not in {REGISTRATION_MODES}")
+
+        # check the frame storage
+        allowed_storage = list(FRAME_STORE_BACKENDS)
+        if self.get(id_name, "FrameStorage", fallback="files") not in allowed_storage:
+            raise ValueError(f"'FrameStorage' not in {allowed_storage}")
+
         # check the threshold
         if (
             threshold := self.getfloat(id_name, "ImgThreshold")
@@ -295,17 +428,22 @@ class Config(ConfigParser):
             raise ValueError(f"'Class' of 'Tracking' not in {tracking_subclasses}")
 
         if not basic:
-            # check the corner
-            corners = self.get(id_name, "Corners")
-            corner_list = self.getlist(id_name, "Corners")
-            if len(corner_list) != 4:
-                raise ValueError(f"'Corner' is not properly defined: {corners}")
-            # check if we have valid integers
-            for corner in corner_list:
-                _ = int(corner)
+            # classes that detect the chambers fill the corners and offsets during the run
+            detected = self.get(id_name, "CutImgClass") in headless_imcut_cls
+            if not (detected and self.get(id_name, "Corners") == "None"):
+                # check the corner
+                corners = self.get(id_name, "Corners")
+                corner_list = self.getlist(id_name, "Corners")
+                if len(corner_list) != 4:
+                    raise ValueError(f"'Corner' is not properly defined: {corners}")
+                # check if we have valid integers
+                for corner in corner_list:
+                    _ = int(corner)
 
             # check the offsets
-            if machine_type == "Mother_Machine":
+            if machine_type == "Mother_Machine" and not (
+                detected and self.get(id_name, "Offsets") == "None"
+            ):
                 offsets = self.get(id_name, "Offsets")
                 offset_list = self.getlist(id_name, "Offsets")
                 if len(offset_list) == 0:
@@ -341,6 +479,71 @@ class Config(ConfigParser):
                             f"Invalid 'ModelWeights' for method 'OmniSegmentation': {model_weights}"
                         )
 
+    def get_registration(self, section):
+        """
+        Return the registration of an identifier section, which is a boolean or "subpixel"
+        :param section: The identifier section
+        :return: True, False or "subpixel"
+        """
+
+        if self.get(section, "Registration", fallback="True").lower() == SUBPIXEL:
+            return SUBPIXEL
+        return self.getboolean(section, "Registration", fallback=True)
+
+    def get_tiling(self, section):
+        """
+        Return the tiling of the UNet and StarDist inference of an identifier section
+        :param section: The identifier section
+        :return: A dictionary with the tile_size (None for no tiling), tile_overlap and tile_blending of the UNet and
+                 the n_tiles of StarDist (None for no tiling, otherwise the number of tiles per axis as tuple)
+        """
+
+        tile_size = self.get(section, "SegmentationTileSize", fallback="None")
+        n_tiles = self.get(section, "SegmentationNTiles", fallback="None")
+        return {
+            "tile_size": None if tile_size == "None" else int(tile_size),
+            "tile_overlap": self.getint(section, "SegmentationTileOverlap", fallback=64),
+            "tile_blending": self.get(section, "SegmentationTileBlending", fallback="cosine"),
+            "n_tiles": None if n_tiles == "None" else tuple(int(n) for n in n_tiles.split(",")),
+        }
+
+    def get_inference(self, section):
+        """
+        Return the inference backend of the networks of an identifier section
+        :param section: The identifier section
+        :return: A dictionary with the backend and the onnx_threads (0 for all physical cores)
+        """
+
+        return {
+            "backend": self.get(section, "InferenceBackend", fallback="tensorflow"),
+            "onnx_threads": self.getint(section, "InferenceThreads", fallback=0),
+        }
+
+    def get_identifier_options(self, section):
+        """
+        Return the options of the pipeline stages of an identifier section
+        :param section: The identifier section
+        :return: A dictionary with the storage, workers, fuse_split_cut, copy_strategy, raw_codec, cut_codec,
+                 seg_codec, registration_mode, cache_shifts, seg_batch_size, seg_prefetch, the seg_tiling
+                 (see get_tiling) and the inference (see get_inference)
+        """
+
+        return {
+            "storage": self.get(section, "FrameStorage", fallback="files"),
+            "workers": self.getint(section, "Workers", fallback=1),
+            "fuse_split_cut": self.getboolean(section, "FuseSplitCut", fallback=False),
+            "copy_strategy": self.get(section, "CopyStrategy", fallback="copy"),
+            "raw_codec": self.get(section, "RawImagesCodec", fallback="default"),
+            "cut_codec": self.get(section, "CutoutImagesCodec", fallback="default"),
+            "seg_codec": self.get(section, "SegImagesCodec", fallback="default"),
+            "registration_mode": self.get(section, "RegistrationMode", fallback="full"),
+            "cache_shifts": self.getboolean(section, "CacheShifts", fallback=False),
+            "seg_batch_size": self.getint(section, "SegmentationBatchSize", fallback=16),
+            "seg_prefetch": self.getint(section, "SegmentationPrefetch", fallback=2),
+            "seg_tiling": self.get_tiling(section),
+            "inference": self.get_inference(section),
+        }
+
     def getlist(self, section, option):
         """
         Return the requested param as a list, i.e. transform from comma separated string to list
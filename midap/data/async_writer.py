@@ -0,0 +1,134 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from .frame_store import FrameStore
+
+
+class AsyncWriter:
+    """
+    Writes frames in the background with a bounded thread pool, such that the encoding of the images (PNG, TIFF, ...)
+    overlaps with the computation of the next frames. At most max_pending writes can be in flight, submitting more
+    blocks until a write finished (backpressure). Errors of the writes are raised by the next submit or by flush. The
+    writer can be shared by several threads.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, max_pending: Optional[int] = None
+    ):
+        """
+        Initializes the writer, the threads are only started with the first write
+        :param max_workers: The number of writer threads, defaults to min(4, number of CPUs)
+        :param max_pending: The maximum number of writes in flight, defaults to twice the number of threads
+        """
+
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or 2 * self.max_workers
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._futures: List[Future] = []
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Submits a write to the pool, blocks if max_pending writes are in flight
+        :param fn: The function that performs the write
+        :param args: The positional arguments of the function
+        :param kwargs: The keyword arguments of the function
+        :return: The future of the write
+        """
+
+        # fail early if a previous write failed
+        self._raise_errors(done_only=True)
+
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="midap_writer"
+                    )
+                future = self._executor.submit(fn, *args, **kwargs)
+                self._futures.append(future)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        return future
+
+    def write(self, store: FrameStore, name: str, img: np.ndarray) -> Future:
+        """
+        Writes a frame to a frame store in the background, the image must not be modified afterwards
+        :param store: The frame store to write to
+        :param name: The name of the frame
+        :param img: The frame as array
+        :return: The future of the write
+        """
+
+        return self.submit(store.write, name, img)
+
+    def _raise_errors(self, done_only=False):
+        """
+        Raises the first error of the submitted writes
+        :param done_only: If True, only the finished writes are checked, otherwise all writes are awaited
+        """
+
+        if not done_only:
+            with self._lock:
+                futures = list(self._futures)
+            wait(futures)
+
+        # keep the writes that are still running
+        with self._lock:
+            futures, self._futures, done = self._futures, [], []
+            for future in futures:
+                (done if future.done() else self._futures).append(future)
+        errors = [f.exception() for f in done if f.exception() is not None]
+
+        if len(errors) > 0:
+            # the remaining writes are finished before the error is forwarded
+            with self._lock:
+                futures, self._futures = self._futures, []
+            wait(futures)
+            raise errors[0]
+
+    def flush(self):
+        """
+        Waits until all submitted writes are done and raises the first error that occurred
+        """
+
+        self._raise_errors(done_only=False)
+
+    def close(self):
+        """
+        Flushes the writer and stops the threads
+        """
+
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                executor, self._executor = self._executor, None
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        # writes that were submitted by other threads during the flush
+        self._raise_errors(done_only=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # an exception in the block takes precedence over errors of the writes
+        if exc_type is None:
+            self.close()
+        else:
+            try:
+                self.close()
+            except Exception:
+                pass
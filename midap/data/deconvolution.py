@@ -0,0 +1,113 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import fft
+
+
+class RichardsonLucy:
+    """
+    Richardson-Lucy deconvolution with a fixed point spread function (PSF). The convolutions are performed as FFTs
+    over batches of frames and the optical transfer functions (OTF) of the PSF are only computed once per frame shape.
+    The results agree with skimage.restoration.richardson_lucy up to floating point precision.
+    """
+
+    def __init__(
+        self,
+        psf: np.ndarray,
+        num_iter=10,
+        clip=False,
+        filter_epsilon: Optional[float] = None,
+        workers: Optional[int] = None,
+    ):
+        """
+        Initializes the deconvolution
+        :param psf: The 2D point spread function
+        :param num_iter: The number of iterations
+        :param clip: If True, pixel values of the result above 1 or under -1 are thresholded
+        :param filter_epsilon: Value below which intermediate results become 0 to avoid division by small numbers
+        :param workers: Number of threads used for the FFTs, see scipy.fft, defaults to one thread
+        """
+
+        self.psf = np.asarray(psf)
+        self.num_iter = num_iter
+        self.clip = clip
+        self.filter_epsilon = filter_epsilon
+        self.workers = workers
+
+        # (frame shape, dtype) -> (FFT shape, OTF, OTF of mirrored PSF, crop slices)
+        self._otf_cache = {}
+
+    def transfer_functions(self, shape: Tuple[int, int], dtype: np.dtype):
+        """
+        Returns the OTFs of the PSF and the mirrored PSF for a given frame shape, the OTFs are cached
+        :param shape: The shape of the frames
+        :param dtype: The floating point type of the frames
+        :return: The shape of the FFTs, the OTF, the OTF of the mirrored PSF and the slices to crop the convolutions
+        """
+
+        key = (tuple(shape), np.dtype(dtype))
+        if key not in self._otf_cache:
+            # zero padding to the full linear convolution avoids wrap around
+            fshape = tuple(
+                fft.next_fast_len(n + m - 1, real=True)
+                for n, m in zip(shape, self.psf.shape)
+            )
+            psf = self.psf.astype(dtype)
+            otf = fft.rfft2(psf, s=fshape, workers=self.workers)
+            otf_mirror = fft.rfft2(np.flip(psf), s=fshape, workers=self.workers)
+
+            # crop to the same shape as the input, like scipy.signal.convolve(..., mode="same")
+            crop = tuple(
+                slice((m - 1) // 2, (m - 1) // 2 + n)
+                for n, m in zip(shape, self.psf.shape)
+            )
+            self._otf_cache[key] = (fshape, otf, otf_mirror, (Ellipsis,) + crop)
+
+        return self._otf_cache[key]
+
+    def _convolve(self, imgs: np.ndarray, otf: np.ndarray, fshape, crop):
+        """
+        Convolves a batch of images with a PSF given by its OTF
+        :param imgs: The images, the last two axes are convolved
+        :param otf: The OTF of the PSF
+        :param fshape: The shape of the FFTs
+        :param crop: The slices to crop the result to the shape of the images
+        :return: The convolved images
+        """
+
+        spectrum = fft.rfft2(imgs, s=fshape, workers=self.workers)
+        spectrum *= otf
+        return fft.irfft2(spectrum, s=fshape, workers=self.workers)[crop]
+
+    def __call__(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Deconvolves a single frame or a batch of frames
+        :param frames: A frame (H, W) or a batch of frames (N, H, W)
+        :return: The deconvolved frames with the same shape
+        """
+
+        # same type promotion as skimage, float32 stays, everything else is float64
+        frames = np.asarray(frames)
+        dtype = np.float32 if frames.dtype in (np.float16, np.float32) else np.float64
+        frames = frames.astype(dtype, copy=False)
+        fshape, otf, otf_mirror, crop = self.transfer_functions(
+            frames.shape[-2:], dtype
+        )
+
+        # small regularization parameter used to avoid 0 divisions
+        eps = 1e-12
+
+        im_deconv = np.full(frames.shape, 0.5, dtype=dtype)
+        for _ in range(self.num_iter):
+            conv = self._convolve(im_deconv, otf, fshape, crop)
+            conv += eps
+            if self.filter_epsilon:
+                relative_blur = np.where(conv < self.filter_epsilon, 0, frames / conv)
+            else:
+                relative_blur = np.divide(frames, conv, out=conv)
+            im_deconv *= self._convolve(relative_blur, otf_mirror, fshape, crop)
+
+        if self.clip:
+            np.clip(im_deconv, -1, 1, out=im_deconv)
+
+        return im_deconv
@@ -0,0 +1,145 @@
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+# the strategies to get the original files into the identifier directory, "reference" reads them in place
+COPY_STRATEGIES = ["copy", "hardlink", "reflink", "reference"]
+
+# ioctl request of Linux to clone a file (FICLONE)
+_FICLONE = 0x40049409
+
+# errors that indicate that a strategy is not supported for the given files
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EMLINK,
+}
+
+
+def reflink(src: Union[str, bytes, os.PathLike], dst: Union[str, bytes, os.PathLike]):
+    """
+    Creates a copy-on-write clone of a file, i.e. a copy that shares the data blocks with the source until one of
+    them is modified. This is supported by file systems like Btrfs, XFS, ZFS (Linux) and APFS (macOS).
+    :param src: The source file
+    :param dst: The destination, must not exist
+    :raises OSError: If the file system does not support clones
+    """
+
+    if sys.platform == "darwin":
+        import ctypes
+
+        libc = ctypes.CDLL("libc.dylib", use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), os.fspath(dst))
+        return
+
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+
+
+def copy_file(
+    src: Union[str, bytes, os.PathLike],
+    dst: Union[str, bytes, os.PathLike],
+    strategy="copy",
+    logger=None,
+) -> Optional[Path]:
+    """
+    Brings an original file into the identifier directory with the given strategy. Hard- and reflinks fall back to a
+    normal copy if they are not supported, e.g. across file systems.
+    :param src: The original file
+    :param dst: The destination path
+    :param strategy: The copy strategy, one of COPY_STRATEGIES
+    :param logger: An optional logger to report fallbacks
+    :return: The path of the file that should be read by the pipeline, the source itself for "reference"
+    """
+
+    if strategy not in COPY_STRATEGIES:
+        raise ValueError(
+            f"Unknown copy strategy '{strategy}', choose from {COPY_STRATEGIES}"
+        )
+
+    src, dst = Path(src), Path(dst)
+    if strategy == "reference":
+        return src
+
+    # links need a free destination
+    if strategy != "copy":
+        dst.unlink(missing_ok=True)
+        try:
+            if strategy == "hardlink":
+                os.link(src, dst)
+            else:
+                reflink(src, dst)
+            return dst
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+            if logger is not None:
+                logger.warning(
+                    f"Creating a {strategy} of '{src.name}' failed ({e.strerror}), copying the file instead..."
+                )
+
+    shutil.copyfile(src, dst)
+    return dst
+
+
+def channel_files(
+    channel_path: Union[str, bytes, os.PathLike],
+    file_ext: str,
+    source: Union[str, bytes, os.PathLike, None] = None,
+) -> List[Path]:
+    """
+    Lists the original files of a channel
+    :param channel_path: The directory of the channel in the identifier directory
+    :param file_ext: The file extension of the original files (without the dot)
+    :param source: The referenced original file if the copy strategy is "reference"
+    :return: A list of paths of the original files
+    """
+
+    if source is not None:
+        return [Path(source)]
+    return list(Path(channel_path).glob(f"*.{file_ext}"))
+
+
+def channel_source(
+    config, identifier: str, channel: str, channel_path: Union[str, bytes, os.PathLike]
+) -> Tuple[List[Path], dict]:
+    """
+    Lists the original files of a channel as set up by the CopyFiles stage, together with the position of the channel
+    in the files, e.g. the series and channel index of an OME-TIFF dataset
+    :param config: The config of the run, see midap.config.Config
+    :param identifier: The identifier (position) of the channel
+    :param channel: The name of the channel
+    :param channel_path: The directory of the channel in the identifier directory
+    :return: A list of paths of the original files and a dictionary with the keywords "series" and "channel" that
+             select the channel in the files, see midap.data.tiff_stack.TiffStack
+    """
+
+    paths = channel_files(
+        channel_path,
+        config.get("General", "FileType"),
+        source=config.get(identifier, f"Source_{channel}", fallback=None),
+    )
+    selection = {
+        "series": config.getint(identifier, f"SourceSeries_{channel}", fallback=0),
+        "channel": config.getint(identifier, f"SourceChannel_{channel}", fallback=None),
+    }
+    return paths, selection
@@ -0,0 +1,419 @@
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+import h5py
+import imageio.v3 as iio
+import numpy as np
+import skimage.io as io
+import tifffile as tiff
+
+# the codecs of the directory backend as (file extension, write arguments), zstd uses its fast level 1, PNGs also accept
+# a compression level between 0 and 9, e.g. "png-1", and "default" keeps the format given by the extension of the stack.
+# There is no "tif-lz4", the TIFF format has no LZ4 compression scheme (tifffile and other readers do not support it).
+FRAME_CODECS = {
+    "png": (".png", {}),
+    "tif": (".tif", {}),
+    "tif-zstd": (".tif", {"compression": "zstd", "compressionargs": {"level": 1}}),
+    "npy": (".npy", {}),
+}
+
+
+def parse_codec(codec: str, ext=".png") -> Tuple[str, dict]:
+    """
+    Translates a codec of the directory backend into a file extension and the arguments for the writer
+    :param codec: The codec, "default", one of FRAME_CODECS or "png-<level>"
+    :param ext: The file extension that is used for the "default" codec
+    :return: The file extension and a dictionary with the arguments of the writer
+    """
+
+    if codec == "default":
+        return ext, {}
+
+    if codec.startswith("png-"):
+        level = codec[len("png-") :]
+        if not level.isdigit() or not 0 <= int(level) <= 9:
+            raise ValueError(f"PNG compression level has to be in [0, 9], is: {level}")
+        return ".png", {"compress_level": int(level)}
+
+    if codec == "tif-lz4":
+        raise ValueError(
+            "TIFF files have no LZ4 compression, use 'tif-zstd' for fast compressed TIFF files"
+        )
+    if codec not in FRAME_CODECS:
+        raise ValueError(
+            f"Unknown codec '{codec}', choose from {['default', 'png-<level>'] + list(FRAME_CODECS)}"
+        )
+
+    # the TIFF compressions need the optional imagecodecs package
+    ext, kwargs = FRAME_CODECS[codec]
+    if "compression" in kwargs:
+        try:
+            import imagecodecs  # noqa: F401
+        except ImportError:
+            raise ValueError(
+                f"The codec '{codec}' requires the imagecodecs package, install it with 'pip install imagecodecs'"
+            )
+
+    return ext, kwargs
+
+
+def read_image(path: Union[str, bytes, os.PathLike]) -> np.ndarray:
+    """
+    Reads a single image file written with any of the codecs
+    :param path: The path to the file
+    :return: The image as array
+    """
+
+    if os.fspath(path).endswith(".npy"):
+        return np.load(path)
+    return io.imread(path)
+
+
+def write_image(path: Union[str, bytes, os.PathLike], img: np.ndarray, codec="default"):
+    """
+    Writes a single image with a codec, the extension of the path has to match the codec
+    :param path: The path to the file
+    :param img: The image as array
+    :param codec: The codec, see parse_codec
+    """
+
+    _, kwargs = parse_codec(codec, ext=os.path.splitext(path)[1])
+    if os.fspath(path).endswith(".npy"):
+        np.save(path, img, allow_pickle=False)
+    elif "compression" in kwargs:
+        tiff.imwrite(path, img, **kwargs)
+    elif "compress_level" in kwargs:
+        iio.imwrite(path, img, **kwargs)
+    else:
+        io.imsave(path, img, check_contrast=False)
+
+
+class FrameStore(ABC):
+    """
+    A stack of 2D frames (raw images, cutouts, segmentations, ...) that are addressed by their names. The names are
+    the stems of the files the directory based pipeline would write, i.e. without any file extension.
+    """
+
+    # whether multiple processes can write to the same store at the same time
+    concurrent_writes = False
+
+    def __init__(self, path: Union[str, bytes, os.PathLike]):
+        """
+        Initializes the store
+        :param path: The path of the stack, e.g. <identifier>/<channel>/raw_im, the backends decide how this path
+                     is represented on disk
+        """
+
+        self.path = Path(path)
+
+    @property
+    @abstractmethod
+    def names(self) -> List[str]:
+        """
+        The sorted names of all frames in the store
+        """
+        pass
+
+    @abstractmethod
+    def read(self, name: str) -> np.ndarray:
+        """
+        Reads a single frame from the store
+        :param name: The name of the frame
+        :return: The frame as array
+        """
+        pass
+
+    @abstractmethod
+    def write(self, name: str, img: np.ndarray):
+        """
+        Writes a single frame to the store, existing frames with the same name are overwritten
+        :param name: The name of the frame
+        :param img: The frame as array
+        """
+        pass
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """
+        Checks if the store exists on disk
+        :return: True if the store exists
+        """
+        pass
+
+    def close(self):
+        """
+        Releases all resources of the store, the store can be reopened by reading or writing
+        """
+        pass
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, ix: int) -> np.ndarray:
+        return self.read(self.names[ix])
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for name in self.names:
+            yield self.read(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DirectoryFrameStore(FrameStore):
+    """
+    The classic layout of the pipeline, a directory containing one image file per frame
+    """
+
+    concurrent_writes = True
+
+    def __init__(
+        self, path: Union[str, bytes, os.PathLike], ext=".png", codec="default"
+    ):
+        """
+        Initializes the store, frames are read independent of the codec they were written with
+        :param path: The directory containing the frames
+        :param ext: The file extension (and therefore format) used to write new frames with the default codec
+        :param codec: The codec used to write new frames, see parse_codec
+        """
+
+        super().__init__(path)
+        self.codec = codec
+        self.ext, _ = parse_codec(codec, ext=ext)
+
+        # the directory is only listed once, frames written through the store are added
+        self._file_map = None
+        self._names = None
+        self._lock = threading.Lock()
+
+    def _files(self) -> dict:
+        """
+        Maps the names of all frames in the directory to their file names, hidden files and directories are ignored
+        :return: A dictionary name -> file name
+        """
+
+        if self._file_map is None:
+            try:
+                files = os.listdir(os.fspath(self.path))
+            except FileNotFoundError:
+                files = []
+
+            # if a frame exists with multiple codecs, the file with the extension of the store wins
+            file_map = {}
+            for f in sorted(files, key=lambda f: f.endswith(self.ext)):
+                name, ext = os.path.splitext(f)
+                if ext and not f.startswith("."):
+                    file_map[name] = f
+            self._file_map = file_map
+        return self._file_map
+
+    @property
+    def names(self) -> List[str]:
+        if self._names is None:
+            self._names = sorted(self._files())
+        return self._names
+
+    def read(self, name: str) -> np.ndarray:
+        fname = self._files().get(name, f"{name}{self.ext}")
+        return read_image(os.path.join(os.fspath(self.path), fname))
+
+    def write(self, name: str, img: np.ndarray):
+        os.makedirs(self.path, exist_ok=True)
+        fname = f"{name}{self.ext}"
+        write_image(os.path.join(self.path, fname), img, codec=self.codec)
+
+        # a frame written with another codec is replaced
+        with self._lock:
+            if self._file_map is not None:
+                old_fname = self._file_map.get(name)
+                if old_fname is None:
+                    self._names = None
+                elif old_fname != fname:
+                    os.remove(os.path.join(self.path, old_fname))
+                self._file_map[name] = fname
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.path)
+
+
+class HDF5FrameStore(FrameStore):
+    """
+    A single chunked and compressed HDF5 file per stack with one chunk per frame. The file <path>.h5 contains the
+    dataset "frames" (N, H, W) and the dataset "names" (N,) with the names of the frames.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, bytes, os.PathLike],
+        ext=".png",
+        codec="default",
+        compression: Optional[str] = "lzf",
+    ):
+        """
+        Initializes the store
+        :param path: The path of the stack, the data is stored in <path>.h5
+        :param ext: Ignored, only present to have the same signature as the DirectoryFrameStore
+        :param codec: Ignored, the frames are always stored as chunks of the HDF5 file with the given compression
+        :param compression: The compression filter of the frames, see h5py.Group.create_dataset
+        """
+
+        super().__init__(path)
+        self.file_path = self.path.with_name(f"{self.path.name}.h5")
+        self.compression = compression
+
+        # the file handle, the name -> index map of the open file and the sorted names
+        self._file = None
+        self._index = {}
+        self._names = None
+
+        # h5py serializes all calls, but appending a frame has to be atomic
+        self._lock = threading.Lock()
+
+    def _open(self, write=False):
+        """
+        Opens the underlying file if necessary
+        :param write: If True, the file is opened (and created) for writing
+        :return: The open h5py file
+        """
+
+        if self._file is not None and (not write or self._file.mode == "r+"):
+            return self._file
+
+        # (re)open in the right mode
+        self.close()
+        if write:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = h5py.File(self.file_path, "a")
+        else:
+            self._file = h5py.File(self.file_path, "r")
+
+        # build the index
+        if "names" in self._file:
+            self._index = {
+                n.decode() if isinstance(n, bytes) else n: i
+                for i, n in enumerate(self._file["names"][:])
+            }
+        else:
+            self._index = {}
+        self._names = None
+
+        return self._file
+
+    @property
+    def names(self) -> List[str]:
+        if not self.exists():
+            return []
+        self._open()
+        if self._names is None:
+            self._names = sorted(self._index)
+        return self._names
+
+    def read(self, name: str) -> np.ndarray:
+        f = self._open()
+        if name not in self._index:
+            raise KeyError(f"Frame '{name}' not in {self.file_path}")
+        return f["frames"][self._index[name]]
+
+    def write(self, name: str, img: np.ndarray):
+        img = np.asarray(img)
+        with self._lock:
+            f = self._open(write=True)
+
+            # create the datasets with the first frame
+            if "frames" not in f:
+                f.create_dataset(
+                    "frames",
+                    shape=(0,) + img.shape,
+                    maxshape=(None,) + img.shape,
+                    chunks=(1,) + img.shape,
+                    dtype=img.dtype,
+                    compression=self.compression,
+                )
+                f.create_dataset(
+                    "names", shape=(0,), maxshape=(None,), dtype=h5py.string_dtype()
+                )
+
+            frames = f["frames"]
+            if frames.shape[1:] != img.shape:
+                raise ValueError(
+                    f"Frame '{name}' has shape {img.shape}, but the frames of {self.file_path} "
+                    f"have shape {frames.shape[1:]}"
+                )
+
+            # append new frames
+            if (ix := self._index.get(name)) is None:
+                ix = frames.shape[0]
+                frames.resize(ix + 1, axis=0)
+                f["names"].resize(ix + 1, axis=0)
+                f["names"][ix] = name
+                self._index[name] = ix
+                self._names = None
+
+            frames[ix] = img
+
+    def exists(self) -> bool:
+        return self.file_path.is_file()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._index = {}
+            self._names = None
+
+
+# all available backends
+FRAME_STORE_BACKENDS = {"files": DirectoryFrameStore, "hdf5": HDF5FrameStore}
+
+
+def get_frame_store(
+    path: Union[str, bytes, os.PathLike], backend="files", ext=".png", codec="default"
+) -> FrameStore:
+    """
+    Creates the frame store of a stack
+    :param path: The path of the stack, e.g. <identifier>/<channel>/cut_im
+    :param backend: The storage backend, one of FRAME_STORE_BACKENDS
+    :param ext: The file extension used by the directory backend to write new frames with the default codec
+    :param codec: The codec used by the directory backend to write new frames, see parse_codec
+    :return: The FrameStore instance
+    """
+
+    if backend not in FRAME_STORE_BACKENDS:
+        raise ValueError(
+            f"Unknown frame storage '{backend}', choose from {list(FRAME_STORE_BACKENDS)}"
+        )
+
+    return FRAME_STORE_BACKENDS[backend](path, ext=ext, codec=codec)
+
+
+def remove_frame_store(path: Union[str, bytes, os.PathLike]):
+    """
+    Removes a stack from disk independent of the backend it was written with
+    :param path: The path of the stack, e.g. <identifier>/<channel>/cut_im
+    """
+
+    path = Path(path)
+    shutil.rmtree(path, ignore_errors=True)
+    path.with_name(f"{path.name}.h5").unlink(missing_ok=True)
+
+
+def read_frame(
+    frames: Union[FrameStore, List[Union[str, bytes, os.PathLike]]], ix: int
+):
+    """
+    Reads a frame from a frame store or a list of image files
+    :param frames: The frame store or the list of files
+    :param ix: The index of the frame
+    :return: The frame as array
+    """
+
+    if isinstance(frames, FrameStore):
+        return frames[ix]
+    return read_image(frames[ix])
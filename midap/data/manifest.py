@@ -0,0 +1,322 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from xml.etree import ElementTree
+
+import numpy as np
+import tifffile as tiff
+
+# the name of the manifest in the experiment folder
+MANIFEST_NAME = "manifest.json"
+
+# increased whenever the layout of the manifest changes, older manifests are rebuilt
+MANIFEST_VERSION = 1
+
+
+def read_header(path: Union[str, bytes, os.PathLike]) -> List[dict]:
+    """
+    Reads the layout of all image series of a TIFF file, only the headers (and OME-XML metadata) are parsed
+    :param path: The path to the TIFF file
+    :return: A list with a dictionary per series containing the axes, shape, dtype, the number of frames, the shape of
+             a frame and the channel names of the OME-XML metadata (None if not available)
+    """
+
+    series_list = []
+    with tiff.TiffFile(path) as tif:
+        # the channel names are only available in the OME-XML metadata
+        names = []
+        if tif.is_ome and tif.ome_metadata is not None:
+            root = ElementTree.fromstring(tif.ome_metadata)
+            ns = root.tag[: root.tag.index("}") + 1] if root.tag.startswith("{") else ""
+            for image in root.findall(f"{ns}Image"):
+                pixels = image.find(f"{ns}Pixels")
+                names.append(
+                    [c.get("Name", "") for c in pixels.findall(f"{ns}Channel")]
+                )
+
+        for i, series in enumerate(tif.series):
+            # the same convention as in midap.data.tiff_stack.TiffStack, leading dimensions except C are frames
+            frame_shape = series.keyframe.shape
+            n_leading = len(series.shape) - len(frame_shape)
+            leading = dict(zip(series.axes[:n_leading], series.shape[:n_leading]))
+            num_frames = int(np.prod([n for axis, n in leading.items() if axis != "C"]))
+            series_list.append(
+                {
+                    "axes": series.axes,
+                    "shape": list(series.shape),
+                    "dtype": str(series.dtype),
+                    "num_frames": num_frames,
+                    "frame_shape": list(frame_shape),
+                    "channels": names[i] if i < len(names) else None,
+                }
+            )
+
+    return series_list
+
+
+def identifier_pattern(identifier_name: str) -> re.Pattern:
+    """
+    Returns the pattern of the identifiers in the names of the original files. The number has to be followed by an
+    underscore, as in the glob "*{identifier}_*", such that e.g. "pos1" does not match the files of "pos10".
+    :param identifier_name: The name of the identifiers, e.g. "pos" for "pos1", "pos2", ...
+    :return: The compiled pattern, its match is the identifier
+    """
+
+    return re.compile(f"{re.escape(identifier_name)}\\d+(?=_)")
+
+
+def list_folder(
+    folder_path: Union[str, bytes, os.PathLike], identifier_name: str, file_type: str
+) -> Dict[str, list]:
+    """
+    Lists the entries of the experiment folder that belong to an identifier. OME-TIFF datasets are directories,
+    all other file types are single files.
+    :param folder_path: The experiment folder, i.e. the FolderPath of the config
+    :param identifier_name: The name of the identifiers, e.g. "pos" for "pos1", "pos2", ...
+    :param file_type: The file type of the original files (without the dot)
+    :return: A dictionary name -> [size, mtime_ns] of all matching entries
+    """
+
+    listing = {}
+    pattern = identifier_pattern(identifier_name)
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or pattern.search(entry.name) is None:
+                continue
+            if file_type == "ome.tif":
+                if not entry.is_dir():
+                    continue
+            elif not entry.is_file() or not entry.name.endswith(f".{file_type}"):
+                continue
+            stat = entry.stat()
+            listing[entry.name] = [stat.st_size, stat.st_mtime_ns]
+
+    return listing
+
+
+class Manifest:
+    """
+    An index of the original files of an experiment folder. It contains the identifiers, their files and the layout of
+    the image series (number of frames, shapes and dtypes) and is built once from the file headers only, such that
+    the pipeline and the GUI never have to glob the folder or decode pixels to get this information.
+    """
+
+    def __init__(
+        self,
+        folder_path: Union[str, bytes, os.PathLike],
+        identifier_name: str,
+        file_type: str,
+        listing: Dict[str, list],
+        identifiers: Dict[str, List[dict]],
+    ):
+        """
+        Inits the manifest, use Manifest.scan or get_manifest to create it from a folder
+        :param folder_path: The experiment folder
+        :param identifier_name: The name of the identifiers, e.g. "pos"
+        :param file_type: The file type of the original files (without the dot)
+        :param listing: The entries of the folder that were scanned, see list_folder
+        :param identifiers: A dictionary identifier -> list of files, the paths are relative to the folder
+        """
+
+        self.folder_path = Path(folder_path)
+        self.identifier_name = identifier_name
+        self.file_type = file_type
+        self.listing = listing
+        self._identifiers = identifiers
+
+    @classmethod
+    def scan(
+        cls,
+        folder_path: Union[str, bytes, os.PathLike],
+        identifier_name: str,
+        file_type: str,
+    ):
+        """
+        Scans the experiment folder and reads the headers of all original files
+        :param folder_path: The experiment folder, i.e. the FolderPath of the config
+        :param identifier_name: The name of the identifiers, e.g. "pos" for "pos1", "pos2", ...
+        :param file_type: The file type of the original files (without the dot)
+        :return: The manifest of the folder
+        """
+
+        folder_path = Path(folder_path)
+        listing = list_folder(folder_path, identifier_name, file_type)
+        pattern = identifier_pattern(identifier_name)
+
+        identifiers = {}
+        for name in sorted(listing):
+            if file_type == "ome.tif":
+                paths = sorted(folder_path.joinpath(name).glob("**/*.ome.tif"))
+            else:
+                paths = [folder_path.joinpath(name)]
+
+            files = identifiers.setdefault(pattern.search(name)[0], [])
+            for path in paths:
+                # only TIFF files have headers that we can read
+                is_tiff = path.suffix.lower() in [".tif", ".tiff"]
+                files.append(
+                    {
+                        "path": path.relative_to(folder_path).as_posix(),
+                        "series": read_header(path) if is_tiff else [],
+                    }
+                )
+
+        return cls(folder_path, identifier_name, file_type, listing, identifiers)
+
+    @classmethod
+    def from_file(cls, folder_path: Union[str, bytes, os.PathLike]):
+        """
+        Reads the manifest of an experiment folder
+        :param folder_path: The experiment folder containing the manifest
+        :return: The manifest
+        """
+
+        with open(Path(folder_path).joinpath(MANIFEST_NAME), "r") as f:
+            content = json.load(f)
+        if content.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version: {content.get('version')}")
+
+        return cls(
+            folder_path,
+            content["identifier_name"],
+            content["file_type"],
+            content["listing"],
+            content["identifiers"],
+        )
+
+    def to_file(self):
+        """
+        Writes the manifest to the experiment folder, an existing manifest is replaced atomically
+        """
+
+        content = {
+            "version": MANIFEST_VERSION,
+            "identifier_name": self.identifier_name,
+            "file_type": self.file_type,
+            "listing": self.listing,
+            "identifiers": self._identifiers,
+        }
+        fname = self.folder_path.joinpath(MANIFEST_NAME)
+        tmp_name = fname.with_name(f".{MANIFEST_NAME}.tmp")
+        with open(tmp_name, "w") as f:
+            json.dump(content, f, indent=1)
+        os.replace(tmp_name, fname)
+
+    def is_current(self, identifier_name: str, file_type: str) -> bool:
+        """
+        Checks if the manifest matches the current content of the folder, only the top level entries are compared
+        :param identifier_name: The name of the identifiers of the run
+        :param file_type: The file type of the run
+        :return: True if the manifest can be used, False if it has to be rebuilt
+        """
+
+        return (
+            self.identifier_name == identifier_name
+            and self.file_type == file_type
+            and self.listing
+            == list_folder(self.folder_path, identifier_name, file_type)
+        )
+
+    @property
+    def identifiers(self) -> List[str]:
+        """
+        The identifiers of the folder, sorted
+        """
+        return sorted(self._identifiers)
+
+    def entries(self, identifier: str) -> List[dict]:
+        """
+        The manifest entries of the files of an identifier
+        :param identifier: The identifier
+        :return: A list of dictionaries with the (relative) path and the series of the files
+        """
+        return self._identifiers.get(identifier, [])
+
+    def files(self, identifier: str, channel: Optional[str] = None) -> List[Path]:
+        """
+        The original files of an identifier
+        :param identifier: The identifier
+        :param channel: Only return files whose name contains the channel, for OME-TIFF datasets use
+                        midap.data.ome_tiff.resolve_ome_channels to resolve the channels
+        :return: A list of absolute paths
+        """
+
+        paths = [self.folder_path.joinpath(e["path"]) for e in self.entries(identifier)]
+        if channel is not None:
+            paths = [p for p in paths if channel in p.name]
+        return paths
+
+    def num_frames(self, identifier: str) -> Optional[int]:
+        """
+        The number of frames that are available for all channels of an identifier
+        :param identifier: The identifier
+        :return: The smallest number of frames of all series of the identifier, None if unknown
+        """
+
+        counts = [
+            series["num_frames"]
+            for entry in self.entries(identifier)
+            for series in entry["series"]
+        ]
+        return min(counts) if len(counts) > 0 else None
+
+
+def load_manifest(
+    folder_path: Union[str, bytes, os.PathLike], identifier_name: str, file_type: str
+) -> Optional[Manifest]:
+    """
+    Loads the manifest of an experiment folder without scanning it
+    :param folder_path: The experiment folder, i.e. the FolderPath of the config
+    :param identifier_name: The name of the identifiers, e.g. "pos"
+    :param file_type: The file type of the original files (without the dot)
+    :return: The manifest or None if it does not exist or does not match the folder anymore
+    """
+
+    if not Path(folder_path).joinpath(MANIFEST_NAME).exists():
+        return None
+    try:
+        manifest = Manifest.from_file(folder_path)
+    except (ValueError, KeyError):
+        return None
+    if not manifest.is_current(identifier_name, file_type):
+        return None
+    return manifest
+
+
+def get_manifest(
+    folder_path: Union[str, bytes, os.PathLike],
+    identifier_name: str,
+    file_type: str,
+    rebuild=False,
+    logger=None,
+) -> Manifest:
+    """
+    Returns the manifest of an experiment folder, it is built and saved in the folder if it does not exist or does
+    not match the content of the folder anymore
+    :param folder_path: The experiment folder, i.e. the FolderPath of the config
+    :param identifier_name: The name of the identifiers, e.g. "pos"
+    :param file_type: The file type of the original files (without the dot)
+    :param rebuild: Always scan the folder, even if a current manifest exists
+    :param logger: An optional logger to report the scan
+    :return: The manifest
+    """
+
+    if not rebuild:
+        manifest = load_manifest(folder_path, identifier_name, file_type)
+        if manifest is not None:
+            return manifest
+
+    if logger is not None:
+        logger.info(f"Indexing the files in {folder_path}...")
+    manifest = Manifest.scan(folder_path, identifier_name, file_type)
+
+    # the pipeline works without a saved manifest, e.g. in read-only folders
+    try:
+        manifest.to_file()
+    except OSError as e:
+        if logger is not None:
+            logger.warning(f"Could not save the manifest ({e.strerror}), continuing...")
+
+    return manifest
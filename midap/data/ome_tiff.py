@@ -0,0 +1,145 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+from xml.etree import ElementTree
+
+import tifffile as tiff
+
+
+class OmeSource(NamedTuple):
+    """
+    The location of a channel in an OME-TIFF dataset
+    """
+
+    # the file containing the OME-XML metadata of the dataset, other files of the series are referenced from there
+    path: Path
+    # the index of the image series (position) in the metadata
+    series: int
+    # the index of the channel in the series, None if the series has no channel axis
+    channel: Optional[int]
+    # the number of time points of the series
+    num_frames: int
+
+
+def read_ome_xml(path: Union[str, bytes, os.PathLike]) -> Optional[ElementTree.Element]:
+    """
+    Reads the OME-XML metadata of a file, only the first page is parsed
+    :param path: The path to the OME-TIFF file
+    :return: The root element of the metadata or None if the file contains no OME-XML
+    """
+
+    with tiff.TiffFile(path) as tif:
+        xml = tif.pages[0].description
+    if not xml.lstrip().startswith("<?xml") or "<OME" not in xml:
+        return None
+    return ElementTree.fromstring(xml)
+
+
+def match_channel(channel: str, names: List[str]) -> Optional[int]:
+    """
+    Finds a channel of the config in the channel names of the metadata
+    :param channel: The name of the channel in the config
+    :param names: The channel names of the metadata
+    :return: The index of the matching name or None, exact matches are preferred over partial ones
+    """
+
+    if channel in names:
+        return names.index(channel)
+    matches = [i for i, name in enumerate(names) if channel in name]
+    if len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def match_image(image: ElementTree.Element, ns: str, identifier: str) -> bool:
+    """
+    Checks if an image of the OME-XML metadata belongs to a position. The name of the image and the name of its stage
+    label are compared case-insensitively with the identifier, leading zeros of the number are ignored, such that e.g.
+    "pos1" matches "Pos1" and "Pos01" but not "Pos10".
+    :param image: The Image element of the metadata
+    :param ns: The namespace of the metadata
+    :param identifier: The identifier of the position, e.g. "pos1"
+    :return: True if the image belongs to the position
+    """
+
+    prefix, number = re.fullmatch(r"(.*?)(\d*)", identifier).groups()
+    number = f"0*{int(number)}(?!\\d)" if number else ""
+    pattern = re.compile(f"{re.escape(prefix)}{number}", re.IGNORECASE)
+
+    names = [image.get("Name", "")]
+    if (stage_label := image.find(f"{ns}StageLabel")) is not None:
+        names.append(stage_label.get("Name", ""))
+    return any(pattern.search(name) is not None for name in names)
+
+
+def resolve_ome_channels(
+    files: Iterable[Union[str, bytes, os.PathLike]],
+    channels: List[str],
+    identifier: Optional[str] = None,
+) -> Dict[str, OmeSource]:
+    """
+    Resolves the channels of a position from the OME-XML metadata of its files. Files of a multi-file dataset are
+    only parsed once, files that only contain binary data are resolved to the file holding the metadata. Channels are
+    matched against the channel names of the metadata or, for series without channel axis, against the file names.
+    If the metadata contains the images of several positions, only the images matching the identifier are used.
+    :param files: The OME-TIFF files of the position
+    :param channels: The names of the channels in the config
+    :param identifier: The identifier of the position, used to select its images from multi-position metadata
+    :return: A dictionary channel -> OmeSource, missing channels are not contained
+    """
+
+    sources = {}
+    seen = set()
+    for fname in sorted(Path(f) for f in files):
+        if fname.resolve() in seen:
+            continue
+        root = read_ome_xml(fname)
+        if root is None:
+            continue
+
+        # the namespace depends on the schema version
+        ns = root.tag[: root.tag.index("}") + 1] if root.tag.startswith("{") else ""
+
+        # binary only files point to the file with the metadata
+        binary = root.find(f"{ns}BinaryOnly")
+        if binary is not None:
+            fname = fname.parent.joinpath(binary.get("MetadataFile"))
+            if fname.resolve() in seen or (root := read_ome_xml(fname)) is None:
+                continue
+        seen.add(fname.resolve())
+
+        # multi-position metadata contains the images of all positions
+        images = list(enumerate(root.findall(f"{ns}Image")))
+        if identifier is not None and len(images) > 1:
+            selected = [(s, i) for s, i in images if match_image(i, ns, identifier)]
+            images = selected if len(selected) > 0 else images
+
+        for series, image in images:
+            pixels = image.find(f"{ns}Pixels")
+
+            # all files of the series belong to this dataset
+            for uuid in pixels.iter(f"{ns}UUID"):
+                if uuid.get("FileName") is not None:
+                    seen.add(fname.parent.joinpath(uuid.get("FileName")).resolve())
+
+            names = [c.get("Name", "") for c in pixels.findall(f"{ns}Channel")]
+            num_frames = int(pixels.get("SizeT", 1))
+            for channel in channels:
+                if int(pixels.get("SizeC", 1)) > 1:
+                    if (ix := match_channel(channel, names)) is None:
+                        continue
+                    source = OmeSource(fname, series, ix, num_frames)
+                elif channel in fname.stem or channel in names:
+                    source = OmeSource(fname, series, None, num_frames)
+                else:
+                    continue
+
+                if channel in sources:
+                    raise FileExistsError(
+                        f"Channel {channel} found in more than one OME-TIFF dataset: "
+                        f"'{sources[channel].path}' and '{fname}'"
+                    )
+                sources[channel] = source
+
+    return sources
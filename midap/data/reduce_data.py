@@ -2,6 +2,7 @@
 import os
 import tifffile as tiff
 
+from midap.data.tiff_stack import TiffStack
 from midap.utils import get_logger
 
 loglevel = 7
@@ -15,12 +16,13 @@ def filter_tiff_stack(input_file, output_file, from_idx, to_idx):
     :param from_idx: integer value of the start index from which slices should be saved
     :param to_idx: integer value of the end index upto which slices should be saved
     """
-    with tiff.TiffFile(input_file) as tif:
-        images = tif.asarray()
-    if from_idx < 0 or to_idx >= len(images) or from_idx > to_idx:
-        raise ValueError("Invalid from/to indices")
-    selected_images = images[from_idx:to_idx+1]
-    tiff.imwrite(output_file, selected_images)
+    with TiffStack(input_file) as stack:
+        if from_idx < 0 or to_idx >= len(stack) or from_idx > to_idx:
+            raise ValueError("Invalid from/to indices")
+        # copy page by page into a single contiguous series
+        with tiff.TiffWriter(output_file) as writer:
+            for ix in range(from_idx, to_idx + 1):
+                writer.write(stack[ix], contiguous=True)
     logger.info(f"Saved {output_file} with slices {from_idx} to {to_idx}.")
 
 def filter_data_set(input_folder, output_folder, from_idx, to_idx):
@@ -0,0 +1,177 @@
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import tifffile as tiff
+
+from .frame_store import FrameStore
+
+
+class TiffStack:
+    """
+    Lazy access to the frames of a (multi-page) TIFF file. Only the pages that are actually requested are read from
+    disk, such that the memory footprint stays at roughly one frame independent of the length of the stack.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, bytes, os.PathLike],
+        series=0,
+        channel: Optional[int] = None,
+    ):
+        """
+        Opens the TIFF file, no image data is read
+        :param path: Path to the TIFF file, for multi-file OME-TIFFs the file containing the OME-XML metadata
+        :param series: The index of the image series in the file that contains the frames
+        :param channel: The index of the channel to read if the series has a channel axis "C", None means all channels
+        """
+
+        self.path = Path(path)
+        self._tif = tiff.TiffFile(self.path)
+        self.series = self._tif.series[series]
+
+        # all leading dimensions of the series (except the selected channel) are flattened to frames
+        self.frame_shape = self.series.keyframe.shape
+        self.dtype = self.series.dtype
+        n_leading = len(self.series.shape) - len(self.frame_shape)
+        leading_axes = self.series.axes[:n_leading]
+        n_pages = int(np.prod(self.series.shape[:n_leading]))
+        page_index = np.arange(n_pages).reshape(self.series.shape[:n_leading])
+        if channel is not None and "C" in leading_axes:
+            page_index = np.take(page_index, channel, axis=leading_axes.index("C"))
+        elif channel not in (None, 0):
+            raise ValueError(
+                f"{self.path} has no channel axis, channel {channel} does not exist"
+            )
+        self._page_index = page_index.ravel()
+        self.num_frames = len(self._page_index)
+
+        # truncated ImageJ hyperstacks only contain the first page, but their data is contiguous and can be mapped
+        self._pages = self.series.pages
+        self._memmap = None
+        if len(self._pages) != n_pages:
+            self._memmap = tiff.memmap(self.path, series=series, mode="r").reshape(
+                (-1,) + self.frame_shape
+            )
+
+        # the pages of multi-file series can be in other files, these are kept open
+        self._handles = []
+        for page in self._pages:
+            if page is not None and page.parent is not self._tif:
+                handle = page.parent.filehandle
+                if handle.closed and all(h is not handle for h in self._handles):
+                    handle.open()
+                    self._handles.append(handle)
+
+    @property
+    def shape(self):
+        """
+        The shape of the stack (frames, ...)
+        """
+        return (self.num_frames,) + self.frame_shape
+
+    def read(self, ix: int) -> np.ndarray:
+        """
+        Reads a single frame of the stack
+        :param ix: The index of the frame, negative indices count from the end
+        :return: The frame as array
+        """
+
+        if ix < 0:
+            ix += self.num_frames
+        if not 0 <= ix < self.num_frames:
+            raise IndexError(
+                f"Frame {ix} out of range for {self.path} with {self.num_frames} frames"
+            )
+
+        page = self._page_index[ix]
+        if self._memmap is not None:
+            return np.array(self._memmap[page])
+        if self._pages[page] is None:
+            raise ValueError(f"Frame {ix} of {self.path} is missing")
+        return self._pages[page].asarray()
+
+    def close(self):
+        """
+        Closes the underlying file
+        """
+
+        self._memmap = None
+        for handle in self._handles:
+            handle.close()
+        self._handles = []
+        self._tif.close()
+
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, ix: int) -> np.ndarray:
+        return self.read(ix)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for ix in range(self.num_frames):
+            yield self.read(ix)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TiffFrameSource(FrameStore):
+    """
+    A read-only frame store that contains selected frames of a TIFF stack. The frames are read (and processed) on the
+    fly, such that they never have to be written to disk.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, bytes, os.PathLike],
+        frames: Iterable[int],
+        names: Iterable[str],
+        process: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        series=0,
+        channel: Optional[int] = None,
+    ):
+        """
+        Initializes the source, the stack is only opened when the first frame is read
+        :param path: Path to the TIFF file
+        :param frames: The indices of the frames in the stack
+        :param names: The names of the frames, in the same order as the frames
+        :param process: A function that is applied to every frame after reading, e.g. a deconvolution
+        :param series: The index of the image series in the file, see TiffStack
+        :param channel: The index of the channel in the series, see TiffStack
+        """
+
+        super().__init__(path)
+        self.process = process
+        self.series = series
+        self.channel = channel
+        self._index = dict(zip(names, frames))
+        self._names = sorted(self._index)
+        self._stack = None
+
+    @property
+    def names(self) -> List[str]:
+        return self._names
+
+    def read(self, name: str) -> np.ndarray:
+        if self._stack is None:
+            self._stack = TiffStack(self.path, series=self.series, channel=self.channel)
+        frame = self._stack[self._index[name]]
+        if self.process is not None:
+            frame = self.process(frame)
+        return frame
+
+    def write(self, name: str, img: np.ndarray):
+        raise NotImplementedError(f"The frames of {self.path} are read-only")
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    def close(self):
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
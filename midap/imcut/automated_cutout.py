@@ -0,0 +1,140 @@
+import numpy as np
+from scipy import fft
+from scipy.ndimage import median_filter, uniform_filter1d
+from scipy.signal import find_peaks
+from skimage.filters import threshold_otsu
+
+from .base_cutout import CutoutImage
+from .registration import template_correlation
+
+
+class AutomatedCutout(CutoutImage):
+    """
+    A class that detects the chambers of a mother machine automatically, such that no display is needed
+    """
+
+    supported_setups = ["Mother_Machine"]
+    detects_chambers = True
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the class with given arguments and keyword arguments
+        :*args: arguments used to init the parent class
+        :**kwargs: keyword arguments used to init the parent class
+        """
+        # init the super class
+        super().__init__(*args, **kwargs)
+
+        # the range of chamber periods in pixels that are considered
+        self.min_period = 8
+        self.max_period = 200
+
+    def cut_corners(self, img):
+        """
+        Given a single aligned image as array, it detects the corners of the first chamber and the offsets of all
+        chambers
+        :param img: Image to cut as array
+        :returns: The corners of the cutout as tuple (left_x, right_x, lower_y, upper_y), where full range of the
+                  image, i.e. the limits of the corners, are given by the total number of pixels.
+        """
+
+        img = np.asarray(img, dtype=float)
+        period = self.chamber_period(img)
+        lower_y, upper_y = self.chamber_band(img, period)
+        left_x, right_x, offsets = self.chamber_offsets(img[lower_y:upper_y], period)
+        self.logger.info(
+            f"Detected {len(offsets)} chambers with a period of {period:.1f} pixels..."
+        )
+
+        self.corners_cut = (int(left_x), int(right_x), int(lower_y), int(upper_y))
+        self.offsets = [int(offset) for offset in offsets]
+
+    def chamber_period(self, img: np.ndarray) -> float:
+        """
+        Estimates the period of the chambers from the mean power spectrum of the rows
+        :param img: The image as array
+        :returns: The period in pixels
+        """
+
+        width = img.shape[1]
+        rows = img - img.mean(axis=1, keepdims=True)
+        power = np.mean(np.abs(fft.rfft(rows, axis=1)) ** 2, axis=0)
+
+        # only frequencies of plausible periods
+        freqs = np.arange(len(power))
+        valid = (freqs >= width / self.max_period) & (freqs <= width / self.min_period)
+        if not np.any(valid):
+            raise ValueError("The image is too small to detect chambers")
+        k = freqs[valid][np.argmax(power[valid])]
+        return width / k
+
+    def chamber_band(self, img: np.ndarray, period: float):
+        """
+        Detects the rows of the chambers, i.e. the rows with a strong periodic signal
+        :param img: The image as array
+        :param period: The period of the chambers in pixels
+        :returns: The lower and upper y-coordinate of the chambers
+        """
+
+        # the amplitude of the chamber frequency in every row
+        k = int(round(img.shape[1] / period))
+        spectrum = np.abs(fft.rfft(img - img.mean(axis=1, keepdims=True), axis=1))
+        amplitude = spectrum[:, max(k - 1, 1) : k + 2].sum(axis=1)
+        amplitude = median_filter(amplitude, size=int(round(period)), mode="nearest")
+
+        # the longest run of rows above the Otsu threshold
+        above = amplitude > threshold_otsu(amplitude)
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], above, [0]]).astype(int)))
+        starts, ends = edges[::2], edges[1::2]
+        if len(starts) == 0:
+            raise ValueError(
+                "No chambers detected, use SemiAutomatedCutout to select them manually"
+            )
+        longest = np.argmax(ends - starts)
+        return starts[longest], ends[longest]
+
+    def chamber_offsets(self, band: np.ndarray, period: float):
+        """
+        Detects the chambers in the rows of the chambers
+        :param band: The rows of the chambers as array
+        :param period: The period of the chambers in pixels
+        :returns: The left and right x-coordinate of the first chamber and the offsets of all chambers
+        """
+
+        # the chambers are the narrower phase of the detrended intensity profile
+        profile = band.mean(axis=0)
+        profile = profile - uniform_filter1d(
+            profile, size=int(round(period)), mode="nearest"
+        )
+        inside = profile > 0
+        if inside.mean() > 0.5:
+            inside = ~inside
+
+        # the runs of the chambers, incomplete chambers at the border are ignored
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], inside, [0]]).astype(int)))
+        starts, ends = edges[::2], edges[1::2]
+        complete = (starts > 0) & (ends < len(profile))
+        starts, ends = starts[complete], ends[complete]
+        if len(starts) == 0:
+            raise ValueError(
+                "No chambers detected, use SemiAutomatedCutout to select them manually"
+            )
+
+        # runs that are much narrower or wider than the chambers are artifacts
+        chamber_width = int(np.median(ends - starts))
+        regular = np.abs(ends - starts - chamber_width) <= chamber_width / 2
+        starts, ends = starts[regular], ends[regular]
+
+        # the first chamber with a margin that does not reach the neighbouring chambers
+        margin = max(int((period - chamber_width) / 4), 0)
+        left_x = max(starts[0] - margin, 0)
+        right_x = min(left_x + chamber_width + 2 * margin, band.shape[1])
+
+        # all chambers are found by correlating the first one with the band
+        correlation = template_correlation(band, band[:, left_x:right_x])
+        peaks, _ = find_peaks(
+            correlation, distance=max(int(0.7 * period), 1), height=0.5
+        )
+        offsets = peaks[peaks >= left_x] - left_x
+
+        return left_x, right_x, offsets
@@ -1,13 +1,22 @@
 import os
 from abc import ABC, abstractmethod
-from typing import Iterable, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Union
 
 import numpy as np
-import skimage.io as io
 from skimage.registration import phase_cross_correlation
 from tqdm import tqdm
 
+from ..data.async_writer import AsyncWriter
+from ..data.frame_store import FrameStore, get_frame_store
 from ..utils import get_logger
+from .registration import (
+    REGISTRATION_MODES,
+    SHIFT_CACHE_NAME,
+    SUBPIXEL,
+    ShiftCache,
+    get_registration,
+)
 
 # get the logger we readout the variable or set it to max output
 if "__VERBOSE" in os.environ:
@@ -25,13 +34,33 @@ class CutoutImage(ABC):
     # this logger will be shared by all instances and subclasses
     logger = logger
 
+    # subclasses that find the chambers without user input can run with Corners = None in headless mode
+    detects_chambers = False
+
     def __init__(
         self,
         paths: Union[str, bytes, os.PathLike, Iterable[Union[str, bytes, os.PathLike]]],
+        storage="files",
+        sources: Optional[List[FrameStore]] = None,
+        codec="default",
+        workers=1,
+        registration_mode="full",
+        cache_shifts=False,
     ):
         """
         Initializes the class
         :param paths: List of paths to the directories containing the files that should be cut
+        :param storage: The frame storage backend of the raw images and the cutouts, see midap.data.frame_store
+        :param sources: Optional frame stores (one per path) to read the frames from instead of the stores at the
+                        paths, e.g. frames that are split from the original stack on the fly. The cutouts are still
+                        saved relative to the paths.
+        :param codec: The codec used to write the cutouts, see midap.data.frame_store.parse_codec
+        :param workers: The number of threads used for the FFTs of the registration and the channels that are cut
+                        in parallel
+        :param registration_mode: How the frames are registered, the full frames ("full"), a padded window around the
+                                  cutout ("roi") or coarse-to-fine ("pyramid"), see midap.imcut.registration
+        :param cache_shifts: Save the shifts next to the channel data (shifts.npz) and reuse them for frames with the
+                             same content, e.g. on a restart
         """
 
         # if paths is just a single string we pack it into a list
@@ -44,10 +73,18 @@ class CutoutImage(ABC):
         self.corners_cut = None
         self.offsets = None
 
-        # get the file lists
+        # get the frame lists, the entries are the paths the frames would have in the directory layout
+        self.storage = storage
+        self.codec = codec
+        if sources is None:
+            self.stores = [
+                get_frame_store(channel, backend=storage) for channel in self.paths
+            ]
+        else:
+            self.stores = list(sources)
         self.channels = [
-            [os.path.join(channel, f) for f in sorted(os.listdir(channel))]
-            for channel in self.paths
+            [os.path.join(channel, name) for name in store.names]
+            for channel, store in zip(self.paths, self.stores)
         ]
 
         # adjust the length such that all channels have the same number of elements
@@ -55,6 +92,26 @@ class CutoutImage(ABC):
         for i in range(len(self.channels)):
             self.channels[i] = self.channels[i][: self.min_frames]
 
+        # the frames of the first channel are registered in batches
+        if registration_mode not in REGISTRATION_MODES:
+            raise ValueError(
+                f"Unknown registration mode '{registration_mode}', choose from {REGISTRATION_MODES}"
+            )
+        self.workers = workers
+        self.registration_mode = registration_mode
+        self.registration_batch_size = 16
+        # the margin of the registration window around the cutout, i.e. the largest expected shift
+        self.registration_padding = 64
+        # the shifts are saved next to the channel data and reused for frames with the same content
+        self.cache_shifts = cache_shifts
+        # subpixel shifts are estimated to 1 / subpixel_factor of a pixel, see run_align_cutout
+        self.subpixel_factor = 10
+        self.upsample_factor = 1
+
+        # the cutouts are written in the background, the stores stay open until close
+        self.writer = AsyncWriter()
+        self.cutout_stores = {}
+
     def align_two_images(self, src_img: np.ndarray, ref_img: np.ndarray):
         """
         Calculates the shifts necessary to align to images
@@ -67,230 +124,415 @@ class CutoutImage(ABC):
             int
         )
 
+    def read_frame(self, channel_id: int, ix: int):
+        """
+        Reads a single frame of a channel from its frame store
+        :param channel_id: The index of the channel
+        :param ix: The index of the frame
+        :returns: The frame as array
+        """
+
+        return self.stores[channel_id].read(
+            os.path.basename(self.channels[channel_id][ix])
+        )
+
+    def registration_window(self, shape: tuple):
+        """
+        The window of the frames that is used by the "roi" and "pyramid" registration, i.e. the region of all cutouts
+        padded by the registration padding
+        :param shape: The shape of the frames
+        :returns: The window as tuple (lower_y, upper_y, left_x, right_x), None if no corners are set yet
+        """
+
+        if self.corners_cut is None:
+            return None
+        left_x, right_x, lower_y, upper_y = self.corners_cut
+        if self.offsets is not None and len(self.offsets) > 0:
+            left_x, right_x = left_x + min(self.offsets), right_x + max(self.offsets)
+
+        pad = self.registration_padding
+        return (
+            max(lower_y - pad, 0),
+            min(upper_y + pad, shape[0]),
+            max(left_x - pad, 0),
+            min(right_x + pad, shape[1]),
+        )
+
+    def shift_cache_path(self, channel_id: int):
+        """
+        The path of the file that caches the shifts of a channel, it is saved next to the directories of the channel
+        :param channel_id: The index of the channel
+        :returns: The path of the cache
+        """
+
+        return os.path.join(
+            os.path.dirname(os.path.dirname(self.channels[channel_id][0])),
+            SHIFT_CACHE_NAME,
+        )
+
+    def registered_frames(self, channel_id: int, src: np.ndarray):
+        """
+        Iterates over the frames of a channel together with their shifts relative to the first frame. Missing shifts
+        are calculated in batches with a registration to the given first frame.
+        :param channel_id: The index of the channel
+        :param src: The first frame of the channel
+        :returns: A generator yielding tuples (index, frame, shift) for all frames
+        """
+
+        yield 0, src, np.zeros(2, dtype=int)
+
+        # shifts of frames that were registered before are reused, e.g. on a restart
+        window = None
+        if self.registration_mode != "full":
+            window = self.registration_window(src.shape)
+        cache = None
+        n_frames = len(self.channels[channel_id])
+        if self.cache_shifts and len(self.shifts) < n_frames - 1:
+            params = f"{self.registration_mode} {window}"
+            if self.upsample_factor > 1:
+                params += f" upsample {self.upsample_factor}"
+            cache = ShiftCache(self.shift_cache_path(channel_id), src, params=params)
+
+        # the spectrum of the first frame is only calculated if shifts are missing
+        correlation = None
+
+        def register(imgs: List[np.ndarray]):
+            nonlocal correlation
+            if correlation is None:
+                correlation = get_registration(
+                    src,
+                    mode=self.registration_mode,
+                    window=window,
+                    workers=self.workers,
+                    upsample_factor=self.upsample_factor,
+                )
+            return list(correlation.shifts(imgs))
+
+        # the cache is saved once at the end, or with the shifts so far if the registration is interrupted
+        updated = False
+        try:
+            for start in range(1, n_frames, self.registration_batch_size):
+                ixs = range(start, min(start + self.registration_batch_size, n_frames))
+                imgs = [self.read_frame(channel_id, i) for i in ixs]
+                if (missing := ixs[-1] - len(self.shifts)) > 0:
+                    todo = imgs[-missing:]
+                    if cache is None:
+                        self.shifts.extend(register(todo))
+                    else:
+                        # only frames with unknown content are registered
+                        hashes = cache.hashes(todo)
+                        new = [
+                            (h, img) for h, img in zip(hashes, todo) if h not in cache
+                        ]
+                        if len(new) > 0:
+                            new_hashes, new_imgs = zip(*new)
+                            cache.update(zip(new_hashes, register(list(new_imgs))))
+                            updated = True
+                        self.shifts.extend(cache[h] for h in hashes)
+                for i, img in zip(ixs, imgs):
+                    yield i, img, self.shifts[i - 1]
+        finally:
+            if updated:
+                cache.save()
+
     def align_all_images(self):
         """
         Calculates the shifts necessary to align all images
         """
         # load 1st image of phase channel
         files = self.channels[0]
-        src = io.imread(files[0])
+        src = self.read_frame(0, 0)
         self.shifts = []
-        for i in tqdm(range(1, len(files))):
-            ref = io.imread(files[i])
-            # align image compared to 1st image
-            shift = self.align_two_images(src, ref)
-            self.shifts.append(shift)
+        for _ in tqdm(self.registered_frames(0, src), total=len(files)):
+            pass
+
+    @staticmethod
+    def cutout_window(size: int, lower: int, upper: int, padding: int):
+        """
+        Calculates the part of a cutout along one axis that lies inside the image, the rest of the cutout is filled
+        with zeros as if the image was padded
+        :param size: The size of the image along the axis
+        :param lower: The lower corner of the cutout
+        :param upper: The upper corner of the cutout
+        :param padding: The padding of the image
+        :returns: A tuple (size of the cutout, source slice of the image, destination slice of the cutout)
+        """
+
+        # the same bounds as slicing the padded image
+        start, stop, _ = slice(lower + padding, upper + padding).indices(
+            size + 2 * padding
+        )
+        start, stop = start - padding, max(stop - padding, start - padding)
+        src_start = min(max(start, 0), size)
+        src_stop = max(min(stop, size), src_start)
+        return (
+            stop - start,
+            slice(src_start, src_stop),
+            slice(src_start - start, src_stop - start),
+        )
 
-    def do_cutout(self, img, corners_cut, padding=10):
+    def do_cutout(self, img, corners_cut, padding=10, out=None):
         """
-        Performs a cutout of an image
+        Performs a cutout of an image, only the cutout is copied, the image itself is never padded
         :param img: Image ad array
         :param corners_cut: The corners used for the cutout
         :param padding: Apply this savety padding to the cutout in case the corner are outside the image
+        :param out: An optional output array with the shape of the cutout and the dtype of the image
         :returns: The cutout from the image given the corners
         """
 
-        # generate cutout of image
-        left_x, right_x, lower_y, upper_y = [c + padding for c in corners_cut]
+        left_x, right_x, lower_y, upper_y = corners_cut
+        height, src_y, dst_y = self.cutout_window(
+            img.shape[0], lower_y, upper_y, padding
+        )
+        width, src_x, dst_x = self.cutout_window(img.shape[1], left_x, right_x, padding)
+
+        if out is None:
+            out = np.empty((height, width), dtype=img.dtype)
 
-        # pad the image and cutout
-        img = np.pad(img, padding, mode="constant", constant_values=0)
-        cutout = img[lower_y:upper_y, left_x:right_x]
-        return cutout
+        # the parts of the cutout outside of the image are zero
+        if dst_y.stop - dst_y.start < height or dst_x.stop - dst_x.start < width:
+            out.fill(0)
+        out[dst_y, dst_x] = img[src_y, src_x]
+        return out
 
-    def scale_pixel_val(self, img):
+    def shifted_cutout(self, img, corners_cut, shift):
+        """
+        Performs the cutout of a registered image, fractional shifts are applied with a bilinear interpolation of
+        the cutout window only
+        :param img: Image as array
+        :param corners_cut: The corners of the cutout in the first image
+        :param shift: The shift of the image relative to the first image
+        :returns: The cutout with the same dtype as the image
+        """
+
+        left_x, right_x, lower_y, upper_y = corners_cut
+        shift_y, shift_x = np.floor(shift).astype(int)
+        frac_y, frac_x = np.asarray(shift) - (shift_y, shift_x)
+
+        # integer shifts only move the corners
+        if frac_y == 0 and frac_x == 0:
+            return self.do_cutout(
+                img,
+                (
+                    left_x - shift_x,
+                    right_x - shift_x,
+                    lower_y - shift_y,
+                    upper_y - shift_y,
+                ),
+            )
+
+        # the window is one pixel larger to interpolate between the neighbours of the shifted pixels
+        window = self.do_cutout(
+            img,
+            (
+                left_x - shift_x - 1,
+                right_x - shift_x,
+                lower_y - shift_y - 1,
+                upper_y - shift_y,
+            ),
+        ).astype(float)
+        rows = frac_y * window[:-1] + (1 - frac_y) * window[1:]
+        cutout = frac_x * rows[:, :-1] + (1 - frac_x) * rows[:, 1:]
+        if np.issubdtype(img.dtype, np.integer):
+            cutout = np.rint(cutout)
+        return cutout.astype(img.dtype)
+
+    def scale_pixel_val(self, img, out=None):
         """
         Rescale the pixel values of the image
         :param img: The input image as array
+        :param out: An optional uint8 output array with the shape of the image
         :returns: The images with pixels scales to standard RGB values
         """
-        img_scaled = (255 * ((img - np.min(img)) / np.max(img - np.min(img)))).astype(
-            "uint8"
-        )
-        return img_scaled
 
-    def save_cutout(self, files, file_names, normalization, chamber=None):
+        # the same arithmetic as (255 * ((img - min) / max(img - min))).astype("uint8") in a single buffer
+        min_val, max_val = np.min(img), np.max(img)
+        dtype = img.dtype if np.issubdtype(img.dtype, np.floating) else np.float64
+        scaled = np.subtract(img, min_val, dtype=dtype)
+        scaled /= np.subtract(max_val, min_val, dtype=dtype)
+        scaled *= 255
+        if out is None:
+            return scaled.astype("uint8")
+        np.copyto(out, scaled, casting="unsafe")
+        return out
+
+    def cutout_store(self, file_name, normalization, chamber=None):
         """
-        Saves the cutouts into the proper directory
-        :param files: A list of arrrays (the cutouts) to save
-        :param file_names: The list of file names from the original files
+        Gets the frame store and the name of the cutout of a frame
+        :param file_name: The file name of the original frame
+        :param normalization: Whether the cutout is normalized or contains the raw counts
         :param chamber: The chamber number, if None, if won't be included in the path
+        :returns: A tuple (store, name) that can be passed to the writer
         """
-        # save of cutouts
         # TODO: This should not be hardcoded
-        dir_name = os.path.dirname(os.path.dirname(file_names[0]))
+        dir_name = os.path.dirname(os.path.dirname(file_name))
+        if chamber is not None:
+            dir_name = os.path.join(dir_name, f"chamber_{chamber}")
         if normalization:
-            for f, i in zip(file_names, files):
-                fname = f"{os.path.splitext(os.path.basename(f))[0]}_cut.png"
-                if chamber is None:
-                    f_path = os.path.join(dir_name, "cut_im", fname)
-                else:
-                    # we need to create this directory
-                    f_path = os.path.join(dir_name, f"chamber_{chamber}", "cut_im")
-                    os.makedirs(f_path, exist_ok=True)
-                    f_path = os.path.join(f_path, fname)
-                io.imsave(f_path, i, check_contrast=False)
+            path, ext, suffix = os.path.join(dir_name, "cut_im"), ".png", "_cut"
         else:
-            for f, i in zip(file_names, files):
-                fname = f"{os.path.splitext(os.path.basename(f))[0]}_cut_rawcounts.tif"
-                if chamber is None:
-                    f_path = os.path.join(dir_name, "cut_im_rawcounts", fname)
-                else:
-                    # we need to create this directory
-                    f_path = os.path.join(
-                        dir_name, f"chamber_{chamber}", "cut_im_rawcounts"
-                    )
-                    os.makedirs(f_path, exist_ok=True)
-                    f_path = os.path.join(f_path, fname)
-
-                io.imsave(f_path, i, check_contrast=False)
-
-    def run_align_cutout(self, registration: bool = True):
+            path, ext = os.path.join(dir_name, "cut_im_rawcounts"), ".tif"
+            suffix = "_cut_rawcounts"
+
+        if path not in self.cutout_stores:
+            self.cutout_stores[path] = get_frame_store(
+                path, backend=self.storage, ext=ext, codec=self.codec
+            )
+        return self.cutout_stores[path], f"{os.path.basename(file_name)}{suffix}"
+
+    def close(self):
         """
-        Aligns and cut out all images from all channels
+        Waits for all cutouts to be written and closes the frame stores of all channels, errors of the writes are
+        raised here
+        """
+
+        try:
+            self.writer.close()
+        finally:
+            for store in self.cutout_stores.values():
+                store.close()
+            self.cutout_stores = {}
+            for store in self.stores:
+                store.close()
+
+    def map_channels(self, func, channel_ids: Iterable[int]):
+        """
+        Applies a function to channels, with a pool of Workers threads if there is more than one worker
+        :param func: The function, called with the index of the channel
+        :param channel_ids: The indices of the channels
+        """
+
+        channel_ids = list(channel_ids)
+        if self.workers > 1 and len(channel_ids) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.workers, len(channel_ids))
+            ) as pool:
+                # errors of the channels are raised here
+                list(pool.map(func, channel_ids))
+        else:
+            for channel_id in channel_ids:
+                func(channel_id)
+
+    def init_shifts(self, registration: Union[bool, str]):
+        """
+        Prepares the shifts of the registration
         :param registration: If True, compute cross-image registration from the first channel and apply
-                             shifts to all channels. If False, skip registration and use static corners.
+                             shifts to all channels. If "subpixel", the shifts are estimated and applied with
+                             subpixel precision. If False, skip registration and use static corners.
         """
 
+        self.upsample_factor = self.subpixel_factor if registration == SUBPIXEL else 1
         if registration:
-            self.logger.info("Aligning images...")
-            self.align_all_images()
+            # the shifts are calculated while cutting the first channel, such that every frame is only read once
+            self.logger.info("Aligning and cutting images...")
+            self.shifts = []
         else:
             self.logger.info("Skipping image registration (disabled)...")
             n_frames = len(self.channels[0])
             self.shifts = [np.array([0, 0]) for _ in range(n_frames - 1)]
+            self.logger.info("Cutting images...")
 
-        self.logger.info("Cutting images...")
-        # cycle through the channels
-        for channel_id, files in enumerate(self.channels):
-            self.logger.info(
-                f"Starting with channel {channel_id+1}/{len(self.channels)}"
-            )
-            # list for the aligned cutouts
-            aligned_cutouts = []
-            aligned_cutouts_norm = []
-
-            # get the first image
-            src = io.imread(files[0])
+    def cutout_channel(self, channel_id: int):
+        """
+        Cuts out all images of a channel, the shifts have to be known for all channels except the first
+        :param channel_id: The index of the channel
+        """
 
-            # We cut the corners if the corners_cut is None
-            if self.corners_cut is None:
-                # set the corner to cut
-                self.cut_corners(img=src)
+        self.logger.info(f"Starting with channel {channel_id+1}/{len(self.channels)}")
+        files = self.channels[channel_id]
+
+        # get the first image
+        src = self.read_frame(channel_id, 0)
+
+        # We cut the corners if the corners_cut is None
+        if self.corners_cut is None:
+            # set the corner to cut
+            self.cut_corners(img=src)
+
+        # cutout of all images, the frames of the first channel are registered to its first frame, the cutouts
+        # are written in the background, such that only a batch of frames is in memory
+        for i, img, shift in tqdm(
+            self.registered_frames(channel_id, src), total=len(files)
+        ):
+            # adapt the corner with the shift of the image
+            cut_img = self.shifted_cutout(img, self.corners_cut, shift)
+            # sacle the pixel values
+            proc_img = self.scale_pixel_val(cut_img)
+            self.writer.write(*self.cutout_store(files[i], True), proc_img)
+            self.writer.write(*self.cutout_store(files[i], False), cut_img)
+
+    def cutout_channel_mother_machine(self, channel_id: int):
+        """
+        Cuts out all chambers from all images of a channel, the shifts have to be known for all channels except the
+        first
+        :param channel_id: The index of the channel
+        """
 
-            # perform the cutout of the first image
-            cutout = self.do_cutout(src, self.corners_cut)
+        self.logger.info(f"Starting with channel {channel_id + 1}/{len(self.channels)}")
+        files = self.channels[channel_id]
 
-            # scale the pixel values
-            cut_src = self.scale_pixel_val(cutout)
+        # get the first image
+        src = self.read_frame(channel_id, 0)
 
-            # add to list
-            aligned_cutouts_norm.append(cut_src)
-            aligned_cutouts.append(cutout)
+        # We cut the corners if the corners_cut is None
+        if self.corners_cut is None or self.offsets is None:
+            # set the corner to cut
+            self.cut_corners(img=src)
 
-            # cutout of all other images of all channels
-            for i in tqdm(range(1, len(files))):
-                img = io.imread(files[i])
+        # the corners of all chambers in the first image
+        left_x, right_x, lower_y, upper_y = self.corners_cut
+        base_corners = [
+            (left_x + offset, right_x + offset, lower_y, upper_y)
+            for offset in self.offsets
+        ]
 
+        # every image is read once and all chambers are cut from it, the cutouts are written in the background
+        self.logger.info(f"Cutting {len(base_corners)} chambers per image...")
+        for i, img, shift in tqdm(
+            self.registered_frames(channel_id, src), total=len(files)
+        ):
+            for chamber, corners in enumerate(base_corners):
                 # adapt the corner with the shift of the image
-                left_x, right_x, lower_y, upper_y = self.corners_cut
-                current_corners = (
-                    left_x - self.shifts[i - 1][1],
-                    right_x - self.shifts[i - 1][1],
-                    lower_y - self.shifts[i - 1][0],
-                    upper_y - self.shifts[i - 1][0],
-                )
-                cut_img = self.do_cutout(img, current_corners)
+                cut_img = self.shifted_cutout(img, corners, shift)
                 # sacle the pixel values
                 proc_img = self.scale_pixel_val(cut_img)
-                aligned_cutouts_norm.append(proc_img)
-                aligned_cutouts.append(cut_img)
-
-            self.save_cutout(aligned_cutouts_norm, files, normalization=True)
-            self.save_cutout(aligned_cutouts, files, normalization=False)
+                self.writer.write(*self.cutout_store(files[i], True, chamber), proc_img)
+                self.writer.write(*self.cutout_store(files[i], False, chamber), cut_img)
 
-    def run_align_cutout_mother_machine(self, registration: bool = True):
+    def run_align_cutout(self, registration: Union[bool, str] = True):
         """
         Aligns and cut out all images from all channels
         :param registration: If True, compute cross-image registration from the first channel and apply
-                             shifts to all channels. If False, skip registration and use static corners.
+                             shifts to all channels. If "subpixel", the shifts are estimated and applied with
+                             subpixel precision. If False, skip registration and use static corners.
         """
 
-        if registration:
-            self.logger.info("Aligning images...")
-            self.align_all_images()
-        else:
-            self.logger.info("Skipping image registration (disabled)...")
-            n_frames = len(self.channels[0])
-            self.shifts = [np.array([0, 0]) for _ in range(n_frames - 1)]
-
-        self.logger.info("Cutting images...")
-        # cycle through the channels
-        for channel_id, files in enumerate(self.channels):
-            self.logger.info(
-                f"Starting with channel {channel_id + 1}/{len(self.channels)}"
-            )
+        self.init_shifts(registration)
 
-            # get the first image
-            src = io.imread(files[0])
+        # the first channel sets the corners and the shifts, the other channels only depend on them
+        self.cutout_channel(0)
+        self.map_channels(self.cutout_channel, range(1, len(self.channels)))
 
-            # We cut the corners if the corners_cut is None
-            if self.corners_cut is None or self.offsets is None:
-                # set the corner to cut
-                self.cut_corners(img=src)
+        self.close()
 
-            # cut out all chambers sequentially
-            for chamber in range(0, len(self.offsets)):
-                self.logger.info(
-                    f"Starting with chamber {chamber+1}/{len(self.offsets)}"
-                )
+    def run_align_cutout_mother_machine(self, registration: Union[bool, str] = True):
+        """
+        Aligns and cut out all images from all channels
+        :param registration: If True, compute cross-image registration from the first channel and apply
+                             shifts to all channels. If "subpixel", the shifts are estimated and applied with
+                             subpixel precision. If False, skip registration and use static corners.
+        """
 
-                # list for the aligned cutouts
-                aligned_cutouts = []
-                aligned_cutouts_norm = []
+        self.init_shifts(registration)
 
-                # adapt the corner with the shift of the image
-                base_corners = (
-                    self.corners_cut[0] + self.offsets[chamber],
-                    self.corners_cut[1] + self.offsets[chamber],
-                    self.corners_cut[2],
-                    self.corners_cut[3],
-                )
+        # the first channel sets the corners and the shifts, the other channels only depend on them
+        self.cutout_channel_mother_machine(0)
+        self.map_channels(
+            self.cutout_channel_mother_machine, range(1, len(self.channels))
+        )
 
-                # perform the cutout of the first image
-                cutout = self.do_cutout(src, base_corners)
-                # scale the pixel values
-                cut_src = self.scale_pixel_val(cutout)
-
-                # add to list
-                aligned_cutouts_norm.append(cut_src)
-                aligned_cutouts.append(cutout)
-
-                # cutout of all other images of all channels
-                for i in tqdm(range(1, len(files))):
-                    img = io.imread(files[i])
-
-                    # adapt the corner with the shift of the image
-                    left_x, right_x, lower_y, upper_y = base_corners
-                    current_corners = (
-                        left_x - self.shifts[i - 1][1],
-                        right_x - self.shifts[i - 1][1],
-                        lower_y - self.shifts[i - 1][0],
-                        upper_y - self.shifts[i - 1][0],
-                    )
-
-                    cut_img = self.do_cutout(img, current_corners)
-                    # sacle the pixel values
-                    proc_img = self.scale_pixel_val(cut_img)
-                    aligned_cutouts_norm.append(proc_img)
-                    aligned_cutouts.append(cut_img)
-
-                self.save_cutout(
-                    aligned_cutouts_norm, files, normalization=True, chamber=chamber
-                )
-                self.save_cutout(
-                    aligned_cutouts, files, normalization=False, chamber=chamber
-                )
+        self.close()
 
     @abstractmethod
     def cut_corners(self, img):
@@ -0,0 +1,395 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import fft
+
+# the available registration modes, the full frames, a window around the cutout or a coarse-to-fine pyramid
+REGISTRATION_MODES = ["full", "roi", "pyramid"]
+
+# the name of the file that caches the shifts of a channel
+SHIFT_CACHE_NAME = "shifts.npz"
+
+# the value of the Registration option that enables subpixel shifts
+SUBPIXEL = "subpixel"
+
+
+class PhaseCorrelation:
+    """
+    Registers images to a fixed reference image via the cross-correlation of skimage's phase_cross_correlation (with
+    normalization=None). The spectrum of the reference is computed once and the images are transformed in batches,
+    the shifts are identical to the ones of phase_cross_correlation with the same upsample_factor.
+    """
+
+    def __init__(
+        self,
+        reference: np.ndarray,
+        workers=1,
+        window: Optional[Tuple[int, int, int, int]] = None,
+        upsample_factor=1,
+    ):
+        """
+        Computes the spectrum of the reference image
+        :param reference: The reference image, all other images are registered to it
+        :param workers: The number of threads used for the FFTs
+        :param window: An optional window (lower_y, upper_y, left_x, right_x), only this region of the images is
+                       correlated, defaults to the full images
+        :param upsample_factor: Shifts are estimated to 1 / upsample_factor of a pixel, defaults to integer shifts
+        """
+
+        self.window = window
+        self.upsample_factor = upsample_factor
+        reference = self.crop(reference)
+        self.shape = reference.shape
+        self.workers = workers
+        self.ref_freq = fft.fftn(reference, workers=self.workers)
+
+        # shifts larger than half the image are wrapped around
+        self.midpoint = np.array([np.trunc(n / 2) for n in self.shape])
+
+    def crop(self, image: np.ndarray) -> np.ndarray:
+        """
+        Crops an image to the window of the registration
+        :param image: The image to crop
+        :returns: The region of the image that is correlated
+        """
+
+        if self.window is None:
+            return image
+        lower_y, upper_y, left_x, right_x = self.window
+        return image[lower_y:upper_y, left_x:right_x]
+
+    def shifts(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        Calculates the shifts necessary to align a batch of images to the reference
+        :param images: A list of images with the same shape as the reference
+        :returns: The shifts as array of shape (number of images, 2), integers if the upsample_factor is 1
+        """
+
+        stack = np.stack([self.crop(image) for image in images])
+        if stack.shape[1:] != self.shape:
+            raise ValueError("images must be same shape")
+
+        # cross-correlation of all images with the reference
+        axes = tuple(range(1, stack.ndim))
+        freq = fft.fftn(stack, axes=axes, workers=self.workers)
+        np.conjugate(freq, out=freq)
+        freq *= self.ref_freq
+        cross_correlation = fft.ifftn(
+            freq, axes=axes, workers=self.workers, overwrite_x=self.upsample_factor == 1
+        )
+
+        # locate the maxima
+        maxima = np.abs(cross_correlation).reshape(len(stack), -1).argmax(axis=1)
+        shifts = np.stack(np.unravel_index(maxima, self.shape), axis=1).astype(float)
+        shifts = np.where(shifts > self.midpoint, shifts - self.shape, shifts)
+        if self.upsample_factor > 1:
+            shifts = self.refine(freq, shifts)
+
+        # if its only one row or column the shift along that dimension has no effect
+        shifts[:, np.array(self.shape) == 1] = 0
+
+        if self.upsample_factor == 1:
+            return shifts.astype(int)
+        return shifts
+
+    def refine(self, freq: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+        """
+        Refines integer shifts with an upsampled cross-correlation in a neighbourhood of 1.5 pixels, the upsampled
+        region is evaluated with a matrix-multiply DFT instead of an FFT of the upsampled images
+        :param freq: The cross-power spectra of the images and the reference with shape (number of images, Y, X)
+        :param shifts: The integer shifts
+        :returns: The subpixel shifts
+        """
+
+        region_size = np.ceil(self.upsample_factor * 1.5)
+        dftshift = np.fix(region_size / 2.0)
+        offsets = dftshift - shifts * self.upsample_factor
+
+        # the DFT kernels of the upsampled regions along y and x for all images
+        region = np.arange(region_size)
+        kernels = [
+            np.exp(
+                -2j
+                * np.pi
+                * (region[None, :, None] - offsets[:, axis, None, None])
+                * fft.fftfreq(n, self.upsample_factor)[None, None, :]
+            )
+            for axis, n in enumerate(self.shape)
+        ]
+        cross_correlation = np.einsum(
+            "buy,byx,bvx->buv", kernels[0], freq.conj(), kernels[1]
+        ).conj()
+
+        maxima = np.abs(cross_correlation).reshape(len(freq), -1).argmax(axis=1)
+        maxima = np.stack(np.unravel_index(maxima, cross_correlation.shape[1:]), axis=1)
+        return shifts + (maxima - dftshift) / self.upsample_factor
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        """
+        Calculates the shift necessary to align a single image to the reference
+        :param image: The image to align
+        :returns: The shift as vector
+        """
+
+        return self.shifts([image])[0]
+
+
+def downsample(image: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Downsamples an image by averaging blocks of pixels, incomplete blocks at the border are dropped
+    :param image: The image to downsample
+    :param factor: The size of the blocks
+    :returns: The downsampled image
+    """
+
+    height, width = image.shape[0] // factor, image.shape[1] // factor
+    blocks = image[: height * factor, : width * factor].reshape(
+        height, factor, width, factor
+    )
+    return blocks.mean(axis=(1, 3))
+
+
+class PyramidCorrelation:
+    """
+    Registers images to a fixed reference image from coarse to fine. The shifts are estimated on downsampled images
+    and refined at full resolution in a window of the images, which is much cheaper than correlating full frames.
+    """
+
+    def __init__(
+        self,
+        reference: np.ndarray,
+        workers=1,
+        window: Optional[Tuple[int, int, int, int]] = None,
+        levels=2,
+        upsample_factor=1,
+    ):
+        """
+        Computes the spectrum of the downsampled reference image
+        :param reference: The reference image, all other images are registered to it
+        :param workers: The number of threads used for the FFTs
+        :param window: An optional window (lower_y, upper_y, left_x, right_x) used for the refinement, defaults to
+                       the full images
+        :param levels: The number of levels of the pyramid, the coarse shifts are estimated on images that are
+                       downsampled by 2**levels
+        :param upsample_factor: The refined shifts are estimated to 1 / upsample_factor of a pixel
+        """
+
+        self.reference = reference
+        self.workers = workers
+        self.factor = 2**levels
+        self.upsample_factor = upsample_factor
+        self.window = (0, reference.shape[0], 0, reference.shape[1])
+        if window is not None:
+            self.window = window
+        self.coarse = PhaseCorrelation(
+            downsample(reference, self.factor), workers=workers
+        )
+
+    def refine(self, image: np.ndarray, shift: np.ndarray) -> np.ndarray:
+        """
+        Refines a coarse shift by correlating the window of the reference with the shifted window of the image
+        :param image: The image to align
+        :param shift: The coarse estimate of the shift
+        :returns: The refined shift as vector
+        """
+
+        # the window of the image has to stay inside the image
+        lower_y, upper_y, left_x, right_x = self.window
+        height, width = self.reference.shape
+        lower_y, left_x = max(lower_y, shift[0], 0), max(left_x, shift[1], 0)
+        upper_y = min(upper_y, height + shift[0], height)
+        right_x = min(right_x, width + shift[1], width)
+        if upper_y <= lower_y or right_x <= left_x:
+            return shift
+
+        # the residual shift between the windows
+        reference = self.reference[lower_y:upper_y, left_x:right_x]
+        moving = image[
+            lower_y - shift[0] : upper_y - shift[0],
+            left_x - shift[1] : right_x - shift[1],
+        ]
+        return shift + PhaseCorrelation(
+            reference, workers=self.workers, upsample_factor=self.upsample_factor
+        )(moving)
+
+    def shifts(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        Calculates the shifts necessary to align a batch of images to the reference
+        :param images: A list of images with the same shape as the reference
+        :returns: The shifts as array of shape (number of images, 2)
+        """
+
+        if any(image.shape != self.reference.shape for image in images):
+            raise ValueError("images must be same shape")
+
+        coarse = self.coarse.shifts(
+            [downsample(image, self.factor) for image in images]
+        )
+        return np.stack(
+            [
+                self.refine(image, shift * self.factor)
+                for image, shift in zip(images, coarse)
+            ]
+        )
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        """
+        Calculates the shift necessary to align a single image to the reference
+        :param image: The image to align
+        :returns: The shift as integer vector
+        """
+
+        return self.shifts([image])[0]
+
+
+def get_registration(
+    reference: np.ndarray,
+    mode="full",
+    window: Optional[Tuple[int, int, int, int]] = None,
+    workers=1,
+    upsample_factor=1,
+):
+    """
+    Creates the registration engine of a mode
+    :param reference: The reference image, all other images are registered to it
+    :param mode: The registration mode, one of REGISTRATION_MODES
+    :param window: The window (lower_y, upper_y, left_x, right_x) around the cutout, used by "roi" and "pyramid"
+    :param workers: The number of threads used for the FFTs
+    :param upsample_factor: Shifts are estimated to 1 / upsample_factor of a pixel, defaults to integer shifts
+    :returns: The engine, a callable that also provides the batched method shifts
+    """
+
+    kwargs = dict(workers=workers, upsample_factor=upsample_factor)
+    if mode == "full":
+        return PhaseCorrelation(reference, **kwargs)
+    if mode == "roi":
+        return PhaseCorrelation(reference, window=window, **kwargs)
+    if mode == "pyramid":
+        return PyramidCorrelation(reference, window=window, **kwargs)
+    raise ValueError(
+        f"Unknown registration mode '{mode}', choose from {REGISTRATION_MODES}"
+    )
+
+
+def frame_hash(image: np.ndarray) -> str:
+    """
+    Calculates a hash of the content of a frame
+    :param image: The frame
+    :returns: The hash as hex string
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.dtype.str}{image.shape}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+class ShiftCache:
+    """
+    A persistent cache of the shifts of registered frames. The shifts are keyed by the content hashes of the frames
+    and are only valid for the same reference frame and registration parameters.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, bytes, os.PathLike],
+        reference: np.ndarray,
+        params: str = "",
+    ):
+        """
+        Loads the cache if it exists and matches the reference and the parameters
+        :param path: The path of the cache file
+        :param reference: The reference frame of the registration
+        :param params: A description of the registration parameters, e.g. the mode and the window
+        """
+
+        self.path = Path(path)
+        self.reference = frame_hash(reference)
+        self.params = params
+        self.shifts = {}
+
+        if self.path.exists():
+            try:
+                with np.load(self.path) as data:
+                    if (str(data["reference"]), str(data["params"])) == (
+                        self.reference,
+                        self.params,
+                    ):
+                        self.shifts = dict(zip(data["hashes"].tolist(), data["shifts"]))
+            except (OSError, ValueError, KeyError):
+                # a broken cache is recomputed
+                self.shifts = {}
+
+    def hashes(self, images: List[np.ndarray]) -> List[str]:
+        """
+        Calculates the keys of frames
+        :param images: The frames
+        :returns: A list of content hashes
+        """
+        return [frame_hash(image) for image in images]
+
+    def __contains__(self, key: str):
+        return key in self.shifts
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.shifts[key]
+
+    def update(self, items: Iterable[Tuple[str, np.ndarray]]):
+        """
+        Adds shifts to the cache
+        :param items: An iterable of tuples (hash, shift)
+        """
+        self.shifts.update(items)
+
+    def save(self):
+        """
+        Saves the cache, an existing file is replaced atomically
+        """
+
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                reference=self.reference,
+                params=self.params,
+                hashes=np.array(list(self.shifts), dtype=str),
+                shifts=np.array(list(self.shifts.values())).reshape(-1, 2),
+            )
+        os.replace(tmp_path, self.path)
+
+
+def template_correlation(strip: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """
+    Calculates the normalized cross-correlation of a template with all windows of a strip along the x-axis, e.g. of
+    a single chamber with the row of chambers of a mother machine. All windows are correlated in one FFT.
+    :param strip: The strip as array of shape (height, width)
+    :param template: The template as array of shape (height, template width)
+    :returns: The correlation for all window offsets 0, ..., width - template width as array with values in [-1, 1]
+    """
+
+    strip = np.asarray(strip, dtype=float)
+    template = np.asarray(template, dtype=float)
+    if strip.shape[0] != template.shape[0] or strip.shape[1] < template.shape[1]:
+        raise ValueError("The template has to fit into the strip")
+
+    # the correlation with the centered template for all offsets, summed over the rows
+    height, width = template.shape
+    n_pixels = height * width
+    template = template - template.mean()
+    n = strip.shape[1]
+    freq = fft.rfft(strip, n=n, axis=1) * np.conj(fft.rfft(template, n=n, axis=1))
+    correlation = fft.irfft(freq.sum(axis=0), n=n)[: n - width + 1]
+
+    # the variance of the windows from cumulative sums over the columns
+    sums = np.concatenate([[0.0], np.cumsum(strip.sum(axis=0))])
+    squares = np.concatenate([[0.0], np.cumsum((strip**2).sum(axis=0))])
+    window_sums = sums[width:] - sums[:-width]
+    window_var = squares[width:] - squares[:-width] - window_sums**2 / n_pixels
+
+    norm = np.sqrt(np.maximum(window_var, 0.0) * np.sum(template**2))
+    return np.divide(
+        correlation, norm, out=np.zeros_like(correlation), where=norm > 1e-12
+    )
@@ -1,52 +1,10 @@
-# flake8: noqa: F824
-
-import multiprocessing as mp
-
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.widgets import RectangleSelector
 from scipy.signal import find_peaks_cwt
-from skimage.registration import phase_cross_correlation
 
 from .base_cutout import CutoutImage
-
-
-_img = None
-# functions for the pool
-
-
-def init_pool(img):
-    """
-    Initializes the pool by setting the image that is used for the cutout
-    :param img: The image that is used for the cutout
-    """
-    global _img
-    _img = img
-
-
-def get_single_shift(x1, x2, y1, y2, offset):
-    """
-    Calculates the shift for a single chamber
-    :param x1: The left x-coordinate of the chamber
-    :param x2: The right x-coordinate of the chamber
-    :param y1: The lower y-coordinate of the chamber
-    :param y2: The upper y-coordinate of the chamber
-    :param offset: The offset in x-direction
-    :return: A single shift
-    """
-
-    global _img
-
-    # get the image
-    chamber = _img[y1:y2, x1:x2]
-    y_cut = _img[y1:y2]
-
-    # get the shift
-    x_dim = x2 - x1
-    shift = phase_cross_correlation(
-        y_cut[:, offset : offset + x_dim], chamber, normalization=None
-    )[0].astype(int)
-    return shift
+from .registration import template_correlation
 
 
 class SemiAutomatedCutout(CutoutImage):
@@ -66,7 +24,6 @@ class SemiAutomatedCutout(CutoutImage):
         super().__init__(*args, **kwargs)
 
         # some attributes that will be set later
-        self._pool = None
         self._img = None
 
     def cut_corners(self, img):
@@ -96,16 +53,19 @@ class SemiAutomatedCutout(CutoutImage):
         if x_dim > max_width:
             return []
 
-        # get all the valid offsets and calculate the shifts in parallel
+        # correlate the chamber with all offsets of the strip at once (except the last, as the shifts before)
         y_cut = self._interactive_img[y1:y2]
-        offset = np.arange(0, y_cut.shape[1] - x_dim, 1)
-        shifts = self._pool.starmap(
-            get_single_shift, [(x1, x2, y1, y2, i) for i in offset]
+        correlation = template_correlation(y_cut, y_cut[:, x1:x2])[:-1]
+
+        # the chambers are at the peaks of the correlation, refined to the local maximum
+        peaks = find_peaks_cwt(correlation, np.arange(5, 10), min_snr=1)
+        peaks = np.array(
+            [
+                max(peak - 2, 0) + np.argmax(correlation[max(peak - 2, 0) : peak + 3])
+                for peak in peaks
+            ],
+            dtype=int,
         )
-        shifts = np.stack(shifts, axis=0)
-
-        # we get the minimum shifts by getting the peaks of the min abs
-        peaks = find_peaks_cwt(-np.abs(shifts[:, -1]), np.arange(5, 10), min_snr=1)
 
         # finally the offsets are just the peaks shifted by the x1 coordinate
         offsets = peaks - x1
@@ -162,9 +122,8 @@ class SemiAutomatedCutout(CutoutImage):
         :returns: The corners as (left_x, right_x, lower_y, upper_y)
         """
 
-        # set the image and init the pool witht he image as global variable
+        # set the image for the chamber detection
         self._interactive_img = img
-        self._pool = mp.Pool(4, initializer=init_pool, initargs=(img,))
 
         # image and selector
         self.fig, self.ax = plt.subplots(1, 2)
@@ -199,8 +158,7 @@ class SemiAutomatedCutout(CutoutImage):
         self.ax[1].set_ylim(y2, y1)
         plt.show()
 
-        # close the pool and extract the corners
-        self._pool.close()
+        # extract the corners
         left_x, right_x = rs.corners[0][:2]
         lower_y, upper_y = rs.corners[1][1:3]
 
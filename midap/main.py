@@ -93,6 +93,16 @@ def run_module(args=None):
         "Extracts for each .tif file frames from position 10 to 50 and saves it in the output folder.",
     )  
 
+    parser.add_argument(
+        "--index",
+        nargs=3,
+        metavar=("FOLDER_PATH", "IDENTIFIER_NAME", "FILE_TYPE"),
+        help="This option will (re)build the manifest of an experiment folder and exit. The manifest lists the "
+        "identifiers, files, frame counts, shapes and dtypes of the original files and is read from the file "
+        "headers only. The pipeline and the GUI use it instead of searching the folder. "
+        "Example usage: --index /path/to/data pos tif",
+    )
+
     # parsing
     args = parser.parse_args(args)
 
@@ -136,12 +146,22 @@ def run_module(args=None):
         segment_analysis,
         track_cells,
     )
+    from midap.data.manifest import get_manifest
     from midap.data.reduce_data import filter_data_set
     from midap.main_family_machine import run_family_machine
     from midap.main_mother_machine import run_mother_machine
 
     logger.info("Done!")
 
+    # index the folder if requested and exit
+    if args.index:
+        folder_path, identifier_name, file_type = args.index
+        manifest = get_manifest(
+            folder_path, identifier_name, file_type, rebuild=True, logger=logger
+        )
+        logger.info(f"Found identifiers: {manifest.identifiers}")
+        return 0
+
     # Download the files if necessary
     logger.info(f"Checking necessary files...")
     download_files.main(args=[])
@@ -1,7 +1,7 @@
 import shutil
 import sys
 from pathlib import Path
-from shutil import copyfile, rmtree
+from shutil import rmtree
 import os
 
 import numpy as np
@@ -15,6 +15,10 @@ from midap.apps import (
     track_cells,
 )
 from midap.checkpoint import CheckpointManager
+from midap.data.file_copy import channel_source, copy_file
+from midap.data.frame_store import remove_frame_store
+from midap.data.manifest import get_manifest
+from midap.data.ome_tiff import resolve_ome_channels
 
 
 def run_mother_machine(config, checkpoint, main_args, logger, restart=False, config_mode = False):
@@ -37,6 +41,13 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
 
     # get the current base folder
     base_path = Path(config.get("General", "FolderPath"))
+    # the original files of all identifiers are indexed once
+    manifest = get_manifest(
+        base_path,
+        config.get("General", "IdentifierName"),
+        config.get("General", "FileType"),
+        logger=logger,
+    )
 
     # we cycle through all pos identifiers
     for identifier in config.getlist("General", "IdentifierFound"):
@@ -47,6 +58,8 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
         ]
         # current path of the identifier
         current_path = base_path.joinpath(identifier)
+        # the options of the stages
+        options = config.get_identifier_options(identifier)
 
         # stuff we do for the segmentation
         if run_segmentation:
@@ -88,17 +101,59 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
 
                 logger.info(f"Copying files for {identifier}")
 
-                # we get all the files in the base bath that match
+                # we get all the files of the identifier from the manifest
                 file_ext = config.get("General", "FileType")
+                files = manifest.files(identifier)
+                # referenced files are read in place, the paths are saved in the config
+                channels = config.getlist(identifier, "Channels")
+                for channel in channels:
+                    for key in ["Source", "SourceSeries", "SourceChannel"]:
+                        config.remove_option(identifier, f"{key}_{channel}")
+
+                # OME-TIFF datasets are resolved from their metadata and read in place
                 if file_ext == "ome.tif":
-                    files = base_path.glob(f"*{identifier}*/**/*.ome.tif")
+                    sources = resolve_ome_channels(files, channels, identifier)
+                    for channel in channels:
+                        if channel not in sources:
+                            raise FileNotFoundError(
+                                f"Channel {channel} not found in the OME-TIFF files "
+                                f"of {identifier}"
+                            )
+                        path, series, index, num_frames = sources[channel]
+                        logger.info(
+                            f"Reading channel {channel} from '{path.name}' "
+                            f"(series {series}, {num_frames} frames)..."
+                        )
+                        selection = {"Source": path.absolute(), "SourceSeries": series}
+                        if index is not None:
+                            selection["SourceChannel"] = index
+                        for key, value in selection.items():
+                            config.set(identifier, f"{key}_{channel}", str(value))
+                    config.to_file()
                 else:
-                    files = base_path.glob(f"*{identifier}*.{file_ext}")
-                for fname in files:
-                    for channel in config.getlist(identifier, "Channels"):
-                        if channel in fname.stem:
-                            logger.info(f"Copying '{fname.name}'...")
-                            copyfile(fname, current_path.joinpath(channel, fname.name))
+                    for fname in files:
+                        for channel in channels:
+                            if channel not in fname.stem:
+                                continue
+                            logger.info(
+                                f"Copying '{fname.name}' ({options['copy_strategy']})..."
+                            )
+                            path = copy_file(
+                                fname,
+                                current_path.joinpath(channel, fname.name),
+                                strategy=options["copy_strategy"],
+                                logger=logger,
+                            )
+                            if options["copy_strategy"] == "reference":
+                                key = f"Source_{channel}"
+                                if config.has_option(identifier, key):
+                                    raise FileExistsError(
+                                        f"More than one file of the type '.{file_ext}' "
+                                        f"exists for channel {channel}"
+                                    )
+                                config.set(identifier, key, str(path.absolute()))
+                    if options["copy_strategy"] == "reference":
+                        config.to_file()
 
             # This is just to fill in the config file, i.e. split files 2 frames, get corners, etc
             ######################################################################################
@@ -120,7 +175,9 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                 # split the frames for all channels
                 file_ext = config.get("General", "FileType")
                 for channel in config.getlist(identifier, "Channels"):
-                    paths = list(current_path.joinpath(channel).glob(f"*.{file_ext}"))
+                    paths, selection = channel_source(
+                        config, identifier, channel, current_path.joinpath(channel)
+                    )
                     if len(paths) == 0:
                         raise FileNotFoundError(
                             f"No file of the type '.{file_ext}' exists for channel {channel}"
@@ -143,6 +200,10 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                         frames=frames,
                         deconv=config.get(identifier, "Deconvolution"),
                         loglevel=main_args.loglevel,
+                        storage=options["storage"],
+                        codec=options["raw_codec"],
+                        workers=options["workers"],
+                        **selection,
                     )
 
             # cut chamber and images
@@ -185,13 +246,18 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                             for offset in config.getlist(identifier, "Offsets")
                         ]
                     )
-                registration = config.getboolean(identifier, "Registration", fallback=True)
+                registration = config.get_registration(identifier)
                 cut_corners, offsets = cut_chamber.main(
                     channel=paths,
                     cutout_class=config.get(identifier, "CutImgClass"),
                     corners=corners,
                     offsets=offsets,
                     registration=registration,
+                    storage=options["storage"],
+                    codec=options["cut_codec"],
+                    workers=options["workers"],
+                    registration_mode=options["registration_mode"],
+                    cache_shifts=options["cache_shifts"],
                 )
 
                 # save the corners if necessary
@@ -260,6 +326,9 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                         segmentation_class=segmentation_class,
                         just_select=True,
                         img_threshold=config.getfloat(identifier, "ImgThreshold"),
+                        storage=options["storage"],
+                        **options["seg_tiling"],
+                        **options["inference"],
                     )
 
                     # save to config
@@ -293,6 +362,8 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
         ]
         # current path of the identifier
         current_path = base_path.joinpath(identifier)
+        # the options of the stages
+        options = config.get_identifier_options(identifier)
 
         # stuff we do for the segmentation
         if run_segmentation:
@@ -316,30 +387,40 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                 # check to skip
                 checker.check()
 
-                logger.info(f"Splitting all frames for {identifier}")
+                # in the fused mode the frames are split while cutting
+                if options["fuse_split_cut"]:
+                    logger.info(f"Frames of {identifier} are split while cutting")
+                else:
+                    logger.info(f"Splitting all frames for {identifier}")
 
-                # split the frames for all channels
-                file_ext = config.get("General", "FileType")
-                for channel in config.getlist(identifier, "Channels"):
-                    paths = list(current_path.joinpath(channel).glob(f"*.{file_ext}"))
-                    if len(paths) > 1:
-                        raise FileExistsError(
-                            f"More than one file of the type '.{file_ext}' "
-                            f"exists for channel {channel}"
+                    # split the frames for all channels
+                    file_ext = config.get("General", "FileType")
+                    for channel in config.getlist(identifier, "Channels"):
+                        paths, selection = channel_source(
+                            config, identifier, channel, current_path.joinpath(channel)
+                        )
+                        if len(paths) > 1:
+                            raise FileExistsError(
+                                f"More than one file of the type '.{file_ext}' "
+                                f"exists for channel {channel}"
+                            )
+
+                        # get all the frames and split
+                        frames = np.arange(
+                            config.getint(identifier, "StartFrame"),
+                            config.getint(identifier, "EndFrame"),
+                        )
+                        split_frames.main(
+                            path=paths[0],
+                            save_dir=current_path.joinpath(channel, raw_im_folder),
+                            frames=frames,
+                            deconv=config.get(identifier, "Deconvolution"),
+                            loglevel=main_args.loglevel,
+                            storage=options["storage"],
+                            codec=options["raw_codec"],
+                            workers=options["workers"],
+                            **selection,
                         )
-
-                    # get all the frames and split
-                    frames = np.arange(
-                        config.getint(identifier, "StartFrame"),
-                        config.getint(identifier, "EndFrame"),
-                    )
-                    split_frames.main(
-                        path=paths[0],
-                        save_dir=current_path.joinpath(channel, raw_im_folder),
-                        frames=frames,
-                        deconv=config.get(identifier, "Deconvolution"),
-                        loglevel=main_args.loglevel,
-                    )
 
             # cut chamber and images
             with CheckpointManager(
@@ -361,6 +442,27 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                     for channel in config.getlist(identifier, "Channels")
                 ]
 
+                # in the fused mode the frames are read from the original files
+                sources = None
+                if options["fuse_split_cut"]:
+                    file_ext = config.get("General", "FileType")
+                    frames = np.arange(
+                        config.getint(identifier, "StartFrame"),
+                        config.getint(identifier, "EndFrame"),
+                    )
+                    sources = []
+                    for channel in config.getlist(identifier, "Channels"):
+                        src_files, selection = channel_source(
+                            config, identifier, channel, current_path.joinpath(channel)
+                        )
+                        source = split_frames.get_frame_source(
+                            path=src_files[0],
+                            frames=frames,
+                            deconv=config.get(identifier, "Deconvolution"),
+                            **selection,
+                        )
+                        sources.append(source)
+
                 # Get the corners and cut
                 corners = tuple(
                     [int(corner) for corner in config.getlist(identifier, "Corners")]
@@ -368,13 +470,19 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                 offsets = list(
                     [int(offset) for offset in config.getlist(identifier, "Offsets")]
                 )
-                registration = config.getboolean(identifier, "Registration", fallback=True)
+                registration = config.get_registration(identifier)
                 _ = cut_chamber.main(
                     channel=paths,
                     cutout_class=config.get(identifier, "CutImgClass"),
                     corners=corners,
                     offsets=offsets,
                     registration=registration,
+                    storage=options["storage"],
+                    codec=options["cut_codec"],
+                    workers=options["workers"],
+                    registration_mode=options["registration_mode"],
+                    cache_shifts=options["cache_shifts"],
+                    sources=sources,
                 )
 
             # run full segmentation (we checkpoint after each channel)
@@ -424,6 +532,13 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                                 identifier, "SegmentationClass"
                             ),
                             img_threshold=config.getfloat(identifier, "ImgThreshold"),
+                            storage=options["storage"],
+                            codec=options["seg_codec"],
+                            batch_size=options["seg_batch_size"],
+                            prefetch=options["seg_prefetch"],
+                            workers=options["workers"],
+                            **options["seg_tiling"],
+                            **options["inference"],
                         )
                         # analyse the images
                         segment_analysis.main(
@@ -434,6 +549,7 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                                 channel, f"chamber_{chamber}"
                             ),
                             loglevel=main_args.loglevel,
+                            storage=options["storage"],
                         )
 
         if run_tracking:
@@ -464,6 +580,8 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                             path=current_path.joinpath(channel, f"chamber_{chamber}"),
                             tracking_class=config.get(identifier, "TrackingClass"),
                             loglevel=main_args.loglevel,
+                            storage=options["storage"],
+                            **options["inference"],
                         )
 
                 with CheckpointManager(
@@ -528,18 +646,16 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                 # check to skip
                 checker.check()
 
-                # remove everything that the user does not want to keep
-                if not config.getboolean(identifier, "KeepCopyOriginal"):
-                    # get a list of files to remove
-                    file_ext = config.get("General", "FileType")
-                    if file_ext == "ome.tif":
-                        files = base_path.joinpath(identifier, channel).glob(
-                            f"*{identifier}*/**/*.ome.tif"
-                        )
-                    else:
-                        files = base_path.joinpath(identifier, channel).glob(
-                            f"*{identifier}*.{file_ext}"
-                        )
+                # remove everything that the user does not want to keep (referenced originals are kept)
+                if (
+                    not config.getboolean(identifier, "KeepCopyOriginal")
+                    and options["copy_strategy"] != "reference"
+                ):
+                    # get a list of files to remove, the copies have the names of the originals
+                    files = [
+                        current_path.joinpath(channel, fname.name)
+                        for fname in manifest.files(identifier, channel=channel)
+                    ]
 
                     # remove the files
                     for file in files:
@@ -550,39 +666,34 @@ def run_mother_machine(config, checkpoint, main_args, logger, restart=False, con
                 )
                 for chamber in range(len(offsets)):
                     if not config.getboolean(identifier, "KeepRawImages"):
-                        shutil.rmtree(
+                        remove_frame_store(
                             current_path.joinpath(
                                 channel, f"chamber_{chamber}", raw_im_folder
-                            ),
-                            ignore_errors=True,
+                            )
                         )
                     if not config.getboolean(identifier, "KeepCutoutImages"):
-                        shutil.rmtree(
+                        remove_frame_store(
                             current_path.joinpath(
                                 channel, f"chamber_{chamber}", cut_im_folder
-                            ),
-                            ignore_errors=True,
+                            )
                         )
                     if not config.getboolean(identifier, "KeepCutoutImagesRaw"):
-                        shutil.rmtree(
+                        remove_frame_store(
                             current_path.joinpath(
                                 channel, f"chamber_{chamber}", cut_im_rawcounts_folder
-                            ),
-                            ignore_errors=True,
+                            )
                         )
                     if not config.getboolean(identifier, "KeepSegImagesLabel"):
-                        shutil.rmtree(
+                        remove_frame_store(
                             current_path.joinpath(
                                 channel, f"chamber_{chamber}", seg_im_folder
-                            ),
-                            ignore_errors=True,
+                            )
                         )
                     if not config.getboolean(identifier, "KeepSegImagesBin"):
-                        shutil.rmtree(
+                        remove_frame_store(
                             current_path.joinpath(
                                 channel, f"chamber_{chamber}", seg_im_bin_folder
-                            ),
-                            ignore_errors=True,
+                            )
                         )
                     if not config.getboolean(identifier, "KeepSegImagesTrack"):
                         files = current_path.joinpath(
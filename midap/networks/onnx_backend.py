@@ -0,0 +1,184 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Tuple, Union
+
+import numpy as np
+
+from ..utils import get_logger
+
+# the available inference backends of the networks
+INFERENCE_BACKENDS = ["tensorflow", "onnx"]
+
+# the directory of the exported graphs next to the weights
+ONNX_CACHE_DIR = "onnx"
+
+# the opset of the exported graphs, changing it invalidates all cached graphs
+ONNX_OPSET = 13
+
+# get the logger we readout the variable or set it to max output
+if "__VERBOSE" in os.environ:
+    loglevel = int(os.environ["__VERBOSE"])
+else:
+    loglevel = 7
+logger = get_logger(__file__, loglevel)
+
+
+def require_onnx():
+    """
+    Checks that the optional packages of the ONNX backend are installed
+    :raises: ImportError if onnxruntime or tf2onnx are missing
+    """
+
+    try:
+        import onnxruntime  # noqa: F401
+        import tf2onnx  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "The ONNX backend requires the onnxruntime and tf2onnx packages, install them with "
+            "'pip install onnxruntime tf2onnx'"
+        )
+
+
+def onnx_path(
+    weights: Union[str, bytes, os.PathLike],
+    input_size: Tuple[int, ...],
+    cache_dir: Union[str, bytes, os.PathLike, None] = None,
+) -> Path:
+    """
+    Returns the path of the exported graph of a network. The name contains a hash of the weights file (path, size and
+    modification time), the input size and the opset, such that changed weights are exported again.
+    :param weights: The path to the weights of the network
+    :param input_size: The input size of the network without the batch dimension
+    :param cache_dir: The directory of the graphs, defaults to the directory "onnx" next to the weights
+    :return: The path of the graph
+    """
+
+    weights = Path(weights).resolve()
+    stat = weights.stat()
+    content = (
+        f"{weights} {stat.st_size} {stat.st_mtime_ns} {tuple(input_size)} {ONNX_OPSET}"
+    )
+    digest = hashlib.sha1(content.encode()).hexdigest()[:12]
+    shape = "x".join(str(s) for s in input_size)
+
+    if cache_dir is None:
+        cache_dir = weights.parent.joinpath(ONNX_CACHE_DIR)
+    return Path(cache_dir).joinpath(f"{weights.stem}_{shape}_{digest}.onnx")
+
+
+def export_onnx(
+    model: Any, path: Union[str, bytes, os.PathLike], input_size: Tuple[int, ...]
+):
+    """
+    Exports a Keras model with loaded weights to ONNX, an existing graph is replaced atomically
+    :param model: The Keras model
+    :param path: The path of the graph
+    :param input_size: The input size of the model without the batch dimension
+    """
+
+    require_onnx()
+    import tensorflow as tf
+    import tf2onnx
+
+    # the model is traced as function, this works for functional and subclassed models
+    spec = [tf.TensorSpec((None,) + tuple(input_size), tf.float32, name="input")]
+    function = tf.function(lambda x: model(x, training=False), input_signature=spec)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tf2onnx.convert.from_function(
+        function, input_signature=spec, opset=ONNX_OPSET, output_path=str(tmp_path)
+    )
+    os.replace(tmp_path, path)
+
+
+class OnnxModel:
+    """
+    An exported network that is run with onnxruntime on the CPU. It implements the predict method of the Keras
+    models, such that it can replace them in the segmentation and tracking classes.
+    """
+
+    def __init__(self, path: Union[str, bytes, os.PathLike], threads=0):
+        """
+        Inits the model
+        :param path: The path to the exported graph
+        :param threads: The number of intra-op threads of onnxruntime, 0 uses all physical cores
+        """
+
+        require_onnx()
+        import onnxruntime as ort
+
+        self.path = Path(path)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(self.path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def count_params(self) -> int:
+        """
+        Estimates the number of parameters from the size of the graph, used by the model cache
+        :return: The number of float32 values of the graph
+        """
+        return self.path.stat().st_size // 4
+
+    def predict(self, x: np.ndarray, batch_size=32, verbose=0, **kwargs) -> np.ndarray:
+        """
+        Predicts a batch of inputs
+        :param x: The inputs with shape (batch, ...) matching the input size of the graph
+        :param batch_size: The number of inputs that are run at once
+        :param verbose: Ignored, for compatibility with Keras
+        :param kwargs: Ignored, for compatibility with Keras
+        :return: The predictions
+        """
+
+        x = np.asarray(x, dtype=np.float32)
+        preds = [
+            self.session.run(None, {self.input_name: x[start : start + batch_size]})[0]
+            for start in range(0, len(x), batch_size)
+        ]
+        return np.concatenate(preds)
+
+
+def load_onnx_model(
+    factory: Callable[[], Any],
+    weights: Union[str, bytes, os.PathLike],
+    input_size: Tuple[int, ...],
+    threads=0,
+    cache_dir: Union[str, bytes, os.PathLike, None] = None,
+) -> OnnxModel:
+    """
+    Returns the ONNX version of a network, it is exported once and then read from the cache next to the weights
+    :param factory: A function without arguments that creates the Keras model with loaded weights
+    :param weights: The path to the weights of the network
+    :param input_size: The input size of the network without the batch dimension
+    :param threads: The number of intra-op threads of onnxruntime, 0 uses all physical cores
+    :param cache_dir: The directory of the graphs, defaults to the directory "onnx" next to the weights
+    :return: The OnnxModel
+    """
+
+    require_onnx()
+    path = onnx_path(weights, input_size, cache_dir)
+    if not path.exists():
+        logger.info(
+            f"Exporting {Path(weights).name} with input size {input_size} to ONNX..."
+        )
+        model = factory()
+        try:
+            export_onnx(model, path, input_size)
+        except OSError as e:
+            # read-only weights are exported to the tmp directory
+            logger.warning(
+                f"Could not save the ONNX graph ({e.strerror}), using the tmp directory..."
+            )
+            tmp_dir = Path(tempfile.gettempdir()).joinpath("midap_onnx")
+            path = onnx_path(weights, input_size, tmp_dir)
+            if not path.exists():
+                export_onnx(model, path, input_size)
+
+    return OnnxModel(path, threads=threads)
@@ -1,15 +1,22 @@
 import os
+import queue
 import re
+import threading
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
-from typing import Union
+from typing import List, Union
 
 import numpy as np
-import skimage.io as io
 from skimage.measure import label, regionprops
 from skimage.segmentation import clear_border
 from tqdm import tqdm
 
+from ..data.async_writer import AsyncWriter
+from ..data.frame_store import get_frame_store
+from .model_cache import model_cache, model_key
 from ..utils import get_logger
 
 # get the logger we readout the variable or set it to max output
@@ -36,6 +43,11 @@ class SegmentationPredictor(ABC):
         connectivity=1,
         model_weights: Union[str, bytes, os.PathLike, None] = None,
         img_threshold=1.0,
+        storage="files",
+        codec="default",
+        batch_size=16,
+        prefetch=2,
+        workers=1,
     ):
         """
         Initializes the SegmentationPredictor instance
@@ -47,6 +59,11 @@ class SegmentationPredictor(ABC):
         :param model_weights: Weights of the models to use, can be used to set the segmentation method
         :param img_threshold: Threshold for the images, all values brighter than this will be capped, defaults to 1.0,
                               which means no thresholding
+        :param storage: The frame storage backend of the cutouts and segmentations, see midap.data.frame_store
+        :param codec: The codec used to write the segmentations, see midap.data.frame_store.parse_codec
+        :param batch_size: The number of images that are segmented at once by run_image_stack
+        :param prefetch: The number of batches that are read ahead while the current batch is segmented
+        :param workers: The number of threads that postprocess the segmentations
         """
 
         # set the params
@@ -55,6 +72,11 @@ class SegmentationPredictor(ABC):
         self.div = div
         self.connectivity = connectivity
         self.threshold = img_threshold
+        self.storage = storage
+        self.codec = codec
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.workers = workers
 
         # This variable is used in case custom methods do not want the images padded (default)
         self.require_padding = False
@@ -76,61 +98,143 @@ class SegmentationPredictor(ABC):
 
     def run_image_stack(self, channel_path: Union[str, bytes, os.PathLike], clean_border: bool):
         """
-        Performs image segmentation, postprocessing and storage for all images found in channel_path
+        Performs image segmentation, postprocessing and storage for all images found in channel_path. The images are
+        streamed, a reader thread prefetches batches of images, the batches are segmented and a pool of threads
+        postprocesses and writes the segmentations, such that only a few batches are in memory at any time.
         :param channel_path: Directory of the channel used for the analysis
+        :param clean_border: Whether to remove the cells that touch the border
         """
         path_cut = os.path.join(channel_path, "cut_im")
         path_seg = os.path.join(channel_path, "seg_im")
         path_seg_bin = os.path.join(channel_path, "seg_im_bin")
 
         # get all the images to segment
-        path_imgs = np.sort(os.listdir(path_cut))
+        cut_store = get_frame_store(path_cut, backend=self.storage)
+        path_imgs = cut_store.names
 
         # set the segmentation method if necessary
         if self.segmentation_method is None:
             self.set_segmentation_method(path_cut)
 
-        # We read in all the images
-        self.logger.info("Reading in images...")
-        imgs = []
-        for p in tqdm(path_imgs):
-            imgs.append(io.imread(os.path.join(path_cut, p)))
+        self.logger.info("Segmenting, postprocessing and storage...")
+        self.num_cells = []
+        seg_store = get_frame_store(
+            path_seg, backend=self.storage, ext=".tif", codec=self.codec
+        )
+        seg_bin_store = get_frame_store(
+            path_seg_bin, backend=self.storage, ext=".png", codec=self.codec
+        )
+        # the segmentations are written in the background while the next one is postprocessed
+        writer = AsyncWriter()
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        with cut_store, seg_store, seg_bin_store, writer, pool:
+            pending = deque()
+            num_batches = int(np.ceil(len(path_imgs) / self.batch_size))
+            # the reader is stopped before the stores are closed, also if the segmentation fails
+            with closing(self.read_batches(cut_store, path_imgs)) as batches:
+                for names, imgs in tqdm(batches, total=num_batches):
+                    segs = self.segmentation_method(imgs)
+                    for seg, p in zip(segs, names):
+                        pending.append(
+                            pool.submit(
+                                self.store_segmentation,
+                                seg,
+                                p,
+                                clean_border,
+                                writer,
+                                seg_store,
+                                seg_bin_store,
+                            )
+                        )
 
-        # segement all images
-        self.logger.info("Segmenting images...")
-        segs = self.segmentation_method(imgs)
+                    # the previous batch is postprocessed while the next one is segmented
+                    while len(pending) > self.batch_size:
+                        self.num_cells.append(pending.popleft().result())
+            while len(pending) > 0:
+                self.num_cells.append(pending.popleft().result())
 
-        self.logger.info("Postprocessing and storage...")
-        self.num_cells = []
-        for seg, p in zip(segs, path_imgs):
-            # postprocessing
-            if self.postprocessing:
-                seg = self.postprocess_seg(seg)
-
-            # remove borders from the segmentation
-            if clean_border:
-                seg = clear_border(seg)
-
-            # label in case no post processing or border removal
-            seg = label(seg, connectivity=self.connectivity)
-
-            self.num_cells.append(len(np.unique(seg)) - 1)
-
-            # save individual image
-            os.makedirs(path_seg, exist_ok=True)
-            label_fname = re.sub("(_cut.tif|_cut.png|.tif)", "_seg.tif", p)
-            io.imsave(
-                os.path.join(path_seg, label_fname),
-                seg.astype(np.uint16),
-                check_contrast=False,
-            )
-            seg_fname = re.sub("(_cut.tif|_cut.png|.tif)", "_seg_bin.png", p)
-            os.makedirs(path_seg_bin, exist_ok=True)
-            io.imsave(
-                os.path.join(path_seg_bin, seg_fname),
-                255 * (seg > 0).astype(np.uint8),
-                check_contrast=False,
-            )
+    def read_batches(self, store, names: List[str]):
+        """
+        Reads batches of images in a background thread, at most prefetch batches are read ahead
+        :param store: The frame store of the images
+        :param names: The names of the images
+        :returns: A generator yielding tuples (names, images) with at most batch_size images
+        """
+
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def put(item):
+            # the reader gives up if the generator is closed
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read():
+            try:
+                for start in range(0, len(names), self.batch_size):
+                    batch = names[start : start + self.batch_size]
+                    if not put((batch, [store.read(name) for name in batch])):
+                        return
+                put(None)
+            except Exception as e:
+                # errors are raised in the consumer
+                put(e)
+
+        reader = threading.Thread(target=read, name="midap_reader", daemon=True)
+        reader.start()
+        try:
+            while (item := batches.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            reader.join()
+
+    def store_segmentation(
+        self,
+        seg: np.ndarray,
+        name: str,
+        clean_border: bool,
+        writer: AsyncWriter,
+        seg_store,
+        seg_bin_store,
+    ):
+        """
+        Postprocesses, labels and writes the segmentation of a single image
+        :param seg: The segmentation
+        :param name: The name of the cutout
+        :param clean_border: Whether to remove the cells that touch the border
+        :param writer: The AsyncWriter used for the writes
+        :param seg_store: The frame store of the labeled segmentations
+        :param seg_bin_store: The frame store of the binary segmentations
+        :returns: The number of cells in the segmentation
+        """
+
+        # postprocessing
+        if self.postprocessing:
+            seg = self.postprocess_seg(seg)
+
+        # remove borders from the segmentation
+        if clean_border:
+            seg = clear_border(seg)
+
+        # label in case no post processing or border removal
+        seg = label(seg, connectivity=self.connectivity)
+
+        # save individual image
+        name = re.sub("_cut$", "", name)
+        writer.write(seg_store, f"{name}_seg", seg.astype(np.uint16))
+        writer.write(
+            seg_bin_store, f"{name}_seg_bin", 255 * (seg > 0).astype(np.uint8)
+        )
+
+        return len(np.unique(seg)) - 1
 
     def postprocess_seg(self, seg: np.ndarray):
         """
@@ -166,6 +270,37 @@ class SegmentationPredictor(ABC):
         img = np.clip(img, img.min(), self.threshold * img.max())
         return (img - img.min()) / (img.max() - img.min())
 
+    def read_selection_image(self, path_to_cutouts: Union[str, bytes, os.PathLike]):
+        """
+        Reads the image that is used for the selection of the model weights, i.e. the image that is roughly in the
+        middle of the stack
+        :param path_to_cutouts: The directory in which all the cutout images are
+        :returns: The selected image as array
+        """
+
+        with get_frame_store(path_to_cutouts, backend=self.storage) as store:
+            list_files = store.names
+            # take the middle image (but round up, if there are only 2 we want the second)
+            if len(list_files) == 1:
+                ix_half = 0
+            else:
+                ix_half = int(np.ceil(len(list_files) / 2))
+
+            return store.read(list_files[ix_half])
+
+    def cached_model(self, factory, weights, input_shape=None, device=None):
+        """
+        Returns a model from the process-wide model cache, such that every model is only loaded once per process
+        :param factory: A function without arguments that creates the model if it is not cached
+        :param weights: The path to the weights or the name of a pretrained model
+        :param input_shape: The input shape if the model is built for a fixed shape
+        :param device: The device of the model, e.g. "cpu" or "gpu"
+        :returns: The model
+        """
+
+        key = model_key(type(self).__name__, weights, input_shape, device)
+        return model_cache.get(key, factory)
+
     def _iter_model_weights(self):
         """
         Returns an iterator over the model weights directory. If the directory does not exist
@@ -4,7 +4,6 @@ from pathlib import Path
 
 import matplotlib.pyplot as plt
 import numpy as np
-import skimage.io as io
 import torch
 
 from cellpose import models
@@ -37,6 +36,30 @@ class CellposeSAMSegmentation(SegmentationPredictor):
             self.gpu_available = torch.cuda.is_available()
             self.use_bfloat16 = True
 
+    def load_model(self, model_weights):
+        """
+        Returns the Cellpose model of a weights file or a built-in model name from the model cache
+        :param model_weights: The path to the weights or the name of the built-in model
+        :return: The Cellpose model
+        """
+
+        if Path(str(model_weights)).is_file():
+            pretrained_model = str(model_weights)
+        else:
+            pretrained_model = model_weights
+        device = "gpu" if self.gpu_available else "cpu"
+        if self.use_bfloat16:
+            device += "-bfloat16"
+
+        return self.cached_model(
+            lambda: models.CellposeModel(
+                gpu=self.gpu_available, pretrained_model=pretrained_model,
+                use_bfloat16=self.use_bfloat16,
+            ),
+            model_weights,
+            device=device,
+        )
+
     def set_segmentation_method(self, path_to_cutouts):
         """
         Performs the weight selection for the segmentation network. Sets
@@ -48,19 +71,8 @@ class CellposeSAMSegmentation(SegmentationPredictor):
         if self.model_weights is None:
             self.logger.info("Selecting weights...")
 
-            # get the image that is roughly in the middle of the stack
-            list_files = np.sort(os.listdir(path_to_cutouts))
-            if len(list_files) == 1:
-                ix_half = 0
-            else:
-                ix_half = int(np.ceil(len(list_files) / 2))
-
-            path_img = list_files[ix_half]
-
-            # scale the image for display
-            img = self.scale_pixel_vals(
-                io.imread(os.path.join(path_to_cutouts, path_img))
-            )
+            # get the image that is roughly in the middle of the stack and scale it
+            img = self.scale_pixel_vals(self.read_selection_image(path_to_cutouts))
 
             # built-in cpsam model plus any custom models from path_model_weights
             label_dict = {"cpsam": "cpsam"}
@@ -76,15 +88,9 @@ class CellposeSAMSegmentation(SegmentationPredictor):
             for model_name, model_path in label_dict.items():
                 self.logger.info("Try model: " + str(model_name))
                 if Path(str(model_path)).is_file():
-                    model = models.CellposeModel(
-                        gpu=self.gpu_available, pretrained_model=str(model_path),
-                        use_bfloat16=self.use_bfloat16,
-                    )
+                    model = self.load_model(model_path)
                 else:
-                    model = models.CellposeModel(
-                        gpu=self.gpu_available, pretrained_model=model_name,
-                        use_bfloat16=self.use_bfloat16,
-                    )
+                    model = self.load_model(model_name)
 
                 try:
                     mask, _, _ = model.eval(
@@ -127,16 +133,7 @@ class CellposeSAMSegmentation(SegmentationPredictor):
             self.model_weights = label_dict[marked]
 
         # load the selected model
-        if Path(str(self.model_weights)).is_file():
-            model = models.CellposeModel(
-                gpu=self.gpu_available, pretrained_model=str(self.model_weights),
-                use_bfloat16=self.use_bfloat16,
-            )
-        else:
-            model = models.CellposeModel(
-                gpu=self.gpu_available, pretrained_model=self.model_weights,
-                use_bfloat16=self.use_bfloat16,
-            )
+        model = self.load_model(self.model_weights)
 
         def seg_method(imgs):
             # scale all images before passing to the model
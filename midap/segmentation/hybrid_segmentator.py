@@ -4,7 +4,6 @@ from typing import Collection, List, Union
 import numpy as np
 
 from .unet_segmentator import UNetSegmentation
-from ..networks.unets import UNetv1
 
 
 class HybridSegmentation(UNetSegmentation):
@@ -49,10 +48,8 @@ class HybridSegmentation(UNetSegmentation):
         watershed_seg_pad = self.segment_region_based(img_pad, 0.16, 0.19)
         segs = [watershed_seg]
         for m in model_weights:
-            model_pred = UNetv1(input_size=img_pad.shape[1:3] + (2,), inference=True)
-            model_pred.load_weights(m)
-            y_pred = model_pred.predict(
-                np.concatenate([img_pad, watershed_seg_pad], axis=-1)
+            y_pred = self.predict_unet(
+                m, np.concatenate([img_pad, watershed_seg_pad], axis=-1)
             )
             seg = (self.undo_padding(y_pred) > 0.5).astype(int)
             segs.append(seg)
@@ -79,10 +76,8 @@ class HybridSegmentation(UNetSegmentation):
         imgs_pad = np.concatenate([self.scale_pixel_vals(img) for img in imgs_pad])
 
         # segments
-        model_pred = UNetv1(input_size=imgs_pad.shape[1:3] + (2,), inference=True)
-        model_pred.load_weights(self.model_weights)
-        y_preds = model_pred.predict(
-            np.concatenate([imgs_pad, imgs_seg], axis=-1), batch_size=1, verbose=1
+        y_preds = self.predict_unet(
+            self.model_weights, np.concatenate([imgs_pad, imgs_seg], axis=-1), verbose=1
         )
 
         # remove tha padding and transform to segmentation
@@ -0,0 +1,133 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Tuple, Union
+
+
+def model_nbytes(model: Any) -> int:
+    """
+    Estimates the memory of the weights of a model
+    :param model: A Keras model, a StarDist model or a Cellpose model
+    :return: The size of the weights in bytes, 0 if unknown
+    """
+
+    # StarDist wraps the Keras model
+    model = getattr(model, "keras_model", model)
+    if hasattr(model, "count_params"):
+        try:
+            return 4 * int(model.count_params())
+        except ValueError:
+            # models that are not built yet
+            return 0
+
+    # Cellpose models hold a torch network
+    net = getattr(model, "net", None)
+    if net is not None and hasattr(net, "parameters"):
+        return sum(p.numel() * p.element_size() for p in net.parameters())
+
+    return 0
+
+
+def model_key(
+    segmentation_class: str,
+    weights: Union[str, bytes, os.PathLike],
+    input_shape: Optional[Tuple[int, ...]] = None,
+    device: Optional[str] = None,
+) -> Tuple[Hashable, ...]:
+    """
+    Creates the key of a model in the cache
+    :param segmentation_class: The name of the segmentation class that uses the model
+    :param weights: The path to the weights or the name of a pretrained model
+    :param input_shape: The input shape if the model is built for a fixed shape
+    :param device: The device of the model, e.g. "cpu" or "gpu"
+    :return: The key as tuple
+    """
+
+    # paths are resolved such that relative and absolute paths share the model
+    weights = str(weights)
+    if os.path.exists(weights):
+        weights = str(Path(weights).resolve())
+    return (
+        segmentation_class,
+        weights,
+        None if input_shape is None else tuple(input_shape),
+        device,
+    )
+
+
+class ModelCache:
+    """
+    A process-wide cache of the segmentation models. The models are kept in LRU order and the least recently used
+    models are evicted if there are more than max_models models or their weights need more than max_bytes.
+    """
+
+    def __init__(self, max_models=8, max_bytes: Optional[int] = 2**32):
+        """
+        Inits the cache
+        :param max_models: The maximum number of cached models
+        :param max_bytes: The maximum memory of the weights of all cached models, None for no limit
+        """
+
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._models)
+
+    def __contains__(self, key: Tuple[Hashable, ...]):
+        return key in self._models
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory of the weights of all cached models
+        """
+        return sum(size for _, size in self._models.values())
+
+    def get(self, key: Tuple[Hashable, ...], factory: Callable[[], Any]) -> Any:
+        """
+        Returns a cached model, it is created with the factory if it is not cached
+        :param key: The key of the model, see model_key
+        :param factory: A function without arguments that creates the model
+        :return: The model
+        """
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+
+            model = factory()
+            self._models[key] = (model, model_nbytes(model))
+            self.evict(keep=key)
+            return model
+
+    def evict(self, keep: Optional[Tuple[Hashable, ...]] = None):
+        """
+        Removes the least recently used models until the cache is within its limits
+        :param keep: A key that is never evicted, e.g. the model that was just added
+        """
+
+        with self._lock:
+            for key in list(self._models):
+                too_many = len(self._models) > self.max_models
+                too_large = self.max_bytes is not None and self.nbytes > self.max_bytes
+                if not (too_many or too_large):
+                    break
+                if key != keep:
+                    del self._models[key]
+
+    def clear(self):
+        """
+        Removes all models from the cache
+        """
+
+        with self._lock:
+            self._models.clear()
+
+
+# the cache of the process, shared by all segmentation classes
+model_cache = ModelCache()
@@ -3,7 +3,6 @@ from pathlib import Path
 
 import matplotlib.pyplot as plt
 import numpy as np
-import skimage.io as io
 from cellpose_omni import models
 
 import torch
@@ -35,6 +34,25 @@ class OmniSegmentation(SegmentationPredictor):
         else:
             self.gpu_available = torch.cuda.is_available()
 
+    def load_model(self, model_weights):
+        """
+        Returns the Cellpose model of a weights file or a built-in model type from the model cache
+        :param model_weights: The path to the weights or the built-in model type
+        :return: The Cellpose model
+        """
+
+        if Path(model_weights).is_file():
+            factory = lambda: models.CellposeModel(
+                gpu=self.gpu_available, pretrained_model=str(model_weights)
+            )
+        else:
+            factory = lambda: models.CellposeModel(
+                gpu=self.gpu_available, model_type=model_weights
+            )
+        device = "gpu" if self.gpu_available else "cpu"
+
+        return self.cached_model(factory, model_weights, device=device)
+
     def set_segmentation_method(self, path_to_cutouts):
         """
         Performs the weight selection for the segmentation network. A custom method should use this function to set
@@ -46,20 +64,8 @@ class OmniSegmentation(SegmentationPredictor):
         if self.model_weights is None:
             self.logger.info("Selecting weights...")
 
-            # get the image that is roughly in the middle of the stack
-            list_files = np.sort(os.listdir(path_to_cutouts))
-            # take the middle image (but round up, if there are only 2 we want the second)
-            if len(list_files) == 1:
-                ix_half = 0
-            else:
-                ix_half = int(np.ceil(len(list_files) / 2))
-
-            path_img = list_files[ix_half]
-
-            # scale the image and pad
-            img = self.scale_pixel_vals(
-                io.imread(os.path.join(path_to_cutouts, path_img))
-            )
+            # get the image that is roughly in the middle of the stack and scale it
+            img = self.scale_pixel_vals(self.read_selection_image(path_to_cutouts))
 
             # display different segmentation models
             label_dict = {
@@ -75,13 +81,9 @@ class OmniSegmentation(SegmentationPredictor):
             for model_name, model_path in label_dict.items():
                 self.logger.info("Try model: " + str(model_name))
                 if Path(model_path).is_file():
-                    model = models.CellposeModel(
-                        gpu=self.gpu_available, pretrained_model=str(model_path)
-                    )
+                    model = self.load_model(model_path)
                 else:
-                    model = models.CellposeModel(
-                        gpu=self.gpu_available, model_type=model_name
-                    )
+                    model = self.load_model(model_name)
                 # predict, we only need the mask, see omnipose tutorial for the rest of the args
                 try:
                     mask, _, _ = model.eval(
@@ -128,14 +130,7 @@ class OmniSegmentation(SegmentationPredictor):
             self.model_weights = label_dict[marked]
 
         # helper function for the seg method
-        if Path(self.model_weights).is_file():
-            model = models.CellposeModel(
-                gpu=self.gpu_available, pretrained_model=str(self.model_weights)
-            )
-        else:
-            model = models.CellposeModel(
-                gpu=self.gpu_available, model_type=self.model_weights
-            )
+        model = self.load_model(self.model_weights)
 
         def seg_method(imgs):
             # scale all the images
@@ -1,10 +1,10 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Collection, Union, List
+from typing import Collection, Optional, Tuple, Union, List
 
 import matplotlib.pyplot as plt
 import numpy as np
-import skimage.io as io
 from stardist.models import StarDist2D
 from csbdeep.utils import normalize
 
@@ -19,10 +19,12 @@ class StarDistSegmentation(SegmentationPredictor):
 
     supported_setups = ["Family_Machine", "Mother_Machine"]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, n_tiles: Optional[Tuple[int, int]] = None, **kwargs):
         """
-        Initializes the UNetSegmentation using the base class init
+        Initializes the UNetSegmentation using the base class init, the workers of the base class also run the
+        non-maximum suppression, which overlaps with the prediction of the next images
         :*args: Arguments used for the base class init
+        :param n_tiles: The number of tiles per axis used for the prediction of an image, defaults to no tiling
         :**kwargs: Keyword arguments used for the basecalss init
         """
 
@@ -30,6 +32,10 @@ class StarDistSegmentation(SegmentationPredictor):
         super().__init__(*args, **kwargs)
 
         self.labels = ["2D_versatile_fluo", "2D_paper_dsb2018"]
+        self.n_tiles = n_tiles
+
+        # the model is loaded once for all images
+        self.model = None
 
     def _segs_for_selection(
         self, model_weights: List[Union[str, bytes, os.PathLike]], img: np.ndarray
@@ -43,14 +49,14 @@ class StarDistSegmentation(SegmentationPredictor):
 
         segs_labels = []
         for l in self.labels:
-            model = StarDist2D.from_pretrained(l)
+            model = self.cached_model(lambda: StarDist2D.from_pretrained(l), l)
             mask, _ = model.predict_instances(normalize(img))
             seg = (mask > 0.5).astype(int)
             segs_labels.append(seg)
 
         segs_weights = []
         for m in model_weights:
-            model = StarDist2D(None, name=str(m))
+            model = self.cached_model(lambda: StarDist2D(None, name=str(m)), m)
             mask, _ = model.predict_instances(normalize(img))
             seg = (mask > 0.5).astype(int)
             segs_weights.append(seg)
@@ -60,6 +66,73 @@ class StarDistSegmentation(SegmentationPredictor):
         labels_all += [mw.stem.replace("model_weights_", "") for mw in model_weights]
         return segs_all, labels_all
 
+    def load_model(self):
+        """
+        Loads the model of the selected weights, it is only loaded once per process, see the model cache
+        :return: The StarDist2D model
+        """
+
+        if self.model is None:
+            if self.model_weights in self.labels:
+                self.model = self.cached_model(
+                    lambda: StarDist2D.from_pretrained(self.model_weights),
+                    self.model_weights,
+                )
+            else:
+                self.model = self.cached_model(
+                    lambda: StarDist2D(None, name=str(self.model_weights)),
+                    self.model_weights,
+                )
+        return self.model
+
+    def predict_stack(self, imgs: Collection[np.ndarray], scale: bool):
+        """
+        Predicts the instances of all images with the loaded model. The non-maximum suppression of an image runs in a
+        pool of threads while the next images are predicted, the result is the same as with predict_instances.
+        :param imgs: Images to segment
+        :param scale: Whether the pixel values are scaled and thresholded before the normalization
+        :return: The segmented images
+        """
+
+        model = self.load_model()
+
+        # the split of predict_instances is not public, other StarDist versions predict the images one by one
+        if not hasattr(model, "_instances_from_prediction"):
+            self.logger.warning(
+                "This StarDist version does not support the pipelined prediction..."
+            )
+            return np.stack(
+                [
+                    model.predict_instances(
+                        normalize(self.scale_pixel_vals(img) if scale else img),
+                        n_tiles=self.n_tiles,
+                        show_tile_progress=False,
+                    )[0]
+                    for img in imgs
+                ],
+                axis=0,
+            )
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = []
+            for img in imgs:
+                if scale:
+                    img = self.scale_pixel_vals(img)
+                img = normalize(img)
+                prob, dist, points = model.predict_sparse(
+                    img, n_tiles=self.n_tiles, show_tile_progress=False
+                )
+                futures.append(
+                    pool.submit(
+                        model._instances_from_prediction,
+                        img.shape,
+                        prob,
+                        dist,
+                        points=points,
+                    )
+                )
+            return np.stack([future.result()[0] for future in futures], axis=0)
+
     def set_segmentation_method(self, path_to_cutouts: Union[str, bytes, os.PathLike]):
         """
         Performs the weight selection for the segmentation network. A custom method should use this function to set
@@ -71,20 +144,8 @@ class StarDistSegmentation(SegmentationPredictor):
         if self.model_weights is None:
             self.logger.info("Selecting weights...")
 
-            # get the image that is roughly in the middle of the stack
-            list_files = np.sort(os.listdir(path_to_cutouts))
-            # take the middle image (but round up, if there are only 2 we want the second)
-            if len(list_files) == 1:
-                ix_half = 0
-            else:
-                ix_half = int(np.ceil(len(list_files) / 2))
-
-            path_img = list_files[ix_half]
-
-            # scale the image and pad
-            img = self.scale_pixel_vals(
-                io.imread(os.path.join(path_to_cutouts, path_img))
-            )
+            # get the image that is roughly in the middle of the stack and scale it
+            img = self.scale_pixel_vals(self.read_selection_image(path_to_cutouts))
             self.logger.info(f"The shape of the image is: {img.shape}")
 
             # get all trained models
@@ -130,13 +191,7 @@ class StarDistSegmentation(SegmentationPredictor):
             :param imgs: Images to segment
             :return: The segmented images
             """
-            masks = []
-            for img in imgs:
-                img = self.scale_pixel_vals(img)
-                model = StarDist2D.from_pretrained(self.model_weights)
-                mask, _ = model.predict_instances(normalize(img))
-                masks.append(mask)
-            return np.stack(masks, axis=0)
+            return self.predict_stack(imgs, scale=True)
 
         def seg_method_dir(imgs: Collection[np.ndarray]):
             """
@@ -144,15 +199,10 @@ class StarDistSegmentation(SegmentationPredictor):
             :param imgs: Images to segment
             :return: The segmented images
             """
-            masks = []
-            for img in imgs:
-                model = StarDist2D(None, name=str(self.model_weights))
-                mask, _ = model.predict_instances(normalize(img))
-                masks.append(mask)
-
-            return np.stack(masks, axis=0)
+            return self.predict_stack(imgs, scale=False)
 
-        # set the segmentations method
+        # set the segmentations method, the model is loaded with the first images
+        self.model = None
         if self.model_weights in self.labels:
             self.segmentation_method = seg_method_name
         else:
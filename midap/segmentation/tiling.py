@@ -0,0 +1,92 @@
+from typing import Callable, List
+
+import numpy as np
+
+# the available blendings of overlapping tiles
+TILE_BLENDINGS = ["cosine", "linear"]
+
+
+def tile_starts(size: int, tile_size: int, overlap: int) -> List[int]:
+    """
+    Calculates the start positions of the tiles along an axis, the last tile is aligned with the end of the axis
+    :param size: The size of the axis, at least tile_size
+    :param tile_size: The size of the tiles
+    :param overlap: The minimal overlap of neighbouring tiles
+    :return: A list of start positions
+    """
+
+    stride = tile_size - overlap
+    starts = list(range(0, size - tile_size, stride))
+    return starts + [size - tile_size]
+
+
+def blending_window(tile_size: int, overlap: int, blending="cosine") -> np.ndarray:
+    """
+    Creates the weights of a tile, the weights ramp up over the overlap at the borders and are 1 in between
+    :param tile_size: The size of the (square) tile
+    :param overlap: The overlap of the tiles, at most half of the tile size
+    :param blending: The shape of the ramp, one of TILE_BLENDINGS
+    :return: The weights as array with shape (tile_size, tile_size)
+    """
+
+    if blending not in TILE_BLENDINGS:
+        raise ValueError(f"Unknown blending '{blending}', choose from {TILE_BLENDINGS}")
+
+    # the ramps never reach 0, such that the borders of the image, covered by one tile only, keep their values
+    ramp = (np.arange(overlap) + 0.5) / max(overlap, 1)
+    if blending == "cosine":
+        ramp = 0.5 - 0.5 * np.cos(np.pi * ramp)
+    weights = np.ones(tile_size)
+    weights[:overlap] = ramp
+    weights[tile_size - overlap :] = ramp[::-1]
+
+    return np.outer(weights, weights)
+
+
+def predict_tiled(
+    predict: Callable[[np.ndarray], np.ndarray],
+    img: np.ndarray,
+    tile_size: int,
+    overlap: int,
+    blending="cosine",
+) -> np.ndarray:
+    """
+    Predicts an image of arbitrary size with a model of a fixed input size. The image is split into overlapping
+    tiles and the predictions of the tiles are blended with the weights of blending_window.
+    :param predict: A function that maps a batch of tiles (n, tile_size, tile_size, channels) to the predictions
+                    (n, tile_size, tile_size, 1)
+    :param img: The image as array with shape (height, width, channels)
+    :param tile_size: The size of the tiles
+    :param overlap: The minimal overlap of the tiles, at most half of the tile size
+    :param blending: The blending of the overlapping tiles, one of TILE_BLENDINGS
+    :return: The prediction of the image with shape (height, width)
+    """
+
+    if not 0 <= 2 * overlap <= tile_size:
+        raise ValueError(
+            f"The overlap has to be between 0 and half of the tile size, is: {overlap}"
+        )
+
+    # images smaller than a tile are mirrored to the size of a tile
+    height, width = img.shape[:2]
+    pad = [[0, max(tile_size - height, 0)], [0, max(tile_size - width, 0)], [0, 0]]
+    img = np.pad(img, pad, mode="reflect") if np.any(pad) else img
+
+    # the tiles of the image
+    corners = [
+        (y, x)
+        for y in tile_starts(img.shape[0], tile_size, overlap)
+        for x in tile_starts(img.shape[1], tile_size, overlap)
+    ]
+    tiles = np.stack([img[y : y + tile_size, x : x + tile_size] for y, x in corners])
+    preds = predict(tiles)
+
+    # weighted average of the overlapping predictions
+    weights = blending_window(tile_size, overlap, blending)
+    pred_sum = np.zeros(img.shape[:2])
+    weight_sum = np.zeros(img.shape[:2])
+    for (y, x), pred in zip(corners, preds):
+        pred_sum[y : y + tile_size, x : x + tile_size] += weights * pred[..., 0]
+        weight_sum[y : y + tile_size, x : x + tile_size] += weights
+
+    return (pred_sum / weight_sum)[:height, :width]
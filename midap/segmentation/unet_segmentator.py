@@ -1,15 +1,16 @@
 import os
 from pathlib import Path
-from typing import Collection, Union, List
+from typing import Collection, Union, List, Optional
 
 import matplotlib.pyplot as plt
 import numpy as np
-import skimage.io as io
 from skimage.filters import sobel
 from skimage.segmentation import watershed
 from tqdm import tqdm
 
 from .base_segmentator import SegmentationPredictor
+from .tiling import TILE_BLENDINGS, predict_tiled
+from ..networks.onnx_backend import INFERENCE_BACKENDS, load_onnx_model
 from ..networks.unets import UNetv1
 from ..utils import GUI_selector
 
@@ -21,16 +22,52 @@ class UNetSegmentation(SegmentationPredictor):
 
     supported_setups = ["Family_Machine", "Mother_Machine"]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        tile_size: Optional[int] = None,
+        tile_overlap=64,
+        tile_blending="cosine",
+        backend="tensorflow",
+        onnx_threads=0,
+        **kwargs,
+    ):
         """
         Initializes the UNetSegmentation using the base class init
         :*args: Arguments used for the base class init
+        :param tile_size: If set, the images are predicted in overlapping tiles of this size with one UNet for all
+                          image sizes, must be divisible by div. Defaults to predicting the full images.
+        :param tile_overlap: The minimal overlap of the tiles in pixels, at most half of the tile size
+        :param tile_blending: The blending of the overlapping tiles, one of midap.segmentation.tiling.TILE_BLENDINGS
+        :param backend: The inference backend of the UNet, "tensorflow" or "onnx" (onnxruntime on the CPU, the
+                        exported graphs are cached next to the weights)
+        :param onnx_threads: The number of intra-op threads of onnxruntime, 0 uses all physical cores
         :**kwargs: Keyword arguments used for the basecalss init
         """
 
         # base class init
         super().__init__(*args, **kwargs)
 
+        if tile_size is not None:
+            if tile_size <= 0 or tile_size % self.div != 0:
+                raise ValueError(
+                    f"The tile size has to be a positive multiple of {self.div}, is: {tile_size}"
+                )
+            if not 0 <= 2 * tile_overlap <= tile_size:
+                raise ValueError(
+                    f"The tile overlap has to be between 0 and half of the tile size, is: {tile_overlap}"
+                )
+        if tile_blending not in TILE_BLENDINGS:
+            raise ValueError(f"The tile blending has to be in {TILE_BLENDINGS}")
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_blending = tile_blending
+
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"The backend has to be in {INFERENCE_BACKENDS}")
+        self.backend = backend
+        self.onnx_threads = onnx_threads
+
     def set_segmentation_method(self, path_to_cutouts: Union[str, bytes, os.PathLike]):
         """
         Performs the weight selection for the segmentation network. A custom method should use this function to set
@@ -43,20 +80,8 @@ class UNetSegmentation(SegmentationPredictor):
         if self.model_weights is None:
             self.logger.info("Selecting weights...")
 
-            # get the image that is roughly in the middle of the stack
-            list_files = np.sort(os.listdir(path_to_cutouts))
-            # take the middle image (but round up, if there are only 2 we want the second)
-            if len(list_files) == 1:
-                ix_half = 0
-            else:
-                ix_half = int(np.ceil(len(list_files) / 2))
-
-            path_img = list_files[ix_half]
-
-            # scale the image and pad
-            img = self.scale_pixel_vals(
-                io.imread(os.path.join(path_to_cutouts, path_img))
-            )
+            # get the image that is roughly in the middle of the stack and scale it
+            img = self.scale_pixel_vals(self.read_selection_image(path_to_cutouts))
 
             # Get all the labels
             labels = ["watershed"]
@@ -119,14 +144,70 @@ class UNetSegmentation(SegmentationPredictor):
         watershed_seg = self.segment_region_based(img, 0.16, 0.19)
         segs = [watershed_seg]
         for m in model_weights:
-            model_pred = UNetv1(input_size=img_pad.shape[1:3] + (1,), inference=True)
-            model_pred.load_weights(m)
-            y_pred = model_pred.predict(img_pad)
+            y_pred = self.predict_unet(m, img_pad)
             seg = (self.undo_padding(y_pred) > 0.5).astype(int)
             segs.append(seg)
 
         return segs
 
+    def load_unet(
+        self, model_weights: Union[str, bytes, os.PathLike], input_size: tuple
+    ):
+        """
+        Returns the UNet with the given weights from the model cache, it is only built (and exported for the ONNX
+        backend) once per input size
+        :param model_weights: The path to the weights
+        :param input_size: The input size of the UNet (height, width, channels)
+        :return: The UNet
+        """
+
+        def build():
+            model = UNetv1(input_size=input_size, inference=True)
+            model.load_weights(model_weights)
+            return model
+
+        if self.backend == "onnx":
+            return self.cached_model(
+                lambda: load_onnx_model(
+                    build, model_weights, input_size, threads=self.onnx_threads
+                ),
+                model_weights,
+                input_shape=input_size,
+                device=f"onnx-{self.onnx_threads}",
+            )
+        return self.cached_model(build, model_weights, input_shape=input_size)
+
+    def predict_unet(
+        self, model_weights: Union[str, bytes, os.PathLike], imgs: np.ndarray, verbose=0
+    ):
+        """
+        Predicts a batch of padded images with the UNet, either in full or in tiles if a tile size is set
+        :param model_weights: The path to the weights
+        :param imgs: The images as array with shape (batch, height, width, channels)
+        :param verbose: The verbosity of the prediction of the full images
+        :return: The predictions as array with shape (batch, height, width, 1)
+        """
+
+        if self.tile_size is None:
+            model_pred = self.load_unet(model_weights, imgs.shape[1:])
+            return model_pred.predict(imgs, batch_size=1, verbose=verbose)
+
+        # one UNet of the tile size for all images
+        model_pred = self.load_unet(
+            model_weights, (self.tile_size, self.tile_size, imgs.shape[-1])
+        )
+        preds = [
+            predict_tiled(
+                lambda tiles: model_pred.predict(tiles, batch_size=1, verbose=0),
+                img,
+                self.tile_size,
+                self.tile_overlap,
+                self.tile_blending,
+            )
+            for img in tqdm(imgs, disable=not verbose)
+        ]
+        return np.stack(preds)[..., None]
+
     def _set_segmentation_method(self):
         """
         Sets the segmentation method according to the model_weights of the class
@@ -153,9 +234,7 @@ class UNetSegmentation(SegmentationPredictor):
         imgs_pad = np.concatenate(imgs_pad)
 
         # segments
-        model_pred = UNetv1(input_size=imgs_pad.shape[1:3] + (1,), inference=True)
-        model_pred.load_weights(self.model_weights)
-        y_preds = model_pred.predict(imgs_pad, batch_size=1, verbose=1)
+        y_preds = self.predict_unet(self.model_weights, imgs_pad, verbose=1)
 
         # remove tha padding and transform to segmentation
         segs = []
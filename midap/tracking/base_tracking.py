@@ -6,13 +6,13 @@ from typing import List, Union, Tuple, Optional
 
 import numpy as np
 import psutil
-import skimage.io as io
 from scipy.spatial import distance_matrix
 from skimage.measure import label, regionprops
 from skimage.transform import resize
 from tqdm import tqdm
 
 from .delta_lineage import DeltaTypeLineages
+from ..data.frame_store import FrameStore, read_frame
 from ..utils import get_logger
 
 process = psutil.Process(os.getpid())
@@ -35,8 +35,8 @@ class Tracking(ABC):
 
     def __init__(
         self,
-        imgs: List[Union[str, bytes, os.PathLike]],
-        segs: List[Union[str, bytes, os.PathLike]],
+        imgs: Union[FrameStore, List[Union[str, bytes, os.PathLike]]],
+        segs: Union[FrameStore, List[Union[str, bytes, os.PathLike]]],
         model_weights: Optional[Union[str, bytes, os.PathLike]],
         input_size: Optional[Tuple[int, int, int]] = None,
         target_size: Optional[Tuple[int, int]] = None,
@@ -44,8 +44,8 @@ class Tracking(ABC):
     ):
         """
         Initializes the class instance
-        :param imgs: List of files containing the cut out images ordered chronological in time
-        :param segs: List of files containing the segmentation ordered in the same way as imgs
+        :param imgs: List of files containing the cut out images ordered chronological in time or a FrameStore
+        :param segs: List of files containing the segmentation ordered in the same way as imgs or a FrameStore
         :param model_weights: Path to the tracking model weights
         :param input_size: A tuple of ints indicating the shape of the input for the networks,
                            this will be increased if necessary
@@ -75,28 +75,28 @@ class Tracking(ABC):
                 the previous segmentation
         """
 
-        img = io.imread(self.imgs[cur_frame])
+        img = read_frame(self.imgs, cur_frame)
         if self.target_size is None:
             target_size = img.shape
         else:
             target_size = self.target_size
         img_cur_frame = resize(img, target_size, order=1)
         img_prev_frame = resize(
-            io.imread(self.imgs[cur_frame - 1]), target_size, order=1
+            read_frame(self.imgs, cur_frame - 1), target_size, order=1
         )
         if label:
             seg_cur_frame = resize(
-                io.imread(self.segs[cur_frame]), target_size, order=0
+                read_frame(self.segs, cur_frame), target_size, order=0
             )
             seg_prev_frame = resize(
-                io.imread(self.segs[cur_frame - 1]), target_size, order=0
+                read_frame(self.segs, cur_frame - 1), target_size, order=0
             )
         else:
             seg_cur_frame = resize(
-                io.imread(self.segs[cur_frame]) > 0, target_size, order=0
+                read_frame(self.segs, cur_frame) > 0, target_size, order=0
             )
             seg_prev_frame = resize(
-                io.imread(self.segs[cur_frame - 1]) > 0, target_size, order=0
+                read_frame(self.segs, cur_frame - 1) > 0, target_size, order=0
             )
 
         return img_cur_frame, img_prev_frame, seg_cur_frame, seg_prev_frame
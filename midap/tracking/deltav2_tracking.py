@@ -1,4 +1,5 @@
 from ..networks.deltav2 import unet_track
+from ..networks.onnx_backend import INFERENCE_BACKENDS, load_onnx_model
 from .base_tracking import DeltaTypeTracking
 
 
@@ -7,19 +8,35 @@ class DeltaV2Tracking(DeltaTypeTracking):
     A class for cell tracking using the U-Net Delta V2 model
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, backend="tensorflow", onnx_threads=0, **kwargs):
         """
         Initializes the DeltaV2Tracking using the base class init
         :param args: Arguments used for the base class init
+        :param backend: The inference backend of the network, "tensorflow" or "onnx" (onnxruntime on the CPU, the
+                        exported graphs are cached next to the weights)
+        :param onnx_threads: The number of intra-op threads of onnxruntime, 0 uses all physical cores
         :param kwargs: Keyword arguments used for the baseclass init
         """
 
         # base class init
         super().__init__(*args, **kwargs)
 
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"The backend has to be in {INFERENCE_BACKENDS}")
+        self.backend = backend
+        self.onnx_threads = onnx_threads
+
     def load_model(self):
         """
         Loads model for inference/tracking.
         """
 
-        self.model = unet_track(self.model_weights, self.input_size)
+        if self.backend == "onnx":
+            self.model = load_onnx_model(
+                lambda: unet_track(self.model_weights, self.input_size),
+                self.model_weights,
+                self.input_size,
+                threads=self.onnx_threads,
+            )
+        else:
+            self.model = unet_track(self.model_weights, self.input_size)
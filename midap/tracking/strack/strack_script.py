@@ -10,11 +10,11 @@ import pandas as pd
 
 # scipy package to compute distance between matrices of cell centroid coordinates
 from scipy.spatial.distance import cdist
-from skimage import io
 
 # skimage package to identify objects, export region properties
 from skimage.measure import regionprops
 
+from midap.data.frame_store import FrameStore, read_frame
 from midap.utils import get_logger
 
 
@@ -24,7 +24,7 @@ from midap.utils import get_logger
 
 
 def run_strack(
-    files_list: List[Union[str, bytes, os.PathLike]],
+    files_list: Union[FrameStore, List[Union[str, bytes, os.PathLike]]],
     output_dir: Union[str, bytes, os.PathLike],
     max_dist: float,
     max_angle: float,
@@ -32,7 +32,7 @@ def run_strack(
 ):
     """
     Run the STrack algorithm
-    :param files_list: List of files to process, sorted and tif format
+    :param files_list: List of files to process, sorted and tif format, or a FrameStore with the segmentations
     :param output_dir: The output directory
     :param max_dist: The maximum distance between two cells to be considered as the same cell
     :param max_angle: The maximum angle between two cells to be considered as the same cell
@@ -47,9 +47,9 @@ def run_strack(
 
     for tp in range(1, len(files_list)):
         # Import image corresponding to timepoint tp and tp-1
-        logger.info(f"Processing file {files_list[tp]}")
-        img1 = io.imread(files_list[tp])
-        img0 = io.imread(files_list[tp - 1])
+        logger.info(f"Processing frame {tp} of {len(files_list) - 1}")
+        img1 = read_frame(files_list, tp)
+        img0 = read_frame(files_list, tp - 1)
 
         # See how many cells were identified in the images (ranged in the "unique" vectors)
         unique1, counts1 = np.unique(img1, return_counts=True)
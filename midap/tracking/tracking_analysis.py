@@ -1,4 +1,3 @@
-import glob
 import h5py
 import numpy as np
 import os
@@ -6,20 +5,23 @@ import pandas as pd
 from pathlib import Path
 from typing import Tuple, Union, List
 from skimage.measure import regionprops_table
-from skimage import io
+
+from ..data.frame_store import get_frame_store
 
 
 class FluoChangeAnalysis:
-    def __init__(self, path, channels, tracking_class) -> None:
+    def __init__(self, path, channels, tracking_class, storage="files") -> None:
         """
         Inits params.
         :param path: Path to output folder.
         :param channels: List with channels.
         :param tracking_class: Name of used tracking class.
+        :param storage: Frame storage backend of the image stacks.
         """
         self.path = path
         self.channels = channels
         self.tracking_class = tracking_class
+        self.storage = storage
 
     def gen_pathnames(self):
         """
@@ -72,9 +74,9 @@ class FluoChangeAnalysis:
         :param path: Path to folder containing images.
         :param ext: File extension of images.
         """
-        file_names = np.sort(glob.glob(str(path) + "/*." + ext))
-        img_array = np.array([io.imread(f) for f in file_names])
-        return img_array
+        # the store detects the codec of the images
+        with get_frame_store(path, backend=self.storage, ext=f".{ext}") as store:
+            return np.array(list(store))
 
     def gen_column_names(self):
         """
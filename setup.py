@@ -59,7 +59,7 @@ def get_requirements():
         "psutil>=5.9.8,<6",
         "pytest>=8.4.0,<9",
         "scikit-image>=0.25.0,<1",
-        "stardist>=0.9.0,<1",
+        "stardist>=0.9.0,<0.10",
         "tensorflow>=2.18.0,<2.19",
         "tf-keras>=2.18.0,<2.19",
         "tqdm>=4.67.0,<5",
@@ -5,6 +5,9 @@ from shutil import copyfile
 from pathlib import Path
 
 from midap.apps.cut_chamber import main
+from midap.apps import split_frames
+from midap.apps.split_frames import get_frame_source
+import tifffile as tiff
 from skimage import io
 
 
@@ -71,3 +74,86 @@ def test_main(prep_dirs):
         sol = io.imread(sol_f)
         cut = io.imread(cut_f)
         assert np.allclose(sol, cut)
+
+
+def test_main_fused(prep_dirs):
+    """
+    Tests the main routine of the cut_chamber app with frames that are split from the original stack on the fly
+    :param prep_dirs: Directory of the prepared channel containing the raw_im and cut_im directories
+    """
+
+    # unpack
+    channel_dir, sol_path = prep_dirs
+
+    # the raw images are the frames 2, 5 and 6 of the example stack
+    stack = Path(__file__).parent.joinpath("data", "example_stack.tiff")
+    source = get_frame_source(path=stack, frames=[2, 5, 6], deconv="no_deconv")
+    for f in channel_dir.joinpath("raw_im").glob("*.png"):
+        f.unlink()
+
+    # run the main
+    main(
+        channel=channel_dir.joinpath("raw_im"),
+        cutout_class="InteractiveCutout",
+        corners=(7, 102, 68, 155),
+        sources=[source],
+    )
+
+    # compare with the solution
+    cut_imgs = sorted(channel_dir.joinpath("cut_im").glob("*.png"))
+    sol_imgs = sorted(sol_path.glob("*.png"))
+    assert len(cut_imgs) == len(sol_imgs)
+    for sol_f, cut_f in zip(sol_imgs, cut_imgs):
+        assert np.allclose(io.imread(sol_f), io.imread(cut_f))
+
+
+def test_main_fused_channels(tmp_path):
+    """
+    Tests that the fused mode cuts every channel like the split frames, the way the main scripts call it
+    :param tmp_path: A fixture that sets up a tmp directory
+    """
+
+    # two channels, the second one is the inverted stack
+    stack = tiff.imread(Path(__file__).parent.joinpath("data", "example_stack.tiff"))
+    stacks = {"PH": tmp_path.joinpath("PH.tif"), "GFP": tmp_path.joinpath("GFP.tif")}
+    tiff.imwrite(stacks["PH"], stack)
+    tiff.imwrite(stacks["GFP"], stack.max() - stack)
+    frames = [2, 5, 6]
+
+    # split frames and fused mode
+    for mode in ["split", "fused"]:
+        sources = [] if mode == "fused" else None
+        for channel, path in stacks.items():
+            raw_dir = tmp_path.joinpath(mode, channel, "raw_im")
+            raw_dir.mkdir(parents=True)
+            tmp_path.joinpath(mode, channel, "cut_im").mkdir()
+            tmp_path.joinpath(mode, channel, "cut_im_rawcounts").mkdir()
+            if mode == "fused":
+                source = get_frame_source(path=path, frames=frames, deconv="no_deconv")
+                sources.append(source)
+            else:
+                split_frames.main(
+                    path=path, save_dir=raw_dir, frames=frames, deconv="no_deconv"
+                )
+        main(
+            channel=[tmp_path.joinpath(mode, channel, "raw_im") for channel in stacks],
+            cutout_class="InteractiveCutout",
+            corners=(7, 102, 68, 155),
+            sources=sources,
+        )
+
+    # every channel is cut and matches the split frames
+    for channel in stacks:
+        split_imgs = sorted(tmp_path.joinpath("split", channel, "cut_im").glob("*"))
+        fused_imgs = sorted(tmp_path.joinpath("fused", channel, "cut_im").glob("*"))
+        assert len(split_imgs) == len(frames)
+        assert [f.name for f in fused_imgs] == [f.name for f in split_imgs]
+        for split_f, fused_f in zip(split_imgs, fused_imgs):
+            assert np.array_equal(io.imread(split_f), io.imread(fused_f))
+
+    # the channels are not mixed up
+    ph, gfp = [
+        sorted(tmp_path.joinpath("fused", channel, "cut_im").glob("*"))[0]
+        for channel in stacks
+    ]
+    assert not np.array_equal(io.imread(ph), io.imread(gfp))
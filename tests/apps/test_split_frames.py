@@ -5,6 +5,7 @@ import skimage.io as io
 from pytest import mark
 
 from midap.apps.split_frames import main
+from midap.data.frame_store import get_frame_store
 
 
 @mark.usefixtures("setup_dir")
@@ -33,3 +34,46 @@ def test_main(setup_dir):
         new_img = io.imread(new_fname)
 
         assert np.allclose(true_img, new_img)
+
+
+@mark.usefixtures("setup_dir")
+@mark.parametrize("storage", ["files", "hdf5"])
+def test_main_workers(setup_dir, storage):
+    """
+    Tests that splitting the frames with a process pool gives the same result as the serial split
+    :param setup_dir: The path to the temp directory containing the setup and the channel
+    :param storage: The frame storage backend to test
+    """
+
+    # unpack
+    tmpdir_name, channel = setup_dir
+
+    # split serial and parallel
+    path = Path(__file__).parent.joinpath("data", "example_stack.tiff")
+    serial_dir = Path(tmpdir_name).joinpath(channel, "raw_im_serial")
+    parallel_dir = Path(tmpdir_name).joinpath(channel, "raw_im_parallel")
+    frames = np.arange(10)
+    main(
+        path=path,
+        save_dir=serial_dir,
+        frames=frames,
+        deconv="no_deconv",
+        storage=storage,
+    )
+    main(
+        path=path,
+        save_dir=parallel_dir,
+        frames=frames,
+        deconv="no_deconv",
+        storage=storage,
+        workers=3,
+    )
+
+    # check
+    serial = get_frame_store(serial_dir, backend=storage)
+    parallel = get_frame_store(parallel_dir, backend=storage)
+    assert serial.names == parallel.names
+    for serial_img, parallel_img in zip(serial, parallel):
+        assert np.all(serial_img == parallel_img)
+    serial.close()
+    parallel.close()
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from pytest import mark
+
+from midap.data import async_writer
+from midap.data.async_writer import AsyncWriter
+from midap.data.frame_store import get_frame_store
+
+# Tests
+#######
+
+
+@mark.usefixtures("tmpdir")
+@mark.parametrize("backend", ["files", "hdf5"])
+def test_write(tmpdir, backend):
+    """
+    Tests that all frames submitted to the writer end up in the store
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param backend: The storage backend to write to
+    """
+
+    store = get_frame_store(tmpdir.joinpath("cut_im"), backend=backend)
+    writer = AsyncWriter(max_workers=3, max_pending=2)
+    with store, writer:
+        for i in range(10):
+            writer.write(store, f"frame{i:03d}", np.full((8, 6), i, dtype=np.uint8))
+
+    with get_frame_store(tmpdir.joinpath("cut_im"), backend=backend) as store:
+        assert store.names == [f"frame{i:03d}" for i in range(10)]
+        for i, frame in enumerate(store):
+            assert np.all(frame == i)
+
+
+def test_backpressure():
+    """
+    Tests that submitting blocks if too many writes are in flight
+    """
+
+    release = threading.Event()
+    writer = AsyncWriter(max_workers=1, max_pending=2)
+    writer.submit(release.wait)
+    writer.submit(release.wait)
+
+    # the third submit has to wait for a free slot
+    thread = threading.Thread(target=writer.submit, args=(lambda: None,))
+    thread.start()
+    thread.join(timeout=0.2)
+    assert thread.is_alive()
+
+    release.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    writer.close()
+
+
+def test_errors():
+    """
+    Tests that errors of the writes are raised at the end of the stage
+    """
+
+    def fail():
+        raise OSError("disk full")
+
+    writer = AsyncWriter(max_workers=2)
+    writer.submit(fail)
+    with pytest.raises(OSError):
+        writer.flush()
+
+    # errors are also raised by the context manager
+    with pytest.raises(OSError):
+        with AsyncWriter() as writer:
+            writer.submit(fail)
+
+
+def test_producers(monkeypatch):
+    """
+    Tests that a writer can be shared by several threads
+    :param monkeypatch: The monkeypatch fixture from pytest
+    """
+
+    # count the created pools, the slow creation provokes races between the producers
+    executors = []
+
+    class Executor(async_writer.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            executors.append(self)
+            time.sleep(0.01)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(async_writer, "ThreadPoolExecutor", Executor)
+
+    def write(i):
+        time.sleep(0.001)
+        written.append(i)
+
+    for _ in range(5):
+        executors.clear()
+        written = []
+        writer = AsyncWriter(max_workers=3, max_pending=4)
+        barrier = threading.Barrier(4)
+
+        def produce(start):
+            barrier.wait()
+            for i in range(start, start + 25):
+                writer.submit(write, i)
+
+        threads = [threading.Thread(target=produce, args=(25 * i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # one pool is shared and the flush waits for all writes
+        writer.flush()
+        assert len(executors) == 1
+        assert sorted(written) == list(range(100))
+        writer.close()
+
+    # a failed write is raised exactly once, by a later submit or by the close
+    def fail():
+        raise OSError("disk full")
+
+    errors = []
+
+    def submit(fn, *args):
+        try:
+            writer.submit(fn, *args)
+        except OSError as e:
+            errors.append(e)
+
+    writer = AsyncWriter(max_workers=2)
+    threads = [threading.Thread(target=submit, args=(fail,))] + [
+        threading.Thread(target=submit, args=(write, i)) for i in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        writer.close()
+    except OSError as e:
+        errors.append(e)
+    assert len(errors) == 1
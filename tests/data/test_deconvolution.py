@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from pytest import mark
+from skimage.restoration import richardson_lucy
+
+from midap.data.deconvolution import RichardsonLucy
+
+
+# Fixtures
+##########
+
+
+@pytest.fixture()
+def frames():
+    """
+    Creates a batch of random frames
+    :return: The frames as uint16 array
+    """
+
+    rng = np.random.default_rng(11)
+    return rng.integers(0, 4000, size=(3, 40, 31), dtype=np.uint16)
+
+
+# Tests
+#######
+
+
+@mark.parametrize("psf_shape", [(5, 5), (4, 7)])
+@mark.parametrize("dtype", [np.uint16, np.float32])
+def test_richardson_lucy(frames, psf_shape, dtype):
+    """
+    Tests the batched deconvolution against the skimage implementation
+    :param frames: A batch of random frames
+    :param psf_shape: The shape of the PSF, even shapes test the centering of the convolutions
+    :param dtype: The type of the frames
+    """
+
+    # random PSF
+    rng = np.random.default_rng(12)
+    psf = rng.random(psf_shape)
+    psf /= psf.sum()
+
+    frames = frames.astype(dtype)
+    deconvolution = RichardsonLucy(psf, num_iter=10, clip=False)
+    deconvolved = deconvolution(frames)
+    assert deconvolved.shape == frames.shape
+    assert deconvolved.dtype == (np.float32 if dtype == np.float32 else np.float64)
+
+    # compare with skimage
+    rtol = 1e-4 if dtype == np.float32 else 1e-8
+    for frame, deconvolved_frame in zip(frames, deconvolved):
+        true_frame = richardson_lucy(frame, psf, num_iter=10, clip=False)
+        assert np.allclose(deconvolved_frame, true_frame, rtol=rtol)
+
+    # single frames give the same result and the transfer functions are reused
+    assert np.allclose(deconvolution(frames[1]), deconvolved[1])
+    assert len(deconvolution._otf_cache) == 1
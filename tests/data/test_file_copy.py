@@ -0,0 +1,55 @@
+import os
+
+import pytest
+from pytest import mark
+
+from midap.data.file_copy import channel_files, copy_file
+
+
+# Tests
+#######
+
+
+@mark.usefixtures("tmpdir")
+@mark.parametrize("strategy", ["copy", "hardlink", "reflink", "reference"])
+def test_copy_file(tmpdir, strategy):
+    """
+    Tests all copy strategies, unsupported links fall back to a copy
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param strategy: The copy strategy to test
+    """
+
+    src = tmpdir.joinpath("pos1_GFP.tif")
+    src.write_bytes(b"frames")
+    channel_path = tmpdir.joinpath("pos1", "GFP")
+    channel_path.mkdir(parents=True)
+
+    path = copy_file(src, channel_path.joinpath(src.name), strategy=strategy)
+    assert path.read_bytes() == b"frames"
+
+    if strategy == "reference":
+        # nothing is copied
+        assert path == src
+        assert channel_files(channel_path, "tif") == []
+        assert channel_files(channel_path, "tif", source=src) == [src]
+    else:
+        assert path == channel_path.joinpath(src.name)
+        assert channel_files(channel_path, "tif") == [path]
+
+        # only hardlinks share the inode
+        assert os.path.samefile(src, path) == (strategy == "hardlink")
+
+        # the original is unaffected by removing the copy
+        path.unlink()
+        assert src.read_bytes() == b"frames"
+
+
+@mark.usefixtures("tmpdir")
+def test_copy_file_unknown(tmpdir):
+    """
+    Tests that unknown strategies raise an error
+    :param tmpdir: A fixture that sets up a tmp directory
+    """
+
+    with pytest.raises(ValueError):
+        copy_file(tmpdir.joinpath("a.tif"), tmpdir.joinpath("b.tif"), strategy="move")
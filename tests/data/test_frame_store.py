@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+from pytest import mark
+
+from midap.data.frame_store import (
+    DirectoryFrameStore,
+    HDF5FrameStore,
+    get_frame_store,
+    parse_codec,
+    read_frame,
+    remove_frame_store,
+)
+
+# Tests
+#######
+
+
+@mark.usefixtures("tmpdir")
+@mark.parametrize("backend", ["files", "hdf5"])
+def test_roundtrip(tmpdir, backend):
+    """
+    Tests writing and reading frames with all backends
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param backend: The storage backend to test
+    """
+
+    # some frames, written in reverse order
+    frames = [np.full((8, 6), fill_value=i, dtype=np.uint8) for i in range(3)]
+    path = tmpdir.joinpath("raw_im")
+    with get_frame_store(path, backend=backend) as store:
+        assert not store.exists()
+        assert len(store) == 0
+        for i in reversed(range(3)):
+            store.write(f"pos1_frame{i:03d}", frames[i])
+        assert store.exists()
+
+    # a new store sees all frames sorted by name
+    with get_frame_store(path, backend=backend) as store:
+        assert store.names == [f"pos1_frame{i:03d}" for i in range(3)]
+        for i, frame in enumerate(store):
+            assert np.all(frame == frames[i])
+            assert np.all(store[i] == frames[i])
+            assert np.all(read_frame(store, i) == frames[i])
+
+        # overwrite a frame
+        store.write("pos1_frame001", frames[2])
+        assert len(store) == 3
+        assert np.all(store.read("pos1_frame001") == frames[2])
+
+    # remove it again
+    remove_frame_store(path)
+    assert not get_frame_store(path, backend=backend).exists()
+
+
+@mark.usefixtures("tmpdir")
+def test_directory_layout(tmpdir):
+    """
+    Tests that the directory backend writes the classic one file per frame layout
+    :param tmpdir: A fixture that sets up a tmp directory
+    """
+
+    store = get_frame_store(tmpdir.joinpath("seg_im"), ext=".tif")
+    assert isinstance(store, DirectoryFrameStore)
+    store.write("pos1_frame000_seg", np.ones((8, 6), dtype=np.uint16))
+
+    assert tmpdir.joinpath("seg_im", "pos1_frame000_seg.tif").is_file()
+    assert np.all(
+        read_frame([tmpdir.joinpath("seg_im", "pos1_frame000_seg.tif")], 0) == 1
+    )
+
+
+@mark.usefixtures("tmpdir")
+def test_hdf5_store(tmpdir):
+    """
+    Tests the HDF5 specific behaviour
+    :param tmpdir: A fixture that sets up a tmp directory
+    """
+
+    store = get_frame_store(tmpdir.joinpath("cut_im"), backend="hdf5")
+    assert isinstance(store, HDF5FrameStore)
+    store.write("frame000", np.zeros((4, 4), dtype=np.float32))
+    assert tmpdir.joinpath("cut_im.h5").is_file()
+
+    # frames need to have the same shape
+    with pytest.raises(ValueError):
+        store.write("frame001", np.zeros((5, 4), dtype=np.float32))
+
+    # unknown frames
+    with pytest.raises(KeyError):
+        store.read("frame002")
+    store.close()
+
+    # unknown backends
+    with pytest.raises(ValueError):
+        get_frame_store(tmpdir.joinpath("cut_im"), backend="unknown")
+
+
+@mark.usefixtures("tmpdir")
+@mark.parametrize(
+    "codec, ext",
+    [
+        ("default", ".tif"),
+        ("png-1", ".png"),
+        ("tif", ".tif"),
+        ("tif-zstd", ".tif"),
+        ("npy", ".npy"),
+    ],
+)
+def test_codecs(tmpdir, codec, ext):
+    """
+    Tests that frames written with a codec are read back without knowing the codec
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param codec: The codec to write the frames with
+    :param ext: The expected file extension of the codec
+    """
+
+    pytest.importorskip("imagecodecs")
+
+    frame = np.arange(48, dtype=np.uint16).reshape((8, 6))
+    store = get_frame_store(tmpdir.joinpath("seg_im"), ext=".tif", codec=codec)
+    store.write("pos1_frame000_seg", frame)
+    assert tmpdir.joinpath("seg_im", f"pos1_frame000_seg{ext}").is_file()
+
+    # the default store detects the codec
+    store = get_frame_store(tmpdir.joinpath("seg_im"))
+    assert store.names == ["pos1_frame000_seg"]
+    assert np.all(store.read("pos1_frame000_seg") == frame)
+    assert np.all(
+        read_frame([tmpdir.joinpath("seg_im", f"pos1_frame000_seg{ext}")], 0) == frame
+    )
+
+    # rewriting with another codec replaces the frame
+    store.write("pos1_frame000_seg", frame + 1)
+    assert len(list(tmpdir.joinpath("seg_im").iterdir())) == 1
+    assert np.all(get_frame_store(tmpdir.joinpath("seg_im"))[0] == frame + 1)
+
+
+def test_parse_codec():
+    """
+    Tests the parsing of the codecs
+    """
+
+    assert parse_codec("default", ext=".tif") == (".tif", {})
+    assert parse_codec("png-3") == (".png", {"compress_level": 3})
+    assert parse_codec("npy") == (".npy", {})
+
+    for codec in ["png-10", "png-x", "jpeg", "tif-lz4"]:
+        with pytest.raises(ValueError):
+            parse_codec(codec)
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+import tifffile as tiff
+
+from midap.data.manifest import MANIFEST_NAME, Manifest, get_manifest, load_manifest
+
+
+# Fixtures
+##########
+
+
+@pytest.fixture()
+def folder(tmpdir):
+    """
+    Creates an experiment folder with two positions, the files of the second position have fewer frames
+    :param tmpdir: A fixture that sets up a tmp directory
+    :return: The path to the folder
+    """
+
+    rng = np.random.default_rng(5)
+    for name, num_frames in [
+        ("exp_pos1_PH.tif", 4),
+        ("exp_pos1_GFP.tif", 4),
+        ("exp_pos2_PH.tif", 3),
+    ]:
+        stack = rng.integers(0, 2**16, size=(num_frames, 16, 12), dtype=np.uint16)
+        tiff.imwrite(tmpdir.joinpath(name), stack, photometric="minisblack")
+
+    # files that do not belong to an identifier or have another type are ignored
+    tmpdir.joinpath("notes.tif").write_bytes(b"")
+    tmpdir.joinpath("exp_pos3_PH.png").write_bytes(b"")
+
+    return tmpdir
+
+
+# Tests
+#######
+
+
+def test_scan(folder):
+    """
+    Tests that the identifiers, files and the layout of the series are indexed
+    :param folder: The experiment folder
+    """
+
+    manifest = Manifest.scan(folder, "pos", "tif")
+    assert manifest.identifiers == ["pos1", "pos2"]
+    assert manifest.files("pos1") == [
+        folder.joinpath("exp_pos1_GFP.tif"),
+        folder.joinpath("exp_pos1_PH.tif"),
+    ]
+    assert manifest.files("pos1", channel="PH") == [folder.joinpath("exp_pos1_PH.tif")]
+    assert manifest.num_frames("pos1") == 4
+    assert manifest.num_frames("pos2") == 3
+    assert manifest.num_frames("pos3") is None
+
+    (series,) = manifest.entries("pos2")[0]["series"]
+    assert series["shape"] == [3, 16, 12]
+    assert series["frame_shape"] == [16, 12]
+    assert series["dtype"] == "uint16"
+
+
+def test_get_manifest(folder):
+    """
+    Tests that the manifest is saved and rebuilt if the folder changes
+    :param folder: The experiment folder
+    """
+
+    # nothing was indexed yet
+    assert load_manifest(folder, "pos", "tif") is None
+    manifest = get_manifest(folder, "pos", "tif")
+    assert folder.joinpath(MANIFEST_NAME).exists()
+
+    # the saved manifest is used
+    loaded = load_manifest(folder, "pos", "tif")
+    assert loaded.identifiers == manifest.identifiers
+    assert loaded.entries("pos1") == manifest.entries("pos1")
+
+    # other settings or a new file invalidate the manifest
+    assert load_manifest(folder, "pos", "tiff") is None
+    stack = np.zeros((2, 16, 12), dtype=np.uint8)
+    tiff.imwrite(folder.joinpath("exp_pos4_PH.tif"), stack, photometric="minisblack")
+    assert load_manifest(folder, "pos", "tif") is None
+    manifest = get_manifest(folder, "pos", "tif")
+    assert manifest.identifiers == ["pos1", "pos2", "pos4"]
+    assert manifest.num_frames("pos4") == 2
+
+
+def test_scan_identifiers(tmpdir):
+    """
+    Tests that the identifiers are separated by an underscore from the rest of the name
+    :param tmpdir: A fixture that sets up a tmp directory
+    """
+
+    stack = np.zeros((2, 16, 12), dtype=np.uint16)
+    for name in ["exp_pos1_PH.tif", "exp_pos10_PH.tif", "exp_pos12x_PH.tif"]:
+        tiff.imwrite(tmpdir.joinpath(name), stack, photometric="minisblack")
+
+    manifest = Manifest.scan(tmpdir, "pos", "tif")
+    assert manifest.identifiers == ["pos1", "pos10"]
+    assert manifest.files("pos1") == [tmpdir.joinpath("exp_pos1_PH.tif")]
+    assert manifest.files("pos10") == [tmpdir.joinpath("exp_pos10_PH.tif")]
+    assert "exp_pos12x_PH.tif" not in manifest.listing
+
+
+def test_scan_ome(tmpdir):
+    """
+    Tests that OME-TIFF datasets are indexed per directory together with their channel names
+    :param tmpdir: A fixture that sets up a tmp directory
+    """
+
+    dataset = tmpdir.joinpath("exp_pos1_1.export", "data")
+    dataset.mkdir(parents=True)
+    stack = np.zeros((5, 2, 16, 12), dtype=np.uint16)
+    metadata = {"axes": "TCYX", "Channel": {"Name": ["PH", "GFP"]}}
+    tiff.imwrite(dataset.joinpath("pos1.ome.tif"), stack, ome=True, metadata=metadata)
+
+    manifest = Manifest.scan(tmpdir, "pos", "ome.tif")
+    assert manifest.identifiers == ["pos1"]
+    assert manifest.files("pos1") == [dataset.joinpath("pos1.ome.tif")]
+    assert manifest.num_frames("pos1") == 5
+    (series,) = manifest.entries("pos1")[0]["series"]
+    assert series["axes"] == "TCYX"
+    assert series["channels"] == ["PH", "GFP"]
@@ -0,0 +1,146 @@
+import uuid
+
+import numpy as np
+import pytest
+import tifffile as tiff
+from pytest import mark
+
+from midap.data.ome_tiff import resolve_ome_channels
+from midap.data.tiff_stack import TiffStack
+
+
+# Fixtures
+##########
+
+
+@pytest.fixture()
+def stack():
+    """
+    Creates a random stack of frames with two channels
+    :return: The stack as array with shape (T, C, Y, X)
+    """
+
+    rng = np.random.default_rng(11)
+    return rng.integers(0, 2**16, size=(3, 2, 16, 12), dtype=np.uint16)
+
+
+@pytest.fixture()
+def multi_file(tmpdir, stack):
+    """
+    Writes the stack as multi-file OME-TIFF dataset with one file per channel, only the first file contains the
+    metadata of the whole dataset
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param stack: The stack to write
+    :return: The paths of the files
+    """
+
+    paths = [tmpdir.joinpath(f"pos1_{c}.ome.tif") for c in ["PH", "GFP"]]
+    uuids = [f"urn:uuid:{uuid.uuid4()}" for _ in paths]
+    ns = "http://www.openmicroscopy.org/Schemas/OME/2016-06"
+
+    tiff_data = "".join(
+        f'<TiffData FirstC="{c}" FirstT="0" IFD="0" PlaneCount="3">'
+        f'<UUID FileName="{p.name}">{u}</UUID></TiffData>'
+        for c, (p, u) in enumerate(zip(paths, uuids))
+    )
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-8"?><OME xmlns="{ns}" UUID="{uuids[0]}">'
+        f'<Image ID="Image:0" Name="pos1"><Pixels ID="Pixels:0" DimensionOrder="XYZTC" '
+        f'Type="uint16" SizeX="12" SizeY="16" SizeZ="1" SizeC="2" SizeT="3">'
+        f'<Channel ID="Channel:0:0" Name="PH"/><Channel ID="Channel:0:1" Name="GFP"/>'
+        f"{tiff_data}</Pixels></Image></OME>"
+    )
+    binary_only = (
+        f'<?xml version="1.0" encoding="UTF-8"?><OME xmlns="{ns}" UUID="{uuids[1]}">'
+        f'<BinaryOnly MetadataFile="{paths[0].name}" UUID="{uuids[0]}"/></OME>'
+    )
+
+    for c, (path, description) in enumerate(zip(paths, [xml, binary_only])):
+        tiff.imwrite(
+            path,
+            stack[:, c],
+            description=description.encode(),
+            metadata=None,
+            photometric="minisblack",
+        )
+
+    return paths
+
+
+# Tests
+#######
+
+
+def test_resolve_multi_file(multi_file, stack):
+    """
+    Tests that the channels of a multi-file dataset are resolved from the metadata and read lazily
+    :param multi_file: The paths of the multi-file dataset
+    :param stack: The stack that was written
+    """
+
+    # the order of the files does not matter, the metadata is only in the first
+    sources = resolve_ome_channels(reversed(multi_file), ["PH", "GFP", "RFP"])
+    assert set(sources) == {"PH", "GFP"}
+    for c, channel in enumerate(["PH", "GFP"]):
+        path, series, index, num_frames = sources[channel]
+        assert path == multi_file[0]
+        assert (series, index, num_frames) == (0, c, 3)
+
+        with TiffStack(path, series=series, channel=index) as tiff_stack:
+            assert tiff_stack.shape == (3, 16, 12)
+            for frame, true_frame in zip(tiff_stack, stack[:, c]):
+                assert np.all(frame == true_frame)
+
+
+@mark.usefixtures("tmpdir")
+def test_resolve_single_file(tmpdir, stack):
+    """
+    Tests single files with multiple or one channel
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param stack: The stack to write
+    """
+
+    # all channels in one file
+    path = tmpdir.joinpath("pos1.ome.tif")
+    metadata = {"axes": "TCYX", "Channel": {"Name": ["PH", "GFP"]}}
+    tiff.imwrite(path, stack, ome=True, metadata=metadata)
+    sources = resolve_ome_channels([path], ["GFP"])
+    assert sources["GFP"][1:] == (0, 1, 3)
+    with TiffStack(path, channel=1) as tiff_stack:
+        assert np.all(tiff_stack[2] == stack[2, 1])
+
+    # one channel per file is matched by file name
+    path = tmpdir.joinpath("pos2_PH.ome.tif")
+    tiff.imwrite(path, stack[:, 0], ome=True, metadata={"axes": "TYX"})
+    assert resolve_ome_channels([path], ["PH"])["PH"][1:] == (0, None, 3)
+
+    # channels may not be ambiguous
+    with pytest.raises(FileExistsError):
+        resolve_ome_channels([tmpdir.joinpath("pos1.ome.tif"), path], ["PH"])
+
+
+@mark.usefixtures("tmpdir")
+def test_resolve_multi_position(tmpdir, stack):
+    """
+    Tests that the images of a position are selected from metadata with several positions
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param stack: The stack to write
+    """
+
+    # two positions in one file, as written e.g. by Micro-Manager
+    path = tmpdir.joinpath("exp_pos1_1.ome.tif")
+    with tiff.TiffWriter(path, ome=True) as tif:
+        for name, data in [("Pos01", stack), ("Pos02", stack[:2])]:
+            metadata = {"axes": "TCYX", "Channel": {"Name": ["PH", "GFP"]}}
+            tif.write(data, metadata={**metadata, "Name": name})
+
+    for identifier, series, num_frames in [("pos1", 0, 3), ("pos2", 1, 2)]:
+        sources = resolve_ome_channels([path], ["PH", "GFP"], identifier)
+        assert sources["PH"][1:] == (series, 0, num_frames)
+        assert sources["GFP"][1:] == (series, 1, num_frames)
+        with TiffStack(path, series=series, channel=1) as tiff_stack:
+            assert np.all(tiff_stack[1] == stack[1, 1])
+
+    # without identifier the channels are ambiguous
+    with pytest.raises(FileExistsError):
+        resolve_ome_channels([path], ["PH"])
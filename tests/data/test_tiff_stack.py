@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import tifffile as tiff
+from pytest import mark
+
+from midap.data.reduce_data import filter_tiff_stack
+from midap.data.tiff_stack import TiffStack
+
+
+# Fixtures
+##########
+
+
+@pytest.fixture()
+def stack():
+    """
+    Creates a random stack of frames
+    :return: The stack as array
+    """
+
+    rng = np.random.default_rng(11)
+    return rng.integers(0, 2**16, size=(6, 16, 12), dtype=np.uint16)
+
+
+# Tests
+#######
+
+
+@mark.usefixtures("tmpdir")
+@mark.parametrize("imagej", [False, True])
+def test_read(tmpdir, stack, imagej):
+    """
+    Tests the page-wise reading of normal and (truncated) ImageJ stacks
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param stack: The stack to write and read
+    :param imagej: Whether to write the stack as truncated ImageJ hyperstack
+    """
+
+    path = tmpdir.joinpath("stack.tif")
+    tiff.imwrite(path, stack, imagej=imagej, truncate=imagej)
+
+    with TiffStack(path) as tiff_stack:
+        assert len(tiff_stack) == 6
+        assert tiff_stack.shape == stack.shape
+        assert np.all(tiff_stack[-1] == stack[-1])
+        for frame, true_frame in zip(tiff_stack, stack):
+            assert np.all(frame == true_frame)
+
+        with pytest.raises(IndexError):
+            tiff_stack.read(6)
+
+    # single images are stacks of length 1
+    path = tmpdir.joinpath("single.tif")
+    tiff.imwrite(path, stack[0])
+    with TiffStack(path) as tiff_stack:
+        assert tiff_stack.shape == (1, 16, 12)
+        assert np.all(tiff_stack[0] == stack[0])
+
+
+@mark.usefixtures("tmpdir")
+def test_filter_tiff_stack(tmpdir, stack):
+    """
+    Tests the filtering of a stack
+    :param tmpdir: A fixture that sets up a tmp directory
+    :param stack: The stack to filter
+    """
+
+    tiff.imwrite(tmpdir.joinpath("stack.tif"), stack)
+    filter_tiff_stack(tmpdir.joinpath("stack.tif"), tmpdir.joinpath("out.tif"), 1, 3)
+    assert np.all(tiff.imread(tmpdir.joinpath("out.tif")) == stack[1:4])
+
+    with pytest.raises(ValueError):
+        filter_tiff_stack(
+            tmpdir.joinpath("stack.tif"), tmpdir.joinpath("out.tif"), 2, 6
+        )
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+
+"""
+This file contains fixures that are shared between the tests in this directory
+"""
+
+
+@pytest.fixture()
+def synthetic_chambers():
+    """
+    Creates a factory for synthetic mother machine images, a row of chambers with a period of 37 pixels that
+    contain some cells
+    :return: A function that takes a seed and returns a tuple (img, start) of the image with shape (300, 800) and
+             the x coordinate of the first chamber
+    """
+
+    def make_img(seed):
+        rng = np.random.default_rng(seed)
+        img = rng.normal(100, 8, size=(300, 800))
+        start = rng.integers(5, 30)
+        for x in range(start, 786, 37):
+            img[60:240, x : x + 14] += 60
+            for y in rng.integers(70, 220, size=4):
+                img[y : y + 12, x + 3 : x + 11] -= 40
+        img = ndi.gaussian_filter(img, 1).astype(np.float32)
+
+        return img, start
+
+    return make_img
@@ -0,0 +1,37 @@
+from pytest import mark
+
+from midap.data.frame_store import get_frame_store
+from midap.imcut.automated_cutout import AutomatedCutout
+
+
+# Tests
+#######
+
+
+@mark.parametrize("seed, invert", [(0, False), (1, True), (2, False)])
+def test_cut_corners(tmp_path, synthetic_chambers, seed, invert):
+    """
+    Tests that the chambers of a synthetic mother machine are detected without user input
+    :param tmp_path: The tmp_path fixture from pytest
+    :param synthetic_chambers: A factory for synthetic mother machine images
+    :param seed: The seed of the synthetic image
+    :param invert: Whether the chambers are darker than the background
+    """
+
+    img, start = synthetic_chambers(seed)
+    if invert:
+        img = 300 - img
+
+    with get_frame_store(tmp_path.joinpath("raw_im"), ext=".tif") as store:
+        store.write("frame000", img)
+    cutout = AutomatedCutout(paths=tmp_path.joinpath("raw_im"))
+    cutout.cut_corners(img)
+
+    # the first chamber is enclosed without its neighbours
+    left_x, right_x, lower_y, upper_y = cutout.corners_cut
+    assert start - 11 < left_x <= start < start + 14 <= right_x < start + 37
+    assert abs(lower_y - 60) <= 3 and abs(upper_y - 240) <= 3
+
+    # all chambers that fit into the image are found
+    assert cutout.offsets == list(range(0, 800 - right_x + 1, 37))
+    cutout.close()
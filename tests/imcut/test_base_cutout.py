@@ -1,5 +1,13 @@
+import threading
+
+import numpy as np
 import pytest
+from scipy import ndimage as ndi
+from midap.data.frame_store import get_frame_store
+from midap.imcut import base_cutout
 from midap.imcut.base_cutout import CutoutImage
+from midap.imcut.interactive_cutout import InteractiveCutout
+from midap.imcut.registration import SHIFT_CACHE_NAME
 
 
 def test_base_cutout():
@@ -9,3 +17,295 @@ def test_base_cutout():
 
     with pytest.raises(TypeError):
         _ = CutoutImage(paths=None)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.float32])
+def test_do_cutout(dtype):
+    """
+    Tests that the cutouts and their normalization are identical to the ones of the padded images
+    :param dtype: The dtype of the image
+    """
+
+    rng = np.random.default_rng(6)
+    img = (200 * rng.random((30, 40))).astype(dtype)
+    cutout = InteractiveCutout.__new__(InteractiveCutout)
+
+    # corners inside the image, in the padding and outside of the padding
+    for corners in rng.integers(-25, 60, size=(200, 4)):
+        padded = np.pad(img, 10, mode="constant", constant_values=0)
+        left_x, right_x, lower_y, upper_y = corners + 10
+        true_cutout = padded[lower_y:upper_y, left_x:right_x]
+        cut = cutout.do_cutout(img, corners)
+        assert cut.dtype == img.dtype
+        assert np.array_equal(cut, true_cutout)
+
+        # the normalization of non-empty cutouts
+        if cut.size > 0 and cut.max() > cut.min():
+            true_scaled = (255 * ((cut - cut.min()) / np.max(cut - cut.min()))).astype(
+                "uint8"
+            )
+            out = np.empty(cut.shape, dtype=np.uint8)
+            assert np.array_equal(cutout.scale_pixel_val(cut), true_scaled)
+            assert cutout.scale_pixel_val(cut, out=out) is out
+            assert np.array_equal(out, true_scaled)
+
+
+def test_run_align_cutout_mother_machine(monkeypatch, tmp_path):
+    """
+    Tests that the mother machine cutout reads every frame only once and cuts all chambers from it
+    :param monkeypatch: The monkeypatch fixture from pytest to override methods
+    :param tmp_path: The tmp_path fixture from pytest
+    """
+
+    # the frames are shifted versions of the first frame
+    rng = np.random.default_rng(3)
+    base = rng.integers(0, 255, size=(64, 64), dtype=np.uint8)
+    raw_dir = tmp_path.joinpath("PH", "raw_im")
+    with get_frame_store(raw_dir) as store:
+        for i, shift in enumerate([(0, 0), (2, 3), (-1, 2)]):
+            store.write(f"frame{i:03d}", np.roll(base, shift, axis=(0, 1)))
+
+    def dummy_cutout(*args, **kwargs):
+        """
+        A monkeypatch to override the interactive cutout
+        """
+        cutout.corners_cut = (10, 20, 12, 40)
+        cutout.offsets = [0, 15, 30]
+
+    cutout = InteractiveCutout(paths=raw_dir)
+    monkeypatch.setattr(cutout, "cut_corners", dummy_cutout)
+
+    # count the reads of the frames
+    reads = []
+    read_frame = cutout.read_frame
+
+    def counting_read(channel_id, ix):
+        """
+        Counts the frames that are read
+        """
+        reads.append(ix)
+        return read_frame(channel_id, ix)
+
+    monkeypatch.setattr(cutout, "read_frame", counting_read)
+    cutout.run_align_cutout_mother_machine()
+    assert reads == [0, 1, 2]
+
+    # the registered cutouts of each chamber are identical
+    for chamber, offset in enumerate([0, 15, 30]):
+        path = tmp_path.joinpath("PH", f"chamber_{chamber}", "cut_im_rawcounts")
+        with get_frame_store(path, ext=".tif") as store:
+            assert len(store.names) == 3
+            for frame in store:
+                assert np.all(frame == base[12:40, 10 + offset : 20 + offset])
+
+
+def test_run_align_cutout_streaming(monkeypatch, tmp_path):
+    """
+    Tests that the cutouts are written while the frames are read instead of being collected for the whole channel
+    :param monkeypatch: The monkeypatch fixture from pytest to override methods
+    :param tmp_path: The tmp_path fixture from pytest
+    """
+
+    rng = np.random.default_rng(4)
+    raw_dir = tmp_path.joinpath("PH", "raw_im")
+    with get_frame_store(raw_dir) as store:
+        for i in range(6):
+            store.write(
+                f"frame{i:03d}", rng.integers(0, 255, size=(32, 32), dtype=np.uint8)
+            )
+
+    cutout = InteractiveCutout(paths=raw_dir)
+    cutout.corners_cut = (4, 20, 6, 28)
+    cutout.registration_batch_size = 2
+
+    # log the reads and writes
+    events = []
+    read_frame = cutout.read_frame
+    write = cutout.writer.write
+
+    def logging_read(channel_id, ix):
+        """
+        Logs the frames that are read
+        """
+        events.append("read")
+        return read_frame(channel_id, ix)
+
+    def logging_write(*args):
+        """
+        Logs the cutouts that are written
+        """
+        events.append("write")
+        return write(*args)
+
+    monkeypatch.setattr(cutout, "read_frame", logging_read)
+    monkeypatch.setattr(cutout.writer, "write", logging_write)
+    cutout.run_align_cutout()
+
+    # the first cutouts are written before the last frame is read
+    assert events.count("write") == 12
+    assert events.index("write") < len(events) - events[::-1].index("read") - 1
+    path = tmp_path.joinpath("PH", "cut_im")
+    with get_frame_store(path, ext=".png") as store:
+        assert len(store.names) == 6
+
+
+def test_run_align_cutout_subpixel(tmp_path):
+    """
+    Tests that subpixel shifts are estimated and compensated in the cutouts
+    :param tmp_path: The tmp_path fixture from pytest
+    """
+
+    # smooth frames that are shifted by fractions of a pixel
+    rng = np.random.default_rng(5)
+    base = ndi.gaussian_filter(rng.random((64, 64)), 3)
+    base = (60000 * (base - base.min()) / np.ptp(base)).astype(np.uint16)
+    raw_dir = tmp_path.joinpath("PH", "raw_im")
+    with get_frame_store(raw_dir, ext=".tif") as store:
+        for i, shift in enumerate([(0, 0), (1.5, -2.3), (-0.7, 3.2)]):
+            store.write(f"frame{i:03d}", ndi.shift(base, shift, order=3))
+
+    errors = {}
+    for registration in [True, "subpixel"]:
+        cutout = InteractiveCutout(paths=raw_dir)
+        cutout.corners_cut = (16, 48, 16, 48)
+        cutout.cache_shifts = False
+        cutout.run_align_cutout(registration=registration)
+        assert np.allclose(cutout.shifts, [(-1.5, 2.3), (0.7, -3.2)], atol=0.6)
+
+        path = tmp_path.joinpath("PH", "cut_im_rawcounts")
+        with get_frame_store(path, ext=".tif") as store:
+            cutouts = [store.read(name) for name in store.names]
+        assert all(c.dtype == np.uint16 and c.shape == (32, 32) for c in cutouts)
+        errors[registration] = np.mean(
+            np.abs(np.diff(np.array(cutouts, dtype=float), axis=0))
+        )
+
+    # the shifts are exact to a tenth of a pixel and the cutouts are much closer to each other
+    assert np.allclose(cutout.shifts, [(-1.5, 2.3), (0.7, -3.2)], atol=0.1)
+    assert errors["subpixel"] < 0.5 * errors[True]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_run_align_cutout_channels(monkeypatch, tmp_path, workers):
+    """
+    Tests that the channels after the first one are cut in parallel with the shifts of the first channel
+    :param monkeypatch: The monkeypatch fixture from pytest to override methods
+    :param tmp_path: The tmp_path fixture from pytest
+    :param workers: The number of workers
+    """
+
+    # three channels with the same drift
+    rng = np.random.default_rng(9)
+    paths = []
+    for channel in ["PH", "GFP", "RFP"]:
+        base = rng.integers(0, 255, size=(48, 48), dtype=np.uint8)
+        paths.append(tmp_path.joinpath(channel, "raw_im"))
+        with get_frame_store(paths[-1]) as store:
+            for i, shift in enumerate([(0, 0), (2, -1), (3, 4), (-2, 1)]):
+                store.write(f"frame{i:03d}", np.roll(base, shift, axis=(0, 1)))
+
+    cutout = InteractiveCutout(paths=paths, workers=workers)
+    cutout.corners_cut = (8, 30, 10, 36)
+
+    # log the threads that cut the channels
+    threads = {}
+    cutout_channel = cutout.cutout_channel
+
+    def logging_cutout(channel_id):
+        """
+        Logs the thread of a channel
+        """
+        threads[channel_id] = threading.get_ident()
+        return cutout_channel(channel_id)
+
+    monkeypatch.setattr(cutout, "cutout_channel", logging_cutout)
+    cutout.run_align_cutout()
+    assert len(cutout.shifts) == 3
+    assert (threads[1] != threads[0]) == (workers > 1)
+
+    # all channels are registered with the shifts of the first channel
+    for path in paths:
+        with get_frame_store(
+            path.parent.joinpath("cut_im_rawcounts"), ext=".tif"
+        ) as store:
+            frames = list(store)
+        assert len(frames) == 4
+        assert all(np.array_equal(frame, frames[0]) for frame in frames)
+
+
+def test_shift_cache(monkeypatch, tmp_path):
+    """
+    Tests that the shifts are saved and only frames with new content are registered again
+    :param monkeypatch: The monkeypatch fixture from pytest to override methods
+    :param tmp_path: The tmp_path fixture from pytest
+    """
+
+    rng = np.random.default_rng(4)
+    base = rng.integers(0, 255, size=(64, 64), dtype=np.uint8)
+    raw_dir = tmp_path.joinpath("PH", "raw_im")
+    with get_frame_store(raw_dir) as store:
+        for i, shift in enumerate([(0, 0), (2, 3), (-1, 2), (4, -2)]):
+            store.write(f"frame{i:03d}", np.roll(base, shift, axis=(0, 1)))
+
+    # count the registered frames
+    registered = []
+    get_registration = base_cutout.get_registration
+
+    def counting_registration(*args, **kwargs):
+        """
+        Counts the frames that are registered
+        """
+        engine = get_registration(*args, **kwargs)
+        shifts = engine.shifts
+
+        def counting_shifts(imgs):
+            """
+            Counts the frames of a batch
+            """
+            registered.extend(imgs)
+            return shifts(imgs)
+
+        engine.shifts = counting_shifts
+        return engine
+
+    monkeypatch.setattr(base_cutout, "get_registration", counting_registration)
+
+    def align():
+        """
+        Registers all frames with a new instance
+        """
+        cutout = InteractiveCutout(paths=raw_dir, cache_shifts=True)
+        cutout.align_all_images()
+        cutout.close()
+        return np.array(cutout.shifts)
+
+    # nothing is saved by default
+    cutout = InteractiveCutout(paths=raw_dir)
+    cutout.align_all_images()
+    cutout.close()
+    assert not tmp_path.joinpath("PH", SHIFT_CACHE_NAME).exists()
+    registered.clear()
+
+    # the cache is written once at the end of the registration
+    saves = []
+    save = base_cutout.ShiftCache.save
+    monkeypatch.setattr(
+        base_cutout.ShiftCache, "save", lambda self: saves.append(1) or save(self)
+    )
+    shifts = align()
+    assert len(registered) == 3
+    assert len(saves) == 1
+    assert tmp_path.joinpath("PH", SHIFT_CACHE_NAME).exists()
+
+    # a restart does not register anything
+    registered.clear()
+    assert np.all(align() == shifts)
+    assert len(registered) == 0
+
+    # only the changed frame is registered
+    with get_frame_store(raw_dir) as store:
+        store.write("frame002", np.roll(base, (5, 5), axis=(0, 1)))
+    new_shifts = align()
+    assert len(registered) == 1
+    assert np.all(new_shifts[[0, 2]] == shifts[[0, 2]])
+    assert np.all(new_shifts[1] == [-5, -5])
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from pytest import mark
+from scipy import ndimage as ndi
+from skimage.registration import phase_cross_correlation
+
+from midap.imcut.registration import (
+    PhaseCorrelation,
+    get_registration,
+    template_correlation,
+)
+
+
+# Tests
+#######
+
+
+@mark.parametrize("dtype", [np.uint8, np.uint16, np.float32])
+@mark.parametrize("shape", [(64, 64), (45, 70)])
+def test_phase_correlation(dtype, shape):
+    """
+    Tests that the batched registration returns the same shifts as phase_cross_correlation
+    :param dtype: The dtype of the images
+    :param shape: The shape of the images
+    """
+
+    rng = np.random.default_rng(7)
+    reference = (200 * rng.random(shape)).astype(dtype)
+
+    # shifted and noisy versions of the reference and some unrelated images
+    images = [
+        np.roll(reference, rng.integers(-15, 15, size=2), axis=(0, 1))
+        + (50 * rng.random(shape)).astype(dtype)
+        for _ in range(6)
+    ]
+    images += [(200 * rng.random(shape)).astype(dtype) for _ in range(3)]
+
+    correlation = PhaseCorrelation(reference, workers=2)
+    shifts = correlation.shifts(images)
+    assert shifts.shape == (len(images), 2)
+    for shift, image in zip(shifts, images):
+        true_shift = phase_cross_correlation(reference, image, normalization=None)[0]
+        assert np.all(shift == true_shift.astype(int))
+        assert np.all(correlation(image) == shift)
+
+    # the images need the shape of the reference
+    with pytest.raises(ValueError):
+        correlation.shifts([reference[1:]])
+
+
+@mark.parametrize("upsample_factor", [10, 20])
+def test_phase_correlation_subpixel(upsample_factor):
+    """
+    Tests that the upsampled registration returns the same shifts as phase_cross_correlation
+    :param upsample_factor: The upsample factor of the registration
+    """
+
+    rng = np.random.default_rng(8)
+    reference = ndi.gaussian_filter(rng.normal(size=(48, 70)), 2)
+    images = [
+        ndi.shift(reference, rng.uniform(-6, 6, size=2), mode="wrap") for _ in range(5)
+    ]
+
+    shifts = PhaseCorrelation(reference, upsample_factor=upsample_factor).shifts(images)
+    for shift, image in zip(shifts, images):
+        true_shift = phase_cross_correlation(
+            reference, image, normalization=None, upsample_factor=upsample_factor
+        )[0]
+        assert np.allclose(shift, true_shift)
+
+
+@mark.parametrize("mode", ["full", "roi", "pyramid"])
+def test_registration_modes(mode):
+    """
+    Tests that all registration modes find the shifts of a large frame
+    :param mode: The registration mode
+    """
+
+    # a smooth frame, such that the downsampled frames still correlate
+    rng = np.random.default_rng(1)
+    reference = ndi.gaussian_filter(rng.random((256, 256)), 2)
+    reference = (255 * (reference - reference.min()) / np.ptp(reference)).astype(
+        np.uint8
+    )
+    true_shifts = rng.integers(-20, 20, size=(5, 2))
+    images = [np.roll(reference, shift, axis=(0, 1)) for shift in true_shifts]
+
+    registration = get_registration(reference, mode=mode, window=(80, 180, 60, 160))
+    assert np.all(registration.shifts(images) == -true_shifts)
+
+    with pytest.raises(ValueError):
+        get_registration(reference, mode="unknown")
+
+
+def test_template_correlation():
+    """
+    Tests the normalized cross-correlation of a template with all windows of a strip
+    """
+
+    rng = np.random.default_rng(2)
+    strip = rng.random((20, 90))
+    template = strip[:, 30:42] + 0.1 * rng.random((20, 12))
+
+    correlation = template_correlation(strip, template)
+    assert correlation.shape == (90 - 12 + 1,)
+    for offset in [0, 17, 30, 78]:
+        window = strip[:, offset : offset + 12]
+        true_correlation = np.corrcoef(window.ravel(), template.ravel())[0, 1]
+        assert np.isclose(correlation[offset], true_correlation)
+    assert np.argmax(correlation) == 30
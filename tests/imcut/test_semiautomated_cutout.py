@@ -0,0 +1,35 @@
+import numpy as np
+from pytest import mark
+
+from midap.data.frame_store import get_frame_store
+from midap.imcut.semiautomated_cutout import SemiAutomatedCutout
+
+
+# Tests
+#######
+
+
+@mark.parametrize("seed", [0, 1, 2])
+def test_get_offsets(tmp_path, synthetic_chambers, seed):
+    """
+    Tests that the chambers of a synthetic mother machine are detected from the selected chamber
+    :param tmp_path: The tmp_path fixture from pytest
+    :param synthetic_chambers: A factory for synthetic mother machine images
+    :param seed: The seed of the synthetic image
+    """
+
+    img, start = synthetic_chambers(seed)
+
+    with get_frame_store(tmp_path.joinpath("raw_im"), ext=".tif") as store:
+        store.write("frame000", img)
+    cutout = SemiAutomatedCutout(paths=tmp_path.joinpath("raw_im"))
+    cutout._interactive_img = img
+
+    # select the third chamber, the chambers to the left are skipped
+    x1 = start + 2 * 37 - 3
+    offsets = cutout.get_offsets(x1, x1 + 20, 50, 250)
+    assert np.all(offsets[:19] == 37 * np.arange(19))
+
+    # too wide selections are ignored
+    assert len(cutout.get_offsets(x1, x1 + 120, 50, 250)) == 0
+    cutout.close()
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from midap.networks.deltav2 import unet_track
+from midap.networks.onnx_backend import ONNX_CACHE_DIR, load_onnx_model, onnx_path
+from midap.networks.unets import UNetv1
+
+# Fixtures
+##########
+
+
+@pytest.fixture()
+def weights(tmp_path):
+    """
+    Creates a placeholder for the weights, the models of the tests keep their random initialization
+    :param tmp_path: A fixture that sets up a tmp directory
+    :return: The path to the weights
+    """
+
+    path = tmp_path.joinpath("model_weights_test.h5")
+    path.write_bytes(b"weights")
+    return path
+
+
+# Tests
+#######
+
+
+def test_onnx_path(weights):
+    """
+    Tests that the graphs are cached next to the weights and that changed weights or input sizes get a new graph
+    :param weights: The path to the weights
+    """
+
+    path = onnx_path(weights, (64, 64, 1))
+    assert path.parent == weights.parent.joinpath(ONNX_CACHE_DIR)
+    assert path.name.startswith("model_weights_test_64x64x1_")
+    assert onnx_path(weights, (64, 64, 1)) == path
+    assert onnx_path(weights, (64, 128, 1)) != path
+
+    # new weights invalidate the graph
+    stat = weights.stat()
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert onnx_path(weights, (64, 64, 1)) != path
+
+
+@pytest.mark.parametrize(
+    "network, input_size",
+    [
+        (lambda size: UNetv1(input_size=size, inference=True), (64, 96, 1)),
+        (lambda size: unet_track(None, size), (32, 32, 4)),
+    ],
+)
+def test_onnx_parity(weights, network, input_size):
+    """
+    Tests that the exported networks predict the same as TensorFlow and that the export is cached
+    :param weights: The path to the weights
+    :param network: A function that creates the network for an input size
+    :param input_size: The input size of the network
+    """
+
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tf2onnx")
+
+    model = network(input_size)
+    onnx_model = load_onnx_model(lambda: model, weights, input_size, threads=2)
+    assert onnx_path(weights, input_size).exists()
+
+    x = np.random.default_rng(3).random((3,) + input_size).astype(np.float32)
+    expected = model.predict(x, verbose=0)
+    np.testing.assert_allclose(onnx_model.predict(x, batch_size=2), expected, atol=1e-4)
+
+    # the cached graph is used
+    def fail():
+        raise AssertionError("The network was exported again")
+
+    onnx_model = load_onnx_model(fail, weights, input_size)
+    np.testing.assert_allclose(onnx_model.predict(x), expected, atol=1e-4)
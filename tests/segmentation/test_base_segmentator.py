@@ -1,5 +1,8 @@
+import threading
+
 import pytest
 import numpy as np
+import skimage.io as io
 from midap.segmentation.base_segmentator import SegmentationPredictor
 from midap.segmentation.unet_segmentator import UNetSegmentation
 
@@ -106,3 +109,69 @@ def test_postprocess_seg_preserves_shape(unet_instance):
     seg[5:20, 5:20] = 1
     result = unet_instance.postprocess_seg(seg)
     assert result.shape == seg.shape
+
+
+# Tests for SegmentationPredictor.run_image_stack
+#################################################
+
+
+def test_run_image_stack_batches(tmp_path):
+    """
+    The images are segmented in batches of at most batch_size images and the results keep the order of the images
+    """
+    path_cut = tmp_path.joinpath("cut_im")
+    path_cut.mkdir()
+    for i in range(7):
+        # image i contains i + 1 cells
+        img = np.zeros((32, 64), dtype=np.uint8)
+        for j in range(i + 1):
+            img[10:20, 2 + 8 * j : 6 + 8 * j] = 255
+        io.imsave(path_cut.joinpath(f"img{i}_cut.png"), img, check_contrast=False)
+
+    segmentation = UNetSegmentation(
+        path_model_weights=str(tmp_path),
+        postprocessing=False,
+        batch_size=3,
+        prefetch=1,
+        workers=3,
+    )
+    batches = []
+
+    def threshold(imgs):
+        batches.append(len(imgs))
+        return [img > 0.5 for img in imgs]
+
+    segmentation.segmentation_method = threshold
+    segmentation.run_image_stack(channel_path=str(tmp_path), clean_border=False)
+
+    assert batches == [3, 3, 1]
+    assert segmentation.num_cells == [1, 2, 3, 4, 5, 6, 7]
+    for i in range(7):
+        seg = io.imread(tmp_path.joinpath("seg_im", f"img{i}_seg.tif"))
+        assert seg.max() == i + 1
+
+
+def test_run_image_stack_error(tmp_path):
+    """
+    The reader of the batches is stopped if the segmentation fails
+    """
+    path_cut = tmp_path.joinpath("cut_im")
+    path_cut.mkdir()
+    for i in range(10):
+        img = np.zeros((32, 64), dtype=np.uint8)
+        io.imsave(path_cut.joinpath(f"img{i}_cut.png"), img, check_contrast=False)
+
+    segmentation = UNetSegmentation(
+        path_model_weights=str(tmp_path), postprocessing=False, batch_size=1, prefetch=1
+    )
+
+    def fail(imgs):
+        raise RuntimeError("segmentation failed")
+
+    segmentation.segmentation_method = fail
+    with pytest.raises(RuntimeError) as error:
+        segmentation.run_image_stack(channel_path=str(tmp_path), clean_border=False)
+
+    # the traceback keeps the frames alive, the reader has to be stopped anyway
+    assert error.value is not None
+    assert not any(t.name == "midap_reader" for t in threading.enumerate())
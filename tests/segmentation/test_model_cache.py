@@ -0,0 +1,108 @@
+import numpy as np
+
+from midap.segmentation import unet_segmentator
+from midap.segmentation.model_cache import ModelCache, model_cache, model_key
+from midap.segmentation.unet_segmentator import UNetSegmentation
+
+
+# Tests
+#######
+
+
+def test_model_cache():
+    """
+    Tests that the models are created once and evicted in LRU order
+    """
+
+    class Model:
+        """
+        A model with a given number of parameters
+        """
+
+        def __init__(self, n_params):
+            self.n_params = n_params
+
+        def count_params(self):
+            return self.n_params
+
+    cache = ModelCache(max_models=2, max_bytes=None)
+    created = []
+
+    def factory(n_params=1):
+        created.append(n_params)
+        return Model(n_params)
+
+    model = cache.get(("a",), factory)
+    assert cache.get(("a",), factory) is model
+    assert len(created) == 1
+
+    # the least recently used model is evicted
+    cache.get(("b",), factory)
+    cache.get(("a",), factory)
+    cache.get(("c",), factory)
+    assert ("a",) in cache and ("c",) in cache and ("b",) not in cache
+
+    # the memory limit, the new model is always kept
+    cache.max_bytes = 4 * 10
+    cache.get(("d",), lambda: factory(9))
+    assert ("d",) in cache and ("a",) not in cache and cache.nbytes == 40
+    cache.get(("e",), lambda: factory(20))
+    assert len(cache) == 1 and cache.nbytes == 80
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_model_key(tmp_path):
+    """
+    Tests that the keys of relative and absolute paths are the same
+    :param tmp_path: The tmp_path fixture from pytest
+    """
+
+    weights = tmp_path.joinpath("weights.h5")
+    weights.write_bytes(b"")
+    relative = weights.relative_to(tmp_path)
+    assert model_key("A", weights, (16, 16, 1)) == model_key(
+        "A", tmp_path.joinpath(".", relative), [16, 16, 1]
+    )
+    assert model_key("A", "name") != model_key("A", "name", device="gpu")
+    assert model_key("A", "name") != model_key("B", "name")
+
+
+def test_unet_shared(monkeypatch, tmp_path):
+    """
+    Tests that the UNet is built once for all predictors, e.g. for all chambers of a mother machine
+    :param monkeypatch: The monkeypatch fixture from pytest to replace the UNet
+    :param tmp_path: The tmp_path fixture from pytest
+    """
+
+    built = []
+
+    class FakeUNet:
+        """
+        A UNet that predicts the input
+        """
+
+        def __init__(self, input_size, inference):
+            built.append(input_size)
+
+        def load_weights(self, path):
+            pass
+
+        def predict(self, imgs, **kwargs):
+            return imgs
+
+    monkeypatch.setattr(unet_segmentator, "UNetv1", FakeUNet)
+    weights = tmp_path.joinpath("model_weights_test.h5")
+    weights.write_bytes(b"")
+
+    imgs = [np.random.default_rng(i).random((30, 20)) for i in range(3)]
+    for _ in range(3):
+        pred = UNetSegmentation(
+            path_model_weights=tmp_path, postprocessing=False, model_weights=weights
+        )
+        pred.set_segmentation_method(tmp_path)
+        segs = pred.segmentation_method(imgs)
+        assert len(segs) == 3
+    assert built == [(32, 32, 1)]
+    model_cache.clear()
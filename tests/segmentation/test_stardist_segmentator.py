@@ -17,6 +17,7 @@ directly.  The tests verify the inherited run_image_stack pipeline and class
 initialisation behaviour.
 """
 
+
 # Fixtures
 ##########
 
@@ -88,3 +89,88 @@ def test_run_image_stack(segmentation_instance, img1):
     for f in seg_files:
         img = imread(os.path.join(channel_path, "seg_im", f))
         assert np.unique(img).size == 1
+
+
+@pytest.mark.parametrize(
+    "n_tiles, workers, pipelined",
+    [(None, 1, True), ((2, 2), 2, True), ((2, 2), 1, False)],
+)
+def test_predict_stack(monkeypatch, tmp_path, n_tiles, workers, pipelined):
+    """
+    Tests that the model is loaded once and that the stack prediction is identical to predict_instances
+    :param monkeypatch: The monkeypatch fixture from pytest to count the model loads
+    :param tmp_path: The tmp_path fixture from pytest
+    :param n_tiles: The tiling of the prediction
+    :param workers: The number of threads for the non-maximum suppression
+    :param pipelined: Whether StarDist supports the pipelined prediction, otherwise predict_instances is used
+    """
+    from csbdeep.utils import normalize
+    from stardist.models import Config2D, StarDist2D
+
+    from midap.segmentation import stardist_segmentator
+
+    # a small untrained model
+    config = Config2D(
+        n_rays=8,
+        grid=(1, 1),
+        n_channel_in=1,
+        unet_n_depth=1,
+        unet_n_filter_base=4,
+        train_patch_size=(32, 32),
+    )
+    model = StarDist2D(config, name="tiny", basedir=str(tmp_path))
+    model.keras_model.save_weights(str(tmp_path.joinpath("tiny", "weights_best.h5")))
+
+    # count the loads of the model
+    loads = []
+
+    def counting_model(*args, **kwargs):
+        loads.append(args)
+        return StarDist2D(*args, **kwargs)
+
+    monkeypatch.setattr(stardist_segmentator, "StarDist2D", counting_model)
+
+    instance = StarDistSegmentation(
+        path_model_weights=tmp_path,
+        postprocessing=True,
+        model_weights="tiny",
+        n_tiles=n_tiles,
+        workers=workers,
+    )
+    instance.set_segmentation_method(tmp_path)
+    if not pipelined:
+        # a StarDist version that only offers predict_instances
+        load_model = instance.load_model
+
+        class PublicModel:
+            def predict_instances(self, *args, **kwargs):
+                return load_model().predict_instances(*args, **kwargs)
+
+        monkeypatch.setattr(instance, "load_model", PublicModel)
+
+    rng = np.random.default_rng(3)
+    imgs = [rng.random((64, 96)).astype(np.float32) for _ in range(4)]
+    masks = instance.segmentation_method(imgs)
+    assert len(loads) == 1
+    assert masks.shape == (4, 64, 96)
+
+    for img, mask in zip(imgs, masks):
+        true_mask, _ = model.predict_instances(
+            normalize(img), n_tiles=n_tiles, show_tile_progress=False
+        )
+        assert np.array_equal(mask, true_mask)
+
+
+def test_stardist_api():
+    """
+    Tests that the installed StarDist still splits predict_instances the way predict_stack uses it
+    """
+    import inspect
+
+    from stardist.models import StarDist2D
+
+    assert hasattr(StarDist2D, "predict_sparse")
+    assert hasattr(StarDist2D, "_instances_from_prediction")
+    params = inspect.signature(StarDist2D._instances_from_prediction).parameters
+    assert list(params)[1:4] == ["img_shape", "prob", "dist"]
+    assert "points" in params
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from midap.segmentation.tiling import blending_window, predict_tiled, tile_starts
+
+# Tests
+#######
+
+
+def test_tile_starts():
+    """
+    Tests that the tiles cover the axis with at least the overlap and the last tile ends with the axis
+    """
+
+    assert tile_starts(64, 64, 16) == [0]
+    assert tile_starts(300, 64, 16) == [0, 48, 96, 144, 192, 236]
+    starts = tile_starts(1000, 128, 32)
+    assert np.all(np.diff(starts) <= 128 - 32)
+    assert starts[-1] + 128 == 1000
+
+
+@pytest.mark.parametrize("blending", ["cosine", "linear"])
+def test_blending_window(blending):
+    """
+    Tests the weights of the tiles
+    :param blending: The blending of the tiles
+    """
+
+    weights = blending_window(64, 16, blending)
+    assert weights.shape == (64, 64)
+    assert np.all(weights > 0) and np.all(weights <= 1)
+    assert np.all(weights[16:48, 16:48] == 1)
+    np.testing.assert_allclose(weights, weights.T)
+    np.testing.assert_allclose(weights, weights[::-1, ::-1])
+
+    # the ramps of neighbouring tiles add up to 1
+    np.testing.assert_allclose(weights[0, :16] + weights[0, 48:], weights[0, 16])
+
+    with pytest.raises(ValueError):
+        _ = blending_window(64, 16, "gaussian")
+
+
+@pytest.mark.parametrize("shape", [(100, 300), (20, 40), (64, 64)])
+def test_predict_tiled(shape):
+    """
+    Tests that a pixel-wise model gives the same prediction in tiles as on the full image
+    :param shape: The shape of the image
+    """
+
+    img = np.random.default_rng(1).random(shape + (2,))
+    tile_shapes = []
+
+    def predict(tiles):
+        tile_shapes.append(tiles.shape)
+        return tiles[..., :1] ** 2
+
+    pred = predict_tiled(predict, img, tile_size=64, overlap=16)
+    assert pred.shape == shape
+    np.testing.assert_allclose(pred, img[..., 0] ** 2)
+    assert all(s[1:] == (64, 64, 2) for s in tile_shapes)
+
+    with pytest.raises(ValueError):
+        _ = predict_tiled(predict, img, tile_size=64, overlap=40)
@@ -232,3 +232,96 @@ def test_seg_method_watershed_output_shape(segmentation_instance, img1):
     imgs = [img1]
     segs = segmentation_instance.seg_method_watershed(imgs)
     assert segs[0].shape == img1.shape
+
+
+def test_seg_method_unet_tiled(monkeypatch, tmp_path):
+    """
+    In tiled mode one UNet of the tile size predicts images of all sizes
+    """
+    from midap.segmentation import unet_segmentator
+    from midap.segmentation.model_cache import model_cache
+
+    built = []
+
+    class FakeUNet:
+        """
+        A UNet that predicts the input
+        """
+
+        def __init__(self, input_size, inference):
+            built.append(input_size)
+
+        def load_weights(self, path):
+            pass
+
+        def predict(self, imgs, **kwargs):
+            return imgs
+
+    monkeypatch.setattr(unet_segmentator, "UNetv1", FakeUNet)
+    model_cache.clear()
+    weights = tmp_path.joinpath("model_weights_test.h5")
+    weights.write_bytes(b"")
+
+    pred = UNetSegmentation(
+        path_model_weights=tmp_path,
+        postprocessing=False,
+        model_weights=weights,
+        tile_size=64,
+        tile_overlap=16,
+    )
+    pred.set_segmentation_method(tmp_path)
+    for shape in [(50, 70), (130, 200)]:
+        img = np.random.default_rng(2).random(shape)
+        segs = pred.segmentation_method([img])
+        scaled = pred.scale_pixel_vals(img)
+        np.testing.assert_array_equal(segs[0], (scaled > 0.5).astype(int))
+    assert built == [(64, 64, 1)]
+    model_cache.clear()
+
+    # the tiles have to fit the UNet
+    with pytest.raises(ValueError):
+        _ = UNetSegmentation(
+            path_model_weights=tmp_path, postprocessing=False, tile_size=70
+        )
+    with pytest.raises(ValueError):
+        _ = UNetSegmentation(
+            path_model_weights=tmp_path,
+            postprocessing=False,
+            tile_size=64,
+            tile_overlap=48,
+        )
+
+
+def test_load_unet_onnx(monkeypatch, tmp_path):
+    """
+    The ONNX backend loads the exported UNet once per input size and thread count
+    """
+    from midap.segmentation import unet_segmentator
+    from midap.segmentation.model_cache import model_cache
+
+    loaded = []
+
+    def fake_load(factory, weights, input_size, threads=0):
+        loaded.append((input_size, threads))
+        return object()
+
+    monkeypatch.setattr(unet_segmentator, "load_onnx_model", fake_load)
+    model_cache.clear()
+    weights = tmp_path.joinpath("model_weights_test.h5")
+    weights.write_bytes(b"")
+
+    pred = UNetSegmentation(
+        path_model_weights=tmp_path,
+        postprocessing=False,
+        backend="onnx",
+        onnx_threads=2,
+    )
+    model = pred.load_unet(weights, (64, 64, 1))
+    assert pred.load_unet(weights, (64, 64, 1)) is model
+    assert loaded == [((64, 64, 1), 2)]
+    model_cache.clear()
+
+    with pytest.raises(ValueError):
+        _ = UNetSegmentation(
+            path_model_weights=tmp_path, postprocessing=False, backend="tflite"
+        )
@@ -66,6 +66,65 @@ def test_Config(tmp_dir):
     # check all the id section tests
     config.validate_id_section("pos1", basic=True)
 
+    # the registration is a boolean or subpixel
+    assert config.get_registration("pos1") is True
+    config.set("pos1", "Registration", "subpixel")
+    assert config.get_registration("pos1") == "subpixel"
+    config.set("pos1", "Registration", "maybe")
+    with pytest.raises(ValueError):
+        config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "Registration", "True")
+
+    # the tiling of the UNet inference
+    assert config.get_tiling("pos1")["tile_size"] is None
+    config.set("pos1", "SegmentationTileSize", "256")
+    config.validate_id_section("pos1", basic=True)
+    assert config.get_tiling("pos1") == {
+        "tile_size": 256,
+        "tile_overlap": 64,
+        "tile_blending": "cosine",
+        "n_tiles": None,
+    }
+    config.set("pos1", "SegmentationTileOverlap", "200")
+    with pytest.raises(ValueError):
+        config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "SegmentationTileOverlap", "64")
+    config.set("pos1", "SegmentationTileSize", "100")
+    with pytest.raises(ValueError):
+        config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "SegmentationTileSize", "None")
+    config.set("pos1", "SegmentationNTiles", "2,2")
+    assert config.get_tiling("pos1")["n_tiles"] == (2, 2)
+    # only StarDist supports n_tiles
+    with pytest.raises(ValueError):
+        config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "SegmentationClass", "StarDistSegmentation")
+    config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "SegmentationNTiles", "2,0")
+    with pytest.raises(ValueError):
+        config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "SegmentationClass", "UNetSegmentation")
+    config.set("pos1", "SegmentationNTiles", "None")
+
+    # the inference backend of the networks
+    assert config.get_inference("pos1") == {"backend": "tensorflow", "onnx_threads": 0}
+    config.set("pos1", "InferenceBackend", "tflite")
+    with pytest.raises(ValueError):
+        config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "InferenceBackend", "onnx")
+    config.set("pos1", "InferenceThreads", "-1")
+    with pytest.raises(ValueError):
+        config.validate_id_section("pos1", basic=True)
+    config.set("pos1", "InferenceBackend", "tensorflow")
+    config.set("pos1", "InferenceThreads", "0")
+
+    # the options of the stages with their defaults
+    options = config.get_identifier_options("pos1")
+    assert options["workers"] == 1 and options["fuse_split_cut"] is False
+    assert options["copy_strategy"] == "copy" and options["cache_shifts"] is False
+    assert options["seg_tiling"] == config.get_tiling("pos1")
+    assert options["inference"] == config.get_inference("pos1")
+
     # everything about corners
     with pytest.raises(ValueError):
         config.validate_id_section("pos1", basic=False)